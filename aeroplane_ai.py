@@ -0,0 +1,144 @@
+import random
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import aeroplane_endgame
+import aeroplane_policy
+import aeroplane_rules
+
+# --------------------------
+# Computer Squadrons
+# --------------------------
+# play_turn() computes one whole computer turn from a state: upgrades, the
+# roll and the plane to fly. It is pure and runs on a worker pool, so the
+# app only submits a state and applies the result on a later rerun.
+#
+# Squadrons never interact on this board (there are no captures), so a
+# squadron's best flight depends only on its own planes. Plane choice is an
+# expectimax over the squadron's own next rolls, deepened one roll at a
+# time until the time budget runs out; the last fully searched depth wins.
+# When the squadron's policy table has been built (see aeroplane_policy),
+# upgrades and the plane come from the table instead, with no search. Once
+# every squadron is down to two planes, the endgame tablebase picks the
+# flight with the best chance to win while everyone flies the tables.
+TURN_BUDGET = 0.25           # seconds of search per turn
+MAX_DEPTH = 4
+LANDED_BONUS = 0.5           # a landed plane also unlocks upgrades
+AIRBORNE_BONUS = 0.1         # a plane off the departure airport can use any roll
+
+# Fastest first: a faster plane covers more of the remaining distance per roll
+UPGRADE_PREFERENCE = ('supersonic', 'jet', 'cargo')
+
+TurnResult = namedtuple("TurnResult", "state events dice_roll plane depth")
+
+class _OutOfTime(Exception):
+    pass
+
+def evaluate(state, player):
+    """How close player's squadron is to landing everything, higher is better"""
+    squadron = state.player(player)
+    start_pos = aeroplane_rules.BOARD_POSITIONS[f'start_{player}']
+    distance = aeroplane_rules.FINISH - start_pos
+    value = 0.0
+    for pos in squadron.planes:
+        if pos == aeroplane_rules.FINISH:
+            value += 1.0 + LANDED_BONUS
+        elif pos != start_pos:
+            value += AIRBORNE_BONUS + (pos - start_pos) / distance
+    return value
+
+def _children(state, player, dice_roll, now):
+    """(plane, state after flying it) for each plane that can fly dice_roll"""
+    rolled = state._replace(dice_roll=dice_roll)
+    children = []
+    for plane in aeroplane_rules.movable_planes(rolled):
+        moved_state, _ = aeroplane_rules.move_plane(rolled, player, plane, dice_roll, now)
+        children.append((plane, moved_state))
+    return children
+
+def _expectimax(state, player, depth, deadline, now):
+    """Expected value over player's next roll, flying the best plane each time"""
+    if depth == 0 or state.player(player).score == 4:
+        return evaluate(state, player)
+    if time.perf_counter() > deadline:
+        raise _OutOfTime
+    total = 0.0
+    for dice_roll in range(1, 7):
+        children = _children(state, player, dice_roll, now)
+        if children:
+            total += max(_expectimax(child, player, depth - 1, deadline, now) for _, child in children)
+        else:
+            total += _expectimax(state, player, depth - 1, deadline, now)
+    return total / 6
+
+def choose_plane(state, deadline):
+    """(plane, depth) to fly with state's dice roll, or (None, 0) if no plane can fly"""
+    player = state.current_player
+    now = datetime.now()
+    children = _children(state, player, state.dice_roll, now)
+    if not children:
+        return None, 0
+    if len(children) == 1:
+        return children[0][0], 0
+
+    best_plane, best_depth = children[0][0], 0
+    for depth in range(MAX_DEPTH):
+        try:
+            values = [(_expectimax(child, player, depth, deadline, now), -plane, plane) for plane, child in children]
+        except _OutOfTime:
+            break
+        # Ties go to the lowest-numbered plane
+        best_plane, best_depth = max(values)[2], depth
+    return best_plane, best_depth
+
+def upgrades(state):
+    """convert_plane results for every plane worth upgrading, in order"""
+    player = state.current_player
+    results = []
+    for plane, plane_type in enumerate(state.player(player).plane_types):
+        if plane_type != 'normal':
+            continue
+        for new_type in UPGRADE_PREFERENCE:
+            result = aeroplane_rules.convert_plane(state, player, plane, new_type)
+            if result is not None:
+                state = result[0]
+                results.append(result)
+                break
+    return results
+
+def play_turn(state, seed, budget=TURN_BUDGET):
+    """One computer turn for state.current_player, as a TurnResult ready to commit"""
+    deadline = time.perf_counter() + budget
+    rng = random.Random(seed)
+    player = state.current_player
+    table = aeroplane_policy.load_table(player)
+    endgame = aeroplane_endgame.win_odds(state) is not None
+    events = []
+    # The tables upgrade a plane only as it flies, once the roll is known
+    if table is None and not endgame:
+        for upgraded_state, upgrade_events in upgrades(state):
+            state = upgraded_state
+            events.extend(upgrade_events)
+
+    dice_roll = rng.randint(1, 6)
+    state = state._replace(
+        dice_roll=dice_roll,
+        last_move=f"{aeroplane_rules.PLAYER_NAMES[player]} squadron (computer) set flight path with distance {dice_roll}"
+    )
+    advice = aeroplane_endgame.advise(state) if endgame else None
+    if advice is None and table is not None:
+        advice = table.advise(state.player(player), dice_roll)
+    if advice is not None:
+        plane, depth = advice.plane, 0
+        if advice.convert_to:
+            state, convert_events = aeroplane_rules.convert_plane(state, player, plane, advice.convert_to)
+            events.extend(convert_events)
+    else:
+        plane, depth = choose_plane(state, deadline)
+    if plane is not None:
+        state, move_events = aeroplane_rules.move_plane(state, player, plane, dice_roll)
+        events.extend(move_events)
+    state, turn_events = aeroplane_rules.end_turn(state)
+    events.extend(turn_events)
+    return TurnResult(state, events, dice_roll, plane, depth)
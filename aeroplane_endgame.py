@@ -0,0 +1,295 @@
+import argparse
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import aeroplane_policy
+import aeroplane_rules
+
+# --------------------------
+# Endgame Tablebase
+# --------------------------
+# Once a squadron is down to its last one or two planes, its state is small
+# enough to enumerate exactly: two plane kinds, each landed or at a distance
+# from base in one of the four plane types. For every such state the build
+# works out the distribution of turns the squadron still needs, under the
+# full move_plane rules: speed multipliers, conversions (free, and made as a
+# plane flies), cargo carrying a plane from the same square, and the extra
+# roll on a 6. Each roll flies the move with the fewest expected turns.
+#
+# Squadrons never interact, so once every squadron is in the endgame the
+# game is decided by those four distributions and the seat order. The win
+# probabilities follow with no sampling (to TAIL), for squadrons that fly
+# the fewest-expected-turns moves from then on. That is not always the move
+# that maximises the chance to win: a squadron behind may do better with a
+# riskier line. The figures are the chances under that policy, not the best
+# any player could reach.
+#
+# The tablebase is one uncompressed .npz built by `python aeroplane_endgame.py`:
+# per squadron, <color>_pmf holds P(turns = 1, 2, ...) for every state back
+# to back, trimmed once the rest is under TAIL, and <color>_offsets[i] is
+# where state i starts. Arrays are read from the file on first use.
+TABLEBASE_PATH = os.environ.get("AEROPLANE_ENDGAME", os.path.join(aeroplane_policy.POLICY_DIR, "endgame.npz"))
+ENDGAME_PLANES = 2
+TAIL = 1e-9
+MAX_TURNS = 256
+
+TYPES = tuple(aeroplane_rules.PLANE_TYPES)
+SPEEDS = tuple(aeroplane_rules.PLANE_TYPES[t]['speed'] for t in TYPES)
+UNLOCK_SCORES = tuple(aeroplane_rules.PLANE_TYPES[t].get('unlock_score', 0) for t in TYPES)
+CARGO = TYPES.index('cargo')
+
+Advice = namedtuple("Advice", "plane convert_to odds")
+
+def distance(color):
+    return aeroplane_rules.FINISH - aeroplane_rules.BOARD_POSITIONS[f'start_{color}']
+
+def kind_count(color):
+    """Every distance from base in every plane type, and landed"""
+    return len(TYPES) * distance(color) + 1
+
+def state_count(color):
+    kinds = kind_count(color)
+    return kinds * (kinds + 1) // 2
+
+def _pair_index(a, b):
+    return a + b * (b + 1) // 2
+
+def squadron_index(color, squadron):
+    """Tablebase index of a squadron with at most two planes left, or None"""
+    start_pos = aeroplane_rules.BOARD_POSITIONS[f'start_{color}']
+    landed = kind_count(color) - 1
+    kinds = sorted(
+        landed if pos == aeroplane_rules.FINISH else (pos - start_pos) * len(TYPES) + TYPES.index(plane_type)
+        for pos, plane_type in zip(squadron.planes, squadron.plane_types)
+    )
+    if kinds[ENDGAME_PLANES] != landed:
+        return None
+    return _pair_index(kinds[0], kinds[1])
+
+# --------------------------
+# Building
+# --------------------------
+def _moves(color, a, b, dice_roll):
+    """Successor pairs for every way to fly dice_roll from the pair (a, b)"""
+    dist = distance(color)
+    landed = kind_count(color) - 1
+    score = aeroplane_rules.PLANES_PER_SQUADRON - ENDGAME_PLANES + (a == landed) + (b == landed)
+    successors = []
+    for slot, (kind, other) in enumerate(((a, b), (b, a))):
+        if kind == landed or (slot and a == b):
+            continue
+        pos, own_type = divmod(kind, len(TYPES))
+        if pos == 0 and dice_roll != 6:
+            continue
+        flight_types = [own_type]
+        if TYPES[own_type] == 'normal':
+            flight_types += [t for t in range(len(TYPES)) if TYPES[t] != 'normal' and UNLOCK_SCORES[t] <= score]
+        for flight_type in flight_types:
+            new_pos = 1 if pos == 0 else pos + dice_roll * SPEEDS[flight_type]
+            moved = landed if new_pos >= dist else new_pos * len(TYPES) + flight_type
+            carried = other
+            # A cargo plane off its base carries a plane on its square, unless it lands
+            if flight_type == CARGO and pos and moved != landed and other != landed and other // len(TYPES) == pos:
+                carried = new_pos * len(TYPES) + other % len(TYPES)
+            successors.append(_pair_index(min(moved, carried), max(moved, carried)))
+    return successors
+
+def solve(color):
+    """(turns, cdf) per state: expected turns left, and P(done within t turns) for t up to MAX_TURNS"""
+    dist = distance(color)
+    kinds = kind_count(color)
+    landed = kinds - 1
+    count = state_count(color)
+    finished = count - 1
+    pairs = [(a, b) for b in range(kinds) for a in range(b + 1)]
+
+    def progress(kind):
+        return dist if kind == landed else kind // len(TYPES)
+    # Every move adds distance, so successors are always solved first
+    order = sorted(range(count), key=lambda i: -(progress(pairs[i][0]) + progress(pairs[i][1])))
+
+    turns = np.zeros(count)
+    cdf = np.zeros((count, MAX_TURNS + 1))
+    cdf[finished] = 1.0
+    # Landing the last plane on a 6 still uses up the turn
+    landed_on_six = np.ones(MAX_TURNS + 1)
+    landed_on_six[0] = 0.0
+    for i in order:
+        if i == finished:
+            continue
+        a, b = pairs[i]
+        total = 5.0
+        movable = 0
+        reached = np.zeros(MAX_TURNS + 1)
+        for dice_roll in range(1, 7):
+            successors = _moves(color, a, b, dice_roll)
+            if not successors:
+                continue
+            movable += 1
+            extra = (dice_roll == 6) * np.array([s == finished for s in successors])
+            best = successors[int(np.argmin(turns[successors] + extra))]
+            total += turns[best] + (dice_roll == 6 and best == finished)
+            if dice_roll == 6:
+                reached += landed_on_six if best == finished else cdf[best]
+            else:
+                reached[1:] += cdf[best][:-1]
+        turns[i] = total / movable
+        # Rolls with no plane to fly end the turn where it started
+        stuck = (6 - movable) / 6
+        row = cdf[i]
+        row[:] = reached / 6
+        if stuck:
+            for t in range(1, MAX_TURNS + 1):
+                row[t] += stuck * row[t - 1]
+    return turns, cdf
+
+def build(path=TABLEBASE_PATH):
+    """Solve every squadron's endgame and write the tablebase, replacing any older one"""
+    arrays = {}
+    for color in aeroplane_rules.PLAYERS:
+        _, cdf = solve(color)
+        if (cdf[:, -1] < 1 - TAIL).any():
+            raise RuntimeError(f"{color} endgames run past {MAX_TURNS} turns, raise MAX_TURNS")
+        lengths = (cdf < 1 - TAIL).sum(axis=1)
+        pmf = np.diff(cdf, axis=1)
+        arrays[f"{color}_offsets"] = np.concatenate(([0], np.cumsum(lengths))).astype(np.uint32)
+        arrays[f"{color}_pmf"] = np.concatenate([pmf[i, :n] for i, n in enumerate(lengths)]).astype(np.float32)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(path + ".tmp", path)
+    return arrays
+
+# --------------------------
+# Lookups
+# --------------------------
+class Tablebase:
+    """The endgame tablebase: offsets are checked on open, turn probabilities read on first use"""
+    __slots__ = ("_file", "_offsets", "_pmfs", "_lock")
+
+    def __init__(self, path):
+        self._file = np.load(path)
+        self._offsets = {color: self._file[f"{color}_offsets"] for color in aeroplane_rules.PLAYERS}
+        self._pmfs = {}
+        self._lock = threading.Lock()
+        for color, offsets in self._offsets.items():
+            if len(offsets) != state_count(color) + 1:
+                raise ValueError(f"{color} endgame tables do not match the board, rebuild them")
+
+    def turns_pmf(self, color, squadron):
+        """P(turns = 1, 2, ...) for squadron, or None if it has more than two planes left"""
+        index = squadron_index(color, squadron)
+        if index is None:
+            return None
+        pmf = self._pmfs.get(color)
+        if pmf is None:
+            # Reads from the zip are not thread-safe
+            with self._lock:
+                pmf = self._pmfs[color] = self._file[f"{color}_pmf"]
+        offsets = self._offsets[color]
+        return pmf[offsets[index]:offsets[index + 1]]
+
+# Only opened tablebases are kept, so one built while the app runs is picked up
+_tablebases = {}
+
+def load_tablebase(path=TABLEBASE_PATH):
+    """The Tablebase, or None if it has not been built"""
+    tablebase = _tablebases.get(path)
+    if tablebase is None:
+        try:
+            tablebase = _tablebases[path] = Tablebase(path)
+        except (OSError, KeyError, ValueError):
+            return None
+    return tablebase
+
+def _race(pmfs, current):
+    """Win probability of each squadron from its turns distribution, with ties to the earlier seat"""
+    players = len(pmfs)
+    length = max(len(pmf) for pmf in pmfs) + 1
+    chance = np.zeros((players, length + 1))
+    for i, pmf in enumerate(pmfs):
+        chance[i, 1:len(pmf) + 1] = pmf
+    # still_flying[j, t] = P(squadron j needs more than t turns)
+    still_flying = 1 - np.cumsum(chance, axis=1)
+    odds = np.zeros(players)
+    for i in range(players):
+        beaten = np.ones(length + 1)
+        for j in range(players):
+            if j == i:
+                continue
+            if (j - current) % players < (i - current) % players:
+                beaten *= still_flying[j]
+            else:
+                beaten[1:] *= still_flying[j, :-1]
+        odds[i] = (chance[i] * beaten).sum()
+    return odds / odds.sum()
+
+def _choices(state):
+    """(plane, convert_to, state after the flight and the end of the turn) for the current roll"""
+    player = state.current_player
+    squadron = state.player(player)
+    choices = []
+    for plane in aeroplane_rules.movable_planes(state):
+        options = [None]
+        if squadron.plane_types[plane] == 'normal':
+            options += [t for t in aeroplane_rules.SPECIAL_TYPES if squadron.unlocked(t)]
+        for convert_to in options:
+            flown = state
+            if convert_to is not None:
+                flown, _ = aeroplane_rules.convert_plane(flown, player, plane, convert_to)
+            flown, _ = aeroplane_rules.move_plane(flown, player, plane, state.dice_roll)
+            choices.append((plane, convert_to, aeroplane_rules.end_turn(flown)[0]))
+    return choices
+
+def win_odds(state):
+    """{color: win probability with every squadron flying the tables} once all are down to two planes, else None"""
+    if state.game_over:
+        return {color: float(color == state.winner) for color in aeroplane_rules.PLAYERS}
+    tablebase = load_tablebase()
+    if tablebase is None:
+        return None
+    if state.dice_roll:
+        advice = advise(state)
+        if advice is not None:
+            return advice.odds
+        return win_odds(aeroplane_rules.end_turn(state)[0])
+
+    pmfs = []
+    for color, squadron in zip(aeroplane_rules.PLAYERS, state.players):
+        pmf = tablebase.turns_pmf(color, squadron)
+        if pmf is None:
+            return None
+        pmfs.append(pmf)
+    odds = _race(pmfs, aeroplane_rules.PLAYERS.index(state.current_player))
+    return {color: float(odds[i]) for i, color in enumerate(aeroplane_rules.PLAYERS)}
+
+def advise(state):
+    """The flight whose table win chance is best for the current roll, or None outside the endgame"""
+    if not state.dice_roll or state.game_over or load_tablebase() is None:
+        return None
+    best = None
+    for plane, convert_to, after in _choices(state):
+        odds = win_odds(after)
+        if odds is None:
+            return None
+        if best is None or odds[state.current_player] > best.odds[state.current_player]:
+            best = Advice(plane, convert_to, odds)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the aeroplane endgame tablebase")
+    parser.add_argument("--out", default=TABLEBASE_PATH, help="path of the .npz tablebase")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    arrays = build(args.out)
+    for color in aeroplane_rules.PLAYERS:
+        print(f"{color}: {state_count(color)} states, {len(arrays[f'{color}_pmf'])} turn probabilities")
+    print(f"{os.path.getsize(args.out) / 2**20:.1f} MiB in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
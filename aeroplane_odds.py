@@ -0,0 +1,390 @@
+import argparse
+import collections
+import concurrent.futures
+import concurrent.futures.process
+import multiprocessing
+import multiprocessing.managers
+import os
+import subprocess
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import aeroplane_endgame
+import aeroplane_rules
+
+# --------------------------
+# Win Probabilities by Rollout
+# --------------------------
+# Squadrons never interact, so a game is decided by how many turns each
+# squadron still needs: the fewest wins, and a tie goes to whoever flies
+# first from the current seat. A batch of rollouts plays every squadron's
+# race home at once with numpy, flying a random movable plane each roll and
+# upgrading a normal plane to the fastest unlocked type as it flies. Cargo
+# planes fly at normal speed and carry nothing.
+#
+# Estimates live in a process-wide LRU keyed by the packed state, so reruns
+# that do not change the game (chat, renames, widgets) reuse the figure.
+# Each estimate() adds batches for a small time budget until MAX_ROLLOUTS,
+# so an estimate sharpens over the reruns that show it.
+#
+# compare() rates each way to fly the current roll by the mover's chance to
+# win from the state it leads to. Only the mover's race differs between
+# choices, so a round runs the other squadrons once and the mover once per
+# distinct outcome, every run on the same seeds, across a process pool.
+# Common seeds keep the gaps between choices far steadier than the figures
+# themselves. Rounds stop once the best choice leads the runner-up by
+# SETTLED_Z standard errors, or at MOVE_ROLLOUTS. Like estimate(), a call
+# only adds rounds for MOVE_BUDGET, so the comparison sharpens over reruns.
+#
+# Once every squadron is down to two planes, both come straight from the
+# endgame tablebase instead, with no rollouts behind them (None).
+ODDS_BUDGET = 0.02           # seconds of rollouts per call
+ROLLOUT_BATCH = 128          # games per squadron per batch
+MAX_ROLLOUTS = 4096
+CACHE_SIZE = 256
+MOVE_BUDGET = 0.05           # seconds of comparison per call
+MOVE_BATCH = 256
+MIN_MOVE_ROLLOUTS = 512
+MOVE_ROLLOUTS = 4096
+SETTLED_Z = 2.0
+
+SPEEDS = {plane_type: spec['speed'] for plane_type, spec in aeroplane_rules.PLANE_TYPES.items()}
+# Fastest first, as the computer squadrons upgrade
+UPGRADES = tuple(sorted(
+    ((spec['unlock_score'], spec['speed']) for plane_type, spec in aeroplane_rules.PLANE_TYPES.items()
+     if plane_type in aeroplane_rules.SPECIAL_TYPES),
+    key=lambda upgrade: -upgrade[1]
+))
+FASTEST_UPGRADES = sorted(aeroplane_rules.SPECIAL_TYPES, key=lambda plane_type: -SPEEDS[plane_type])
+FIRST_UNLOCK = min(unlock_score for unlock_score, _ in UPGRADES)
+_TYPE_NAMES = tuple(aeroplane_rules.PLANE_TYPES)
+_TYPE_CODES = {plane_type: code for code, plane_type in enumerate(_TYPE_NAMES)}
+
+def pack_state(state):
+    """What decides the race as bytes: positions, plane types, the seat to fly and its roll"""
+    return bytes(
+        [pos for squadron in state.players for pos in squadron.planes]
+        + [_TYPE_CODES[t] for squadron in state.players for t in squadron.plane_types]
+        + [aeroplane_rules.PLAYERS.index(state.current_player), state.dice_roll]
+    )
+
+def unpack_state(packed):
+    """(planes, plane types, current seat, dice roll) from pack_state() bytes"""
+    seats = len(aeroplane_rules.PLAYERS)
+    planes = np.frombuffer(packed, dtype=np.uint8, count=seats * 4).reshape(seats, 4).astype(np.int64)
+    types = [tuple(_TYPE_NAMES[code] for code in packed[seats * 4 + 4 * i:seats * 4 + 4 * i + 4]) for i in range(seats)]
+    return planes, types, packed[-2], packed[-1]
+
+def rollout_turns(packed, batch, rng, squadrons=None):
+    """(len(squadrons), batch) turns each squadron still needs, the player to fly counting this turn as its first"""
+    planes, types, current, fixed_roll = unpack_state(packed)
+    squadrons = list(range(len(aeroplane_rules.PLAYERS)) if squadrons is None else squadrons)
+    starts = np.array([aeroplane_rules.BOARD_POSITIONS[f'start_{aeroplane_rules.PLAYERS[i]}'] for i in squadrons])
+
+    dist = np.repeat(aeroplane_rules.FINISH - starts, batch)
+    pos = np.repeat(planes[squadrons] - starts[:, None], batch, axis=0)
+    speed = np.repeat([[SPEEDS[t] for t in types[i]] for i in squadrons], batch, axis=0)
+    upgradable = np.repeat([[t == 'normal' for t in types[i]] for i in squadrons], batch, axis=0)
+    ids = np.arange(len(squadrons) * batch)
+    turns = np.zeros(len(ids), dtype=np.int64)
+
+    if current not in squadrons:
+        fixed_roll = 0
+    while len(ids):
+        dice = rng.integers(1, 7, size=len(ids))
+        if fixed_roll:
+            # The current player has already rolled this turn
+            first = squadrons.index(current) * batch
+            dice[(ids >= first) & (ids < first + batch)] = fixed_roll
+            fixed_roll = 0
+        movable = (pos < dist[:, None]) & ((pos > 0) | (dice[:, None] == 6))
+        pick = np.where(movable, rng.random(pos.shape), -1.0).argmax(axis=1)
+        rows = np.flatnonzero(movable.any(axis=1))
+        plane = pick[rows]
+
+        landed = (pos[rows] == dist[rows, None]).sum(axis=1)
+        flying_speed = speed[rows, plane]
+        can_upgrade = upgradable[rows, plane]
+        for unlock_score, upgrade_speed in reversed(UPGRADES):
+            flying_speed = np.where(can_upgrade & (landed >= unlock_score), upgrade_speed, flying_speed)
+        speed[rows, plane] = flying_speed
+        upgradable[rows, plane] = can_upgrade & (landed < FIRST_UNLOCK)
+
+        old = pos[rows, plane]
+        pos[rows, plane] = np.where(old == 0, 1, np.minimum(old + dice[rows] * flying_speed, dist[rows]))
+
+        finished = (pos == dist[:, None]).all(axis=1)
+        # A 6 earns another roll, unless it landed the last plane
+        turns[ids] += (dice != 6) | finished
+        keep = ~finished
+        ids, dist, pos, speed, upgradable = ids[keep], dist[keep], pos[keep], speed[keep], upgradable[keep]
+    return turns.reshape(len(squadrons), batch)
+
+def race_turns(packed, batch, seed, squadrons=None):
+    """rollout_turns() with its own generator, for process pools"""
+    return rollout_turns(packed, batch, np.random.default_rng(seed), squadrons)
+
+def _seats(current):
+    """Turn order of each squadron counting from the current seat"""
+    return (np.arange(len(aeroplane_rules.PLAYERS)) - current) % len(aeroplane_rules.PLAYERS)
+
+def win_counts(packed, batch, rng):
+    """Games won by each squadron, in PLAYERS order, out of batch rollouts"""
+    seats = _seats(packed[-2])
+    winners = (rollout_turns(packed, batch, rng) * len(seats) + seats[:, None]).argmin(axis=0)
+    return np.bincount(winners, minlength=len(seats))
+
+def move_choices(state):
+    """{(plane, upgrade or None): state after flying it on the current roll and ending the turn}"""
+    player = state.current_player
+    squadron = state.player(player)
+    start_pos = aeroplane_rules.BOARD_POSITIONS[f'start_{player}']
+    choices = {}
+    for plane in aeroplane_rules.movable_planes(state):
+        options = [None]
+        # Speed only counts once airborne, so only flying planes are offered the upgrade
+        if squadron.plane_types[plane] == 'normal' and squadron.planes[plane] != start_pos:
+            options += [
+                plane_type for plane_type in FASTEST_UPGRADES
+                if squadron.unlocked(plane_type) and SPEEDS[plane_type] > SPEEDS['normal']
+            ][:1]
+        for upgrade in options:
+            flown = state
+            if upgrade is not None:
+                flown, _ = aeroplane_rules.convert_plane(flown, player, plane, upgrade)
+            flown, _ = aeroplane_rules.move_plane(flown, player, plane, state.dice_roll)
+            choices[(plane, upgrade)], _ = aeroplane_rules.end_turn(flown)
+    return choices
+
+def _settled(odds, rollouts):
+    """Whether the best of odds leads the runner-up by SETTLED_Z standard errors"""
+    if len(odds) < 2:
+        return True
+    (best, runner_up) = sorted(odds, reverse=True)[:2]
+    spread = (best * (1 - best) + runner_up * (1 - runner_up)) / rollouts
+    return best - runner_up > SETTLED_Z * spread ** 0.5
+
+class WinOdds:
+    """Process-wide LRU of win-probability estimates keyed by packed state"""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _entry(self, key, new_entry):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            entry = self._entries[key] = new_entry()
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return entry
+
+    def estimate(self, state, budget=ODDS_BUDGET):
+        """({color: win probability}, rollouts behind it), after up to budget seconds of new rollouts"""
+        if state.game_over:
+            return {color: float(color == state.winner) for color in aeroplane_rules.PLAYERS}, 0
+        tabled = aeroplane_endgame.win_odds(state)
+        if tabled is not None:
+            return tabled, None
+        deadline = time.perf_counter() + budget
+        key = pack_state(state)
+        # [wins per squadron, rollouts]
+        entry = self._entry(key, lambda: [np.zeros(len(aeroplane_rules.PLAYERS), dtype=np.int64), 0])
+        rollouts = entry[1]
+        # Seeded by the key and the rollouts so far, so an estimate is
+        # reproducible however its batches were spread across reruns
+        while rollouts < MAX_ROLLOUTS and (not rollouts or time.perf_counter() < deadline):
+            counts = win_counts(key, ROLLOUT_BATCH, np.random.default_rng([zlib.crc32(key), rollouts]))
+            with self._lock:
+                entry[0] += counts
+                entry[1] += ROLLOUT_BATCH
+                rollouts = entry[1]
+
+        with self._lock:
+            wins, rollouts = entry[0].copy(), entry[1]
+        return {color: float(wins[i] / rollouts) for i, color in enumerate(aeroplane_rules.PLAYERS)}, rollouts
+
+    def compare(self, state, pool=None, budget=MOVE_BUDGET):
+        """({(plane, upgrade): mover's win probability} for the current roll, rollouts behind them)"""
+        choices = move_choices(state)
+        if not choices:
+            return {}, 0
+        mover = state.current_player
+        tabled = {choice: aeroplane_endgame.win_odds(after) for choice, after in choices.items()}
+        if None not in tabled.values():
+            return {choice: odds[mover] for choice, odds in tabled.items()}, None
+        deadline = time.perf_counter() + budget
+        outcomes = {choice: pack_state(after) for choice, after in choices.items()}
+        pending = sorted({outcomes[choice] for choice, after in choices.items() if not after.game_over})
+        key = pack_state(state)
+        # [mover's wins per outcome, rollouts]
+        entry = self._entry(("moves", key), lambda: [dict.fromkeys(pending, 0), 0])
+
+        mover = aeroplane_rules.PLAYERS.index(mover)
+        rivals = [i for i in range(len(aeroplane_rules.PLAYERS)) if i != mover]
+        landing = [1.0] * (len(choices) - sum(not after.game_over for after in choices.values()))
+        seed = zlib.crc32(key)
+        rollouts = entry[1]
+        while pending and rollouts < MOVE_ROLLOUTS and time.perf_counter() < deadline:
+            if rollouts >= MIN_MOVE_ROLLOUTS and _settled([wins / rollouts for wins in entry[0].values()] + landing, rollouts):
+                break
+            runs = [(pending[0], MOVE_BATCH, [seed, rollouts, 0], rivals)]
+            runs += [(packed, MOVE_BATCH, [seed, rollouts, 1], [mover]) for packed in pending]
+            results = list((pool.map if pool is not None else map)(race_turns, *zip(*runs)))
+            # Every outcome has the same seat to fly, so the rivals' race is shared
+            seats = _seats(pending[0][-2])
+            fastest_rival = (results[0] * len(seats) + seats[rivals, None]).min(axis=0)
+            with self._lock:
+                for packed, turns in zip(pending, results[1:]):
+                    entry[0][packed] += int((turns[0] * len(seats) + seats[mover] < fastest_rival).sum())
+                entry[1] += MOVE_BATCH
+                rollouts = entry[1]
+
+        with self._lock:
+            wins, rollouts = dict(entry[0]), entry[1]
+        if pending and not rollouts:
+            return {}, 0
+        return {
+            choice: 1.0 if choices[choice].game_over else wins[packed] / rollouts
+            for choice, packed in outcomes.items()
+        }, rollouts
+
+# --------------------------
+# Rollout Worker Pool
+# --------------------------
+# The app serves every session from one threaded process, so its workers
+# must neither be forked from it nor spawned by it: Streamlit installs the
+# app script as __main__, which a spawned or forkserver worker would run
+# again before taking any work. RolloutPool starts a helper instead,
+# `python -m aeroplane_odds`, whose __main__ is this module. The helper
+# starts all its workers from a forkserver, then reports a manager address
+# and serves calls from any app thread. Until it is up, map() and call()
+# run in-process, so no rerun waits for the workers to start.
+class _Workers:
+    """The helper's side: every manager connection shares one process pool"""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def map(self, fn, runs):
+        return list(self._pool.map(fn, *zip(*runs)))
+
+    def call(self, fn, args):
+        return self._pool.submit(fn, *args).result()
+
+class _Manager(multiprocessing.managers.BaseManager):
+    pass
+
+_Manager.register("workers")
+
+class RolloutPool:
+    """Worker processes in a helper process; raises BrokenProcessPool once the helper has gone"""
+
+    def __init__(self, workers=None):
+        self._authkey = os.urandom(32)
+        self._workers = None
+        self._broken = False
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "aeroplane_odds", "--workers", str(workers or os.cpu_count() or 1)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        self._process.stdin.write(self._authkey)
+        self._process.stdin.flush()
+        threading.Thread(target=self._connect, name="rollout-pool", daemon=True).start()
+
+    @property
+    def ready(self):
+        return self._workers is not None
+
+    @property
+    def broken(self):
+        return self._broken
+
+    def _connect(self):
+        # The helper prints its address once every worker is up
+        address = self._process.stdout.readline().decode().strip()
+        try:
+            manager = _Manager(address=address, authkey=self._authkey)
+            manager.connect()
+            self._workers = manager.workers()
+        except (OSError, EOFError, ValueError, multiprocessing.AuthenticationError):
+            self._broken = True
+
+    def _remote(self, method, fn, args):
+        if self._broken:
+            raise concurrent.futures.process.BrokenProcessPool("The rollout helper has stopped")
+        try:
+            return getattr(self._workers, method)(fn, args)
+        except (OSError, EOFError, concurrent.futures.process.BrokenProcessPool) as e:
+            self._broken = True
+            raise concurrent.futures.process.BrokenProcessPool("The rollout helper has stopped") from e
+
+    def map(self, fn, *iterables):
+        """list(map(fn, *iterables)) across the workers"""
+        if self._workers is None and not self._broken:
+            return list(map(fn, *iterables))
+        return self._remote("map", fn, list(zip(*iterables)))
+
+    def call(self, fn, *args):
+        """fn(*args) on a worker; blocks, so submit it to a thread to wait in the background"""
+        if self._workers is None and not self._broken:
+            return fn(*args)
+        return self._remote("call", fn, args)
+
+    def shutdown(self):
+        """Stop the helper: it exits once its stdin closes, and its workers with it"""
+        self._workers = None
+        self._broken = True
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+
+def _exit_with_parent():
+    """Worker initializer: a worker blocks on its call queue forever if the helper is killed, so watch for that"""
+    def watch():
+        multiprocessing.parent_process().join()
+        os._exit(1)
+    threading.Thread(target=watch, daemon=True).start()
+
+def serve(workers):
+    """The helper process: start the workers, print the manager address, serve until stdin closes"""
+    authkey = sys.stdin.buffer.read(32)
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["aeroplane_odds"])
+    pool = concurrent.futures.ProcessPoolExecutor(workers, mp_context=context, initializer=_exit_with_parent)
+    # Every worker starts now rather than on the first request
+    list(pool.map(abs, range(workers)))
+
+    shared = _Workers(pool)
+    _Manager.register("workers", callable=lambda: shared)
+    server = _Manager(authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, name="rollout-server", daemon=True).start()
+    print(server.address, flush=True)
+    sys.stdin.buffer.read()
+    pool.shutdown(cancel_futures=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve rollout workers to the app (started by RolloutPool)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+    serve(args.workers)
+
+if __name__ == "__main__":
+    main()
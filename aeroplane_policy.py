@@ -0,0 +1,250 @@
+import argparse
+import itertools
+import math
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import aeroplane_rules
+
+# --------------------------
+# Solved Single-Squadron Race
+# --------------------------
+# Squadrons never interact on this board, so racing home is a one-squadron
+# problem that can be solved once, offline, for every position. The build
+# below works backwards from "all four landed" and stores two tables per
+# squadron as .npy files:
+#
+#   <color>_turns.npy   float32 per state: expected turns left to land all four
+#   <color>_moves.npy   uint8 per state and roll: slot * 4 + type code, or NO_MOVE
+#
+# The app and the computer squadrons open them with np.load(mmap_mode="r"),
+# so a lookup is one index computation and one page read, and every process
+# on the machine shares the same pages through the page cache.
+#
+# The abstraction: a plane is a "kind", either at base, airborne at a
+# distance from its base with a flight type, or landed. Planes of a
+# squadron are interchangeable, so a state is the sorted multiset of four
+# kinds, numbered by its combinadic. Upgrading is free and only matters for
+# the plane that flies, so it is decided together with the move, after the
+# roll: a move either flies a plane as it is or converts a normal plane to
+# an unlocked jet or supersonic first. Cargo planes are left out: they fly
+# at normal speed, and carrying needs planes to share a square, which the
+# table cannot plan for. A cargo plane is looked up as a normal one.
+#
+# A turn ends on any roll but a 6, so V(s) = (5 + sum over movable rolls of
+# the best successor) / (number of movable rolls), plus one turn for a 6
+# that lands the last plane. Every move adds distance, so one pass in
+# decreasing total distance solves the whole table exactly.
+POLICY_DIR = os.environ.get(
+    "AEROPLANE_POLICY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "aeroplane_policy")
+)
+FLIGHT_TYPES = ('normal', 'jet', 'supersonic')
+SPEEDS = np.array([aeroplane_rules.PLANE_TYPES[t]['speed'] for t in FLIGHT_TYPES])
+UNLOCK_SCORES = tuple(aeroplane_rules.PLANE_TYPES[t].get('unlock_score', 0) for t in FLIGHT_TYPES)
+BASE = 0
+NO_MOVE = 0xFF
+
+Advice = namedtuple("Advice", "plane convert_to expected_turns")
+
+def distance(color):
+    return aeroplane_rules.FINISH - aeroplane_rules.BOARD_POSITIONS[f'start_{color}']
+
+def kind_count(color):
+    """Base, every airborne distance in every flight type, and landed"""
+    return 2 + len(FLIGHT_TYPES) * (distance(color) - 1)
+
+def state_count(color):
+    return math.comb(kind_count(color) + 3, 4)
+
+def plane_kind(color, pos, plane_type):
+    start_pos = aeroplane_rules.BOARD_POSITIONS[f'start_{color}']
+    if pos == start_pos:
+        return BASE
+    if pos == aeroplane_rules.FINISH:
+        return kind_count(color) - 1
+    type_code = FLIGHT_TYPES.index(plane_type) if plane_type in FLIGHT_TYPES else 0
+    return 1 + (pos - start_pos - 1) * len(FLIGHT_TYPES) + type_code
+
+def state_index(kinds):
+    """Combinadic of a multiset of four kinds given in ascending order"""
+    a, b, c, d = kinds
+    return a + math.comb(b + 1, 2) + math.comb(c + 2, 3) + math.comb(d + 3, 4)
+
+# --------------------------
+# Building
+# --------------------------
+def _indexer(kinds):
+    """Vectorised state_index over rows of ascending kinds"""
+    n = np.arange(kinds + 3, dtype=np.int64)
+    c2, c3, c4 = n * (n - 1) // 2, n * (n - 1) * (n - 2) // 6, n * (n - 1) * (n - 2) * (n - 3) // 24
+
+    def index(rows):
+        rows = rows.astype(np.int64)
+        return rows[:, 0] + c2[rows[:, 1] + 1] + c3[rows[:, 2] + 2] + c4[rows[:, 3] + 3]
+    return index
+
+def solve(color):
+    """(turns, moves) arrays for color's squadron, indexed by state_index"""
+    dist = distance(color)
+    kinds = kind_count(color)
+    landed = kinds - 1
+    count = state_count(color)
+    index = _indexer(kinds)
+
+    states = np.fromiter(
+        itertools.chain.from_iterable(itertools.combinations_with_replacement(range(kinds), 4)),
+        dtype=np.uint8, count=4 * count
+    ).reshape(count, 4)
+    flown = np.zeros(kinds, dtype=np.int16)
+    flown[1:landed] = 1 + np.arange(landed - 1) // len(FLIGHT_TYPES)
+    flown[landed] = dist
+    progress = flown[states].sum(axis=1)
+    order = np.argsort(-progress, kind="stable")
+    layers = np.flatnonzero(np.diff(progress[order])) + 1
+
+    turns = np.zeros(count)
+    moves = np.full((count, 6), NO_MOVE, dtype=np.uint8)
+    finished = count - 1
+    for rows_at in np.split(order, layers):
+        rows = states[rows_at]
+        if rows[0, 0] == landed:
+            continue
+        best = np.full((len(rows), 6), np.inf)
+        best_move = np.full((len(rows), 6), NO_MOVE, dtype=np.uint8)
+        landed_planes = (rows == landed).sum(axis=1)
+
+        for slot in range(4):
+            kind = rows[:, slot].astype(np.int64)
+            # Equal kinds are the same move, so only the first of them is tried
+            fresh = kind != rows[:, slot - 1] if slot else np.ones(len(rows), dtype=bool)
+            airborne = fresh & (kind != BASE) & (kind != landed)
+            pos = (kind - 1) // len(FLIGHT_TYPES) + 1
+            own_type = (kind - 1) % len(FLIGHT_TYPES)
+            for type_code in range(len(FLIGHT_TYPES)):
+                if type_code == 0:
+                    can_fly, flight_type = airborne, own_type
+                else:
+                    can_fly = airborne & (own_type == 0) & (landed_planes >= UNLOCK_SCORES[type_code])
+                    flight_type = np.full(len(rows), type_code)
+                for dice_roll in range(1, 7):
+                    new_pos = pos + dice_roll * SPEEDS[flight_type]
+                    new_kind = np.where(new_pos >= dist, landed, 1 + (new_pos - 1) * len(FLIGHT_TYPES) + flight_type)
+                    valid = can_fly
+                    if dice_roll == 6 and type_code == 0:
+                        takeoff = fresh & (kind == BASE)
+                        new_kind = np.where(takeoff, 1, new_kind)
+                        valid = can_fly | takeoff
+                    at = np.flatnonzero(valid)
+                    if not len(at):
+                        continue
+                    successors = rows[at]
+                    successors[:, slot] = new_kind[at]
+                    successors.sort(axis=1)
+                    successor_at = index(successors)
+                    value = turns[successor_at]
+                    if dice_roll == 6:
+                        # The extra roll after landing the last plane is never used
+                        value = value + (successor_at == finished)
+                    better = value < best[at, dice_roll - 1]
+                    best[at[better], dice_roll - 1] = value[better]
+                    best_move[at[better], dice_roll - 1] = slot * 4 + type_code
+
+        movable = best_move != NO_MOVE
+        state_at = index(rows)
+        turns[state_at] = (5 + np.where(movable, best, 0).sum(axis=1)) / movable.sum(axis=1)
+        moves[state_at] = best_move
+    return turns.astype(np.float32), moves
+
+def _table_paths(color, directory):
+    return os.path.join(directory, f"{color}_turns.npy"), os.path.join(directory, f"{color}_moves.npy")
+
+def build(color, directory=POLICY_DIR):
+    """Solve color's squadron and write its tables, replacing any older ones"""
+    turns, moves = solve(color)
+    os.makedirs(directory, exist_ok=True)
+    for path, table in zip(_table_paths(color, directory), (turns, moves)):
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, table)
+        os.replace(path + ".tmp", path)
+    return turns, moves
+
+# --------------------------
+# Lookups
+# --------------------------
+class PolicyTable:
+    """One squadron's solved tables, memory-mapped read-only"""
+    __slots__ = ("color", "turns", "moves")
+
+    def __init__(self, color, directory):
+        self.color = color
+        turns_path, moves_path = _table_paths(color, directory)
+        self.turns = np.load(turns_path, mmap_mode="r")
+        self.moves = np.load(moves_path, mmap_mode="r")
+        count = state_count(color)
+        if self.turns.shape != (count,) or self.moves.shape != (count, 6):
+            raise ValueError(f"{color} policy tables do not match the board, rebuild them")
+
+    def _kinds(self, squadron):
+        return sorted(
+            (plane_kind(self.color, pos, plane_type), plane)
+            for plane, (pos, plane_type) in enumerate(zip(squadron.planes, squadron.plane_types))
+        )
+
+    def expected_turns(self, squadron):
+        """Turns the squadron still needs on average, flying by the table"""
+        return float(self.turns[state_index([kind for kind, _ in self._kinds(squadron)])])
+
+    def advise(self, squadron, dice_roll):
+        """Advice for flying dice_roll, or None if no plane can fly it"""
+        kinds = self._kinds(squadron)
+        state = state_index([kind for kind, _ in kinds])
+        move = int(self.moves[state, dice_roll - 1])
+        if move == NO_MOVE:
+            return None
+        kind, plane = kinds[move // 4]
+        convert_to = FLIGHT_TYPES[move % 4] if move % 4 else None
+        if squadron.plane_types[plane] != 'normal':
+            convert_to = None
+        return Advice(plane, convert_to, float(self.turns[state]))
+
+# Only opened tables are kept, so tables built while the app runs are picked up
+_tables = {}
+
+def load_table(color, directory=POLICY_DIR):
+    """color's PolicyTable, or None if it has not been built"""
+    table = _tables.get((color, directory))
+    if table is None:
+        try:
+            table = _tables[(color, directory)] = PolicyTable(color, directory)
+        except (OSError, ValueError):
+            return None
+    return table
+
+def advise(state):
+    """Table advice for the current player's rolled dice, or None"""
+    table = load_table(state.current_player)
+    if table is None or not state.dice_roll or state.game_over:
+        return None
+    return table.advise(state.player(state.current_player), state.dice_roll)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve the aeroplane race for each squadron and write the policy tables")
+    parser.add_argument("--squadrons", nargs="+", choices=aeroplane_rules.PLAYERS, default=list(aeroplane_rules.PLAYERS))
+    parser.add_argument("--out", default=POLICY_DIR, help="directory for the .npy tables")
+    args = parser.parse_args(argv)
+
+    for color in args.squadrons:
+        started = time.perf_counter()
+        turns, moves = build(color, args.out)
+        start = state_index([BASE] * 4)
+        print(
+            f"{color}: {len(turns)} states, {(turns.nbytes + moves.nbytes) / 2**20:.1f} MiB,"
+            f" {turns[start]:.2f} turns from base, {time.perf_counter() - started:.1f}s"
+        )
+
+if __name__ == "__main__":
+    main()
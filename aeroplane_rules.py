@@ -0,0 +1,304 @@
+from collections import namedtuple
+from datetime import datetime
+
+# --------------------------
+# Board and Aircraft
+# --------------------------
+BOARD_POSITIONS = {
+    'start_red': 0, 'start_blue': 13, 'start_green': 26, 'start_yellow': 39,
+    'home_red': 51, 'home_blue': 12, 'home_green': 25, 'home_yellow': 38,
+    'finish': 52
+}
+FINISH = BOARD_POSITIONS['finish']
+
+PLAYERS = ('red', 'blue', 'green', 'yellow')
+PLANES_PER_SQUADRON = 4
+
+PLAYER_NAMES = {
+    'red': 'Red',
+    'blue': 'Blue',
+    'green': 'Green',
+    'yellow': 'Yellow'
+}
+
+# Special plane types with 3D attributes
+PLANE_TYPES = {
+    'normal': {'name': 'Normal Plane', 'speed': 1, 'icon': '✈️', '3d_model': 'basic_jet', 'altitude': 10000},
+    'jet': {'name': 'Jet Plane', 'speed': 2, 'icon': '✈️✈️', 'unlock_score': 1, '3d_model': 'supersonic_jet', 'altitude': 15000},
+    'cargo': {'name': 'Cargo Plane', 'speed': 1, 'icon': '📦✈️', 'unlock_score': 2, '3d_model': 'cargo_jet', 'altitude': 8000},
+    'supersonic': {'name': 'Supersonic Jet', 'speed': 3, 'icon': '🚀✈️', 'unlock_score': 3, '3d_model': 'hypersonic_jet', 'altitude': 20000}
+}
+SPECIAL_TYPES = ('jet', 'cargo', 'supersonic')
+
+# --------------------------
+# Immutable Game State
+# --------------------------
+# States are namedtuples and never change once built. A move builds a new
+# state that reuses every part it did not touch: the other three squadrons,
+# the other planes' flight paths and the camera are the very same objects.
+# Keeping hundreds of states for undo therefore costs a few hundred bytes a
+# move rather than a copy of the whole game.
+#
+# A flight path is a linked list of (segment, older_path) pairs ending in (),
+# newest segment first, so recording a flight shares the whole older path.
+#
+# occupancy is a tuple indexed by board position (0 to FINISH) of the
+# (player, plane_idx) pairs on that square, in PLAYERS then plane order.
+# Moves update only the squares they touch, so "who is on square k" is a
+# tuple lookup for every rule and view, across all four squadrons.
+Segment = namedtuple("Segment", "from_pos to_pos timestamp speed altitude carried")
+Camera = namedtuple("Camera", "x y z rotation")
+
+# Rule outcomes the app turns into chat messages: kind is "convert",
+# "cargo", "unlock", "winner" or "turn", detail depends on the kind
+Event = namedtuple("Event", "kind player detail")
+
+class Squadron(namedtuple("Squadron", "planes plane_types score flight_paths")):
+    __slots__ = ()
+
+    def unlocked(self, plane_type):
+        """Special types unlock as planes land, so the score says which are available"""
+        return self.score >= PLANE_TYPES[plane_type].get('unlock_score', 0)
+
+class GameState(namedtuple("GameState", "players current_player dice_roll winner last_move extra_turn animation_state camera weather_conditions time_of_day occupancy")):
+    __slots__ = ()
+
+    @property
+    def game_over(self):
+        return self.winner is not None
+
+    def player(self, color):
+        return self.players[PLAYERS.index(color)]
+
+    def occupants(self, position):
+        """(player, plane_idx) pairs on a board position"""
+        return self.occupancy[position]
+
+def build_occupancy(players):
+    """Occupancy index of a players tuple, built from scratch"""
+    squares = [()] * (FINISH + 1)
+    for color, squadron in zip(PLAYERS, players):
+        for plane_idx, pos in enumerate(squadron.planes):
+            squares[pos] += ((color, plane_idx),)
+    return tuple(squares)
+
+def _piece_order(piece):
+    return PLAYERS.index(piece[0]), piece[1]
+
+def _relocate(occupancy, moves):
+    """occupancy after each (piece, from_pos, to_pos) move, sharing untouched squares"""
+    squares = list(occupancy)
+    for piece, from_pos, to_pos in moves:
+        squares[from_pos] = tuple(other for other in squares[from_pos] if other != piece)
+        squares[to_pos] = tuple(sorted(squares[to_pos] + (piece,), key=_piece_order))
+    return tuple(squares)
+
+def new_game(last_move=None):
+    """Every squadron at its departure airport, red to fly"""
+    players = tuple(
+        Squadron(
+            planes=(BOARD_POSITIONS[f'start_{color}'],) * PLANES_PER_SQUADRON,
+            plane_types=('normal',) * PLANES_PER_SQUADRON,
+            score=0,
+            flight_paths=((),) * PLANES_PER_SQUADRON
+        )
+        for color in PLAYERS
+    )
+    return GameState(
+        players=players,
+        current_player='red',
+        dice_roll=0,
+        winner=None,
+        last_move=last_move,
+        extra_turn=False,
+        animation_state='idle',
+        camera=Camera(x=0, y=-70, z=20, rotation=0),
+        weather_conditions='clear',
+        time_of_day='day',
+        occupancy=build_occupancy(players)
+    )
+
+def _with_squadron(state, color, squadron):
+    players = list(state.players)
+    players[PLAYERS.index(color)] = squadron
+    return tuple(players)
+
+def path_segments(path):
+    """Segments of a flight path, oldest first"""
+    segments = []
+    while path:
+        segment, path = path
+        segments.append(segment)
+    segments.reverse()
+    return segments
+
+def build_path(segments):
+    """Flight path of segments given oldest first"""
+    path = ()
+    for segment in segments:
+        path = (segment, path)
+    return path
+
+# --------------------------
+# Rules
+# --------------------------
+# Each rule takes a state and returns (new_state, events), or None when the
+# action is not allowed. Nothing is modified in place.
+def convert_plane(state, player, plane_idx, new_type):
+    if plane_idx < 0 or plane_idx >= PLANES_PER_SQUADRON:
+        return None
+
+    squadron = state.player(player)
+    if (squadron.plane_types[plane_idx] != 'normal' or
+        not squadron.unlocked(new_type) or
+        squadron.planes[plane_idx] == FINISH):
+        return None
+
+    plane_types = list(squadron.plane_types)
+    plane_types[plane_idx] = new_type
+    squadron = squadron._replace(plane_types=tuple(plane_types))
+    return (
+        state._replace(players=_with_squadron(state, player, squadron)),
+        [Event('convert', player, (plane_idx, new_type))]
+    )
+
+def move_plane(state, player, plane_idx, steps, now=None):
+    if plane_idx < 0 or plane_idx >= PLANES_PER_SQUADRON:
+        return None
+
+    squadron = state.player(player)
+    current_pos = squadron.planes[plane_idx]
+    plane_type = squadron.plane_types[plane_idx]
+    start_pos = BOARD_POSITIONS[f'start_{player}']
+
+    if current_pos == FINISH:
+        return None
+    if current_pos == start_pos and steps != 6:
+        return None
+
+    speed_multiplier = PLANE_TYPES[plane_type]['speed']
+    actual_steps = steps * speed_multiplier
+    altitude = PLANE_TYPES[plane_type]['altitude']
+    new_pos = start_pos + 1 if current_pos == start_pos else current_pos + actual_steps
+    now = now or datetime.now()
+    events = []
+
+    planes = list(squadron.planes)
+    paths = list(squadron.flight_paths)
+    paths[plane_idx] = (Segment(current_pos, new_pos, now, actual_steps * 100, altitude, False), paths[plane_idx])
+
+    # A cargo plane picks up the squadron's other planes sharing its position
+    carried_planes = ()
+    carried_planes_info = ""
+    if plane_type == 'cargo' and current_pos != start_pos:
+        carried_planes = tuple(
+            i for color, i in state.occupants(current_pos) if color == player and i != plane_idx
+        )
+        if carried_planes:
+            carried_planes_info = f" (Carrying planes {[p+1 for p in carried_planes]})"
+            events.append(Event('cargo', player, carried_planes))
+
+    move_description = f"{PLANE_TYPES[plane_type]['icon']} {PLAYER_NAMES[player]} {PLANE_TYPES[plane_type]['name']} (3D: {PLANE_TYPES[plane_type]['3d_model']}) {plane_idx+1}"
+    score = squadron.score
+    winner = state.winner
+    animation_state = 'flying'
+
+    if new_pos >= FINISH:
+        new_pos = FINISH
+        score += 1
+        last_move = f"{move_description} reached finish! (Moved {actual_steps} steps at {altitude}ft with {speed_multiplier}x speed){carried_planes_info}"
+        for special in SPECIAL_TYPES:
+            if squadron.score < PLANE_TYPES[special]['unlock_score'] <= score:
+                events.append(Event('unlock', player, special))
+        if score == PLANES_PER_SQUADRON:
+            winner = player
+            animation_state = 'landed'
+            events.append(Event('winner', player, None))
+    else:
+        last_move = f"{move_description} flew from {current_pos} to {new_pos} (Rolled {steps}, speed: {actual_steps*100} km/h at {altitude}ft with {speed_multiplier}x speed){carried_planes_info}"
+        for carried_idx in carried_planes:
+            planes[carried_idx] = new_pos
+            paths[carried_idx] = (
+                Segment(current_pos, new_pos, now, actual_steps * 100, PLANE_TYPES['cargo']['altitude'], True),
+                paths[carried_idx]
+            )
+
+    planes[plane_idx] = new_pos
+    moves = [((player, i), current_pos, planes[i]) for i in (plane_idx,) + carried_planes if planes[i] != current_pos]
+    squadron = Squadron(planes=tuple(planes), plane_types=squadron.plane_types, score=score, flight_paths=tuple(paths))
+    return (
+        state._replace(
+            players=_with_squadron(state, player, squadron),
+            winner=winner,
+            last_move=last_move,
+            animation_state=animation_state,
+            occupancy=_relocate(state.occupancy, moves)
+        ),
+        events
+    )
+
+def movable_planes(state):
+    """Plane indices the current player can fly with the rolled dice"""
+    if not state.dice_roll or state.game_over:
+        return ()
+    start_pos = BOARD_POSITIONS[f'start_{state.current_player}']
+    return tuple(
+        i for i, pos in enumerate(state.player(state.current_player).planes)
+        if pos != FINISH and (pos != start_pos or state.dice_roll == 6)
+    )
+
+def end_turn(state):
+    """Pass control on, unless a 6 was rolled, which earns another segment"""
+    if state.dice_roll == 6 and not state.game_over:
+        return state._replace(
+            extra_turn=True,
+            last_move=(state.last_move or "") + " (Extra flight segment granted for perfect roll!)",
+            dice_roll=0,
+            animation_state='idle'
+        ), []
+
+    next_player = PLAYERS[(PLAYERS.index(state.current_player) + 1) % len(PLAYERS)]
+    return state._replace(
+        current_player=next_player,
+        extra_turn=False,
+        dice_roll=0,
+        animation_state='idle'
+    ), [Event('turn', next_player, None)]
+
+def trim_flight_paths(state):
+    """The state with the older half of every flight path dropped, or None if none has two segments"""
+    players = []
+    trimmed = False
+    for squadron in state.players:
+        paths = []
+        for path in squadron.flight_paths:
+            segments = path_segments(path)
+            if len(segments) > 1:
+                path = build_path(segments[len(segments) // 2:])
+                trimmed = True
+            paths.append(path)
+        players.append(squadron._replace(flight_paths=tuple(paths)))
+    return state._replace(players=tuple(players)) if trimmed else None
+
+# --------------------------
+# Undo, Redo and What-If Branches
+# --------------------------
+# past and future are tuples of states, nearest last. They hold references
+# only, so a branch is saved by keeping (state, past, future) as it is.
+UNDO_LIMIT = 200
+
+def push(past, state):
+    """The undo history once state is left for a new one, capped at UNDO_LIMIT"""
+    return (past + (state,))[-UNDO_LIMIT:]
+
+def undo(state, past, future):
+    """(state, past, future) one step back, or None at the start of the history"""
+    if not past:
+        return None
+    return past[-1], past[:-1], future + (state,)
+
+def redo(state, past, future):
+    """(state, past, future) one step forward, or None with nothing to redo"""
+    if not future:
+        return None
+    return future[-1], past + (state,), future[:-1]
@@ -0,0 +1,222 @@
+import struct
+import uuid
+from datetime import datetime, timedelta
+
+import aeroplane_rules
+
+# --------------------------
+# Binary Save Games
+# --------------------------
+# A save holds one mission: the game state, the pilot call signs and the
+# chat. Numbers are fixed-width little-endian fields and every string is a
+# length-prefixed UTF-8 blob. Loading unpacks straight out of a memoryview,
+# decoding only the text, so a save restores in tens of microseconds.
+#
+#   header    magic "APCS", version, length of the body that follows
+#   game      current player, dice, winner, extra turn, animation, weather,
+#             time of day, camera x/y/z/rotation, then the last move text
+#   squadron  x4: four positions, four plane types, score, then per plane a
+#             segment count and that many segments, oldest first
+#   pilots    four call signs
+#   chat      message count, then per message its uuid, system flag and
+#             the lengths of its timestamp, sender and text, then those texts
+#
+# The occupancy index is derived from the positions, so loads() rebuilds it
+# rather than storing it. The code tables below are part of the format:
+# reordering or extending them needs a new VERSION.
+MAGIC = b"APCS"
+VERSION = 1
+FILE_EXTENSION = "apcs"
+
+PLANE_TYPE_CODES = ('normal', 'jet', 'cargo', 'supersonic')
+ANIMATION_CODES = ('idle', 'flying', 'landed')
+WEATHER_CODES = ('clear', 'cloudy', 'rainy', 'foggy')
+TIME_OF_DAY_CODES = ('day', 'dusk', 'night')
+NO_WINNER = 0xFF
+NO_TEXT = 0xFFFF
+EPOCH = datetime(1970, 1, 1)
+
+_HEADER = struct.Struct("<4sBI")
+_GAME = struct.Struct("<7B4h")
+_SQUADRON = struct.Struct("<9B")
+_SEGMENT = struct.Struct("<BBqHHB")
+_MESSAGE = struct.Struct("<16sB3H")
+_COUNT = struct.Struct("<H")
+
+class SaveError(ValueError):
+    pass
+
+# --------------------------
+# Writing
+# --------------------------
+def _text(parts, text):
+    if text is None:
+        parts.append(_COUNT.pack(NO_TEXT))
+        return
+    data = text.encode("utf-8")
+    if len(data) >= NO_TEXT:
+        raise SaveError("text too long for a save")
+    parts.append(_COUNT.pack(len(data)))
+    parts.append(data)
+
+def dumps(state, nicknames, chat_messages):
+    """The mission as save bytes"""
+    parts = []
+    winner = NO_WINNER if state.winner is None else aeroplane_rules.PLAYERS.index(state.winner)
+    parts.append(_GAME.pack(
+        aeroplane_rules.PLAYERS.index(state.current_player), state.dice_roll, winner, state.extra_turn,
+        ANIMATION_CODES.index(state.animation_state), WEATHER_CODES.index(state.weather_conditions),
+        TIME_OF_DAY_CODES.index(state.time_of_day), *state.camera
+    ))
+    _text(parts, state.last_move)
+
+    for squadron in state.players:
+        parts.append(_SQUADRON.pack(
+            *squadron.planes, *(PLANE_TYPE_CODES.index(t) for t in squadron.plane_types), squadron.score
+        ))
+        for path in squadron.flight_paths:
+            segments = aeroplane_rules.path_segments(path)
+            parts.append(_COUNT.pack(len(segments)))
+            for segment in segments:
+                parts.append(_SEGMENT.pack(
+                    segment.from_pos, segment.to_pos, (segment.timestamp - EPOCH) // timedelta(microseconds=1),
+                    segment.speed, segment.altitude, segment.carried
+                ))
+
+    for color in aeroplane_rules.PLAYERS:
+        _text(parts, nicknames[color])
+
+    parts.append(_COUNT.pack(len(chat_messages)))
+    for message in chat_messages:
+        texts = [message[field].encode("utf-8") for field in ('timestamp', 'sender', 'text')]
+        if max(len(text) for text in texts) >= NO_TEXT:
+            raise SaveError("text too long for a save")
+        parts.append(_MESSAGE.pack(uuid.UUID(message['id']).bytes, message['is_system'], *(len(text) for text in texts)))
+        parts.extend(texts)
+
+    body = b"".join(parts)
+    return _HEADER.pack(MAGIC, VERSION, len(body)) + body
+
+# --------------------------
+# Reading
+# --------------------------
+class _Reader:
+    __slots__ = ("view", "offset")
+
+    def __init__(self, view, offset):
+        self.view = view
+        self.offset = offset
+
+    def unpack(self, fields):
+        values = fields.unpack_from(self.view, self.offset)
+        self.offset += fields.size
+        return values
+
+    # Slices past the end come back short instead of failing, so loads()
+    # checks the final offset once rather than every text
+    def text(self):
+        (length,) = self.unpack(_COUNT)
+        if length == NO_TEXT:
+            return None
+        end = self.offset + length
+        text = str(self.view[self.offset:end], "utf-8")
+        self.offset = end
+        return text
+
+    def messages(self):
+        (count,) = self.unpack(_COUNT)
+        view = self.view
+        offset = self.offset
+        messages = []
+        for _ in range(count):
+            message_id, is_system, timestamp_length, sender_length, text_length = _MESSAGE.unpack_from(view, offset)
+            offset += _MESSAGE.size
+            sender_start = offset + timestamp_length
+            text_start = sender_start + sender_length
+            offset = text_start + text_length
+            # Formatting the hex directly is several times faster than uuid.UUID
+            hex_id = message_id.hex()
+            messages.append({
+                'id': f"{hex_id[:8]}-{hex_id[8:12]}-{hex_id[12:16]}-{hex_id[16:20]}-{hex_id[20:]}",
+                'text': str(view[text_start:offset], "utf-8"),
+                'sender': str(view[sender_start:text_start], "utf-8"),
+                'timestamp': str(view[sender_start - timestamp_length:sender_start], "utf-8"),
+                'is_system': bool(is_system)
+            })
+        self.offset = offset
+        return messages
+
+    def segments(self):
+        (count,) = self.unpack(_COUNT)
+        end = self.offset + count * _SEGMENT.size
+        if end > len(self.view):
+            raise SaveError("save is truncated")
+        path = ()
+        for from_pos, to_pos, micros, speed, altitude, carried in _SEGMENT.iter_unpack(self.view[self.offset:end]):
+            segment = aeroplane_rules.Segment(
+                from_pos, to_pos, EPOCH + timedelta(microseconds=micros), speed, altitude, bool(carried)
+            )
+            path = (segment, path)
+        self.offset = end
+        return path
+
+def loads(data):
+    """{"game_state", "player_nicknames", "chat_messages"} from save bytes (or any buffer)"""
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise SaveError("not an aeroplane save")
+    magic, version, length = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise SaveError("not an aeroplane save")
+    if version != VERSION:
+        raise SaveError(f"unsupported save version {version}")
+    if len(view) < _HEADER.size + length:
+        raise SaveError("save is truncated")
+    reader = _Reader(view[:_HEADER.size + length], _HEADER.size)
+
+    try:
+        current, dice_roll, winner, extra_turn, animation, weather, time_of_day, *camera = reader.unpack(_GAME)
+        last_move = reader.text()
+        players = []
+        for _ in aeroplane_rules.PLAYERS:
+            fields = reader.unpack(_SQUADRON)
+            players.append(aeroplane_rules.Squadron(
+                planes=fields[:4],
+                plane_types=tuple(PLANE_TYPE_CODES[code] for code in fields[4:8]),
+                score=fields[8],
+                flight_paths=tuple(reader.segments() for _ in range(4))
+            ))
+        state = aeroplane_rules.GameState(
+            players=tuple(players),
+            current_player=aeroplane_rules.PLAYERS[current],
+            dice_roll=dice_roll,
+            winner=None if winner == NO_WINNER else aeroplane_rules.PLAYERS[winner],
+            last_move=last_move,
+            extra_turn=bool(extra_turn),
+            animation_state=ANIMATION_CODES[animation],
+            camera=aeroplane_rules.Camera(*camera),
+            weather_conditions=WEATHER_CODES[weather],
+            time_of_day=TIME_OF_DAY_CODES[time_of_day],
+            occupancy=aeroplane_rules.build_occupancy(players)
+        )
+
+        nicknames = {color: reader.text() for color in aeroplane_rules.PLAYERS}
+        chat_messages = reader.messages()
+    except (struct.error, IndexError, UnicodeDecodeError) as exc:
+        raise SaveError("save is corrupt") from exc
+    if reader.offset > len(reader.view):
+        raise SaveError("save is truncated")
+
+    return {"game_state": state, "player_nicknames": nicknames, "chat_messages": chat_messages}
+
+def iter_saves(data):
+    """Each save in an archive of concatenated saves, such as an mmap of the archive file"""
+    view = memoryview(data)
+    offset = 0
+    while offset < len(view):
+        if len(view) - offset < _HEADER.size:
+            raise SaveError("archive is truncated")
+        _, _, length = _HEADER.unpack_from(view, offset)
+        end = offset + _HEADER.size + length
+        yield view[offset:end]
+        offset = end
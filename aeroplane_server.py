@@ -0,0 +1,310 @@
+import argparse
+import json
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aeroplane_rules
+
+# --------------------------
+# Local Game API
+# --------------------------
+# The aeroplane rules over JSON and HTTP/1.1 keep-alive, for bots driving
+# games from local scripts. One connection serves any number of requests,
+# and POST /batch runs many actions, across any number of games, per round
+# trip:
+#
+#   POST   /games                    {"seed": 1}  -> new game
+#   GET    /games/<id>                            -> state
+#   POST   /games/<id>/roll
+#   POST   /games/<id>/move          {"plane": 0}
+#   POST   /games/<id>/convert       {"plane": 0, "type": "jet"}
+#   POST   /games/<id>/pass
+#   DELETE /games/<id>
+#   POST   /batch                    {"actions": [{"game": "<id>", "action": "move", "plane": 0}, ...]}
+#
+# A move flies the plane and ends the turn, as the move buttons in the app
+# do. Batched actions run in order, and each one gets a result in the same
+# position: {"ok": true, "game", "state", "events"} or {"ok": false, "game",
+# "error"}. A batch {"action": "create"} makes a game for later actions in
+# the same batch to use through {"game": "$<index of the create>"}.
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+GAME_IDLE_TIMEOUT = 600      # seconds without an action before a game is dropped
+SWEEP_INTERVAL = 30
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_BATCH = 10000
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class Game:
+    __slots__ = ("state", "rng", "last_active", "lock")
+
+    def __init__(self, seed, now):
+        if seed is not None and (not isinstance(seed, (int, str)) or isinstance(seed, bool)):
+            raise ApiError(400, "seed must be an integer or a string")
+        self.state = aeroplane_rules.new_game()
+        self.rng = random.Random(seed)
+        self.last_active = now
+        self.lock = threading.Lock()
+
+def state_json(state):
+    return {
+        "current_player": state.current_player,
+        "dice_roll": state.dice_roll,
+        "extra_turn": state.extra_turn,
+        "winner": state.winner,
+        "movable": aeroplane_rules.movable_planes(state),
+        "players": {
+            color: {"planes": squadron.planes, "plane_types": squadron.plane_types, "score": squadron.score}
+            for color, squadron in zip(aeroplane_rules.PLAYERS, state.players)
+        }
+    }
+
+# --------------------------
+# Actions
+# --------------------------
+# Each takes the state and the request parameters and returns (state,
+# events); they run with the game's lock held.
+def _plane(params):
+    plane = params.get("plane")
+    if not isinstance(plane, int) or isinstance(plane, bool):
+        raise ApiError(400, "plane must be an integer 0-3")
+    return plane
+
+def _rolled(state):
+    if state.game_over:
+        raise ApiError(409, "game is over")
+    if not state.dice_roll:
+        raise ApiError(409, "roll the dice first")
+
+def roll(game, params):
+    state = game.state
+    if state.game_over:
+        raise ApiError(409, "game is over")
+    if state.dice_roll:
+        raise ApiError(409, "dice already rolled")
+    dice_roll = game.rng.randint(1, 6)
+    last_move = f"{aeroplane_rules.PLAYER_NAMES[state.current_player]} squadron set flight path with distance {dice_roll}"
+    return state._replace(dice_roll=dice_roll, last_move=last_move), []
+
+def move(game, params):
+    state = game.state
+    _rolled(state)
+    result = aeroplane_rules.move_plane(state, state.current_player, _plane(params), state.dice_roll)
+    if result is None:
+        raise ApiError(409, "that plane cannot fly this roll")
+    moved_state, events = result
+    next_state, turn_events = aeroplane_rules.end_turn(moved_state)
+    return next_state, events + turn_events
+
+def convert(game, params):
+    state = game.state
+    if state.game_over:
+        raise ApiError(409, "game is over")
+    if params.get("type") not in aeroplane_rules.SPECIAL_TYPES:
+        raise ApiError(400, f"type must be one of {', '.join(aeroplane_rules.SPECIAL_TYPES)}")
+    result = aeroplane_rules.convert_plane(state, state.current_player, _plane(params), params["type"])
+    if result is None:
+        raise ApiError(409, "that plane cannot be converted")
+    return result
+
+def pass_turn(game, params):
+    _rolled(game.state)
+    return aeroplane_rules.end_turn(game.state)
+
+def get_state(game, params):
+    return game.state, []
+
+ACTIONS = {"roll": roll, "move": move, "convert": convert, "pass": pass_turn, "state": get_state}
+
+# --------------------------
+# Game Store
+# --------------------------
+class GameStore:
+    """Every game on the server, with idle eviction on create"""
+
+    def __init__(self, idle_timeout=GAME_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._games = {}
+        self._last_sweep = time.monotonic()
+
+    def __len__(self):
+        return len(self._games)
+
+    def create(self, seed=None):
+        now = time.monotonic()
+        game_id = secrets.token_hex(8)
+        game = Game(seed, now)
+        with self._lock:
+            self._sweep(now)
+            self._games[game_id] = game
+        return game_id, game
+
+    def delete(self, game_id):
+        with self._lock:
+            if self._games.pop(game_id, None) is None:
+                raise ApiError(404, f"no game {game_id}")
+
+    def apply(self, game_id, action, params):
+        """Run one action, returns the result body"""
+        handler = ACTIONS.get(action)
+        if handler is None:
+            raise ApiError(404, f"unknown action {action}")
+        game = self._games.get(game_id) if isinstance(game_id, str) else None
+        if game is None:
+            raise ApiError(404, f"no game {game_id}")
+        with game.lock:
+            game.state, events = handler(game, params)
+            game.last_active = time.monotonic()
+            state = game.state
+        return {"ok": True, "game": game_id, "state": state_json(state), "events": [event._asdict() for event in events]}
+
+    def batch(self, actions):
+        if not isinstance(actions, list):
+            raise ApiError(400, "actions must be a list")
+        if len(actions) > MAX_BATCH:
+            raise ApiError(413, f"at most {MAX_BATCH} actions per batch")
+        created = {}
+        results = []
+        for index, params in enumerate(actions):
+            game_id = params.get("game") if isinstance(params, dict) else None
+            try:
+                if not isinstance(params, dict):
+                    raise ApiError(400, "each action must be an object")
+                if isinstance(game_id, str) and game_id.startswith("$"):
+                    game_id = created.get(game_id[1:], game_id)
+                if params.get("action") == "create":
+                    game_id, game = self.create(params.get("seed"))
+                    created[str(index)] = game_id
+                    results.append({"ok": True, "game": game_id, "state": state_json(game.state), "events": []})
+                else:
+                    results.append(self.apply(game_id, params.get("action"), params))
+            except ApiError as exc:
+                results.append({"ok": False, "game": game_id, "error": str(exc)})
+            except Exception:
+                # One bad entry fails alone; the rest of the batch still runs
+                results.append({"ok": False, "game": game_id, "error": "internal error"})
+        return {"results": results}
+
+    def _sweep(self, now):
+        """Drop idle games, at most every SWEEP_INTERVAL seconds; expects self._lock to be held"""
+        if now - self._last_sweep < SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        for game_id, game in list(self._games.items()):
+            if now - game.last_active > self.idle_timeout:
+                del self._games[game_id]
+
+# --------------------------
+# HTTP
+# --------------------------
+class GameRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, Nagle's
+    # algorithm stalls every keep-alive response on the delayed ACK
+    disable_nagle_algorithm = True
+    store = None
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _handle(self, method):
+        try:
+            params = self._read_json()
+            status, body = 200, self._route(method, self.path.split("?")[0].strip("/").split("/"), params)
+        except ApiError as exc:
+            status, body = exc.status, {"ok": False, "error": str(exc)}
+        except Exception:
+            status, body = 500, {"ok": False, "error": "internal error"}
+        self._send_json(status, body)
+
+    def _route(self, method, parts, params):
+        if method == "POST" and parts == ["batch"]:
+            return self.store.batch(params.get("actions"))
+        if parts[0] != "games" or len(parts) > 3:
+            raise ApiError(404, f"no route {self.path}")
+        if len(parts) == 1:
+            if method != "POST":
+                raise ApiError(405, "use POST to create a game")
+            game_id, game = self.store.create(params.get("seed"))
+            return {"ok": True, "game": game_id, "state": state_json(game.state), "events": []}
+        if len(parts) == 2 and method == "DELETE":
+            self.store.delete(parts[1])
+            return {"ok": True, "game": parts[1]}
+        if len(parts) == 2 and method == "GET":
+            return self.store.apply(parts[1], "state", params)
+        if len(parts) == 3 and method == "POST":
+            return self.store.apply(parts[1], parts[2], params)
+        raise ApiError(405, f"{method} not allowed on {self.path}")
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # Without a length the body cannot be skipped, so the connection goes too
+            self.close_connection = True
+            raise ApiError(400, "Content-Length must be a non-negative integer")
+        if length > MAX_BODY_BYTES:
+            # The unread body would corrupt the next request on this connection
+            self.close_connection = True
+            raise ApiError(413, "request body too large")
+        if not length:
+            return {}
+        try:
+            params = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ApiError(400, "body is not valid JSON")
+        if not isinstance(params, dict):
+            raise ApiError(400, "body must be a JSON object")
+        return params
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, store=None):
+    handler = type("BoundGameRequestHandler", (GameRequestHandler,), {"store": store or GameStore()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the aeroplane rules as a local JSON API for bots")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--idle-timeout", type=int, default=GAME_IDLE_TIMEOUT, help="seconds before an idle game is dropped")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, GameStore(args.idle_timeout))
+    print(f"Aeroplane game API on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
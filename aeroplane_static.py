@@ -0,0 +1,255 @@
+import functools
+import hashlib
+import json
+import re
+
+import pandas as pd
+import pyarrow as pa
+
+# --------------------------
+# Invariant Page Content
+# --------------------------
+# Everything on the aeroplane page that is the same on every rerun. It is
+# built once per process by static_content(): the CSS minified, the eight
+# strategy tips joined into one block and the specs table turned into a
+# DataFrame. Reruns emit the prebuilt blocks and only assemble the dynamic
+# parts around them. The styles go into the parent page's head through a
+# zero-height component, so a session needs them only once per content hash.
+FONT_AWESOME = '<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">'
+
+PAGE_CSS = """
+/* Cockpit Instrument Panel */
+.instrument-panel {
+    display: grid;
+    grid-template-columns: repeat(4, 1fr);
+    gap: 15px;
+    margin: 20px 0;
+}
+
+.instrument {
+    background: linear-gradient(135deg, #0a0a0a 0%, #1a1a1a 100%);
+    border-radius: 10px;
+    padding: 15px;
+    color: #00ff00;
+    text-align: center;
+    border: 2px solid #333;
+    box-shadow: inset 0 0 10px rgba(0,255,0,0.3);
+}
+
+/* Chat Messages */
+.chat-message {
+    margin: 8px 0;
+    padding: 10px 15px;
+    border-radius: 10px;
+    border-left: 4px solid #007bff;
+    background: #f8f9fa;
+}
+
+.chat-system {
+    background: #e9ecef;
+    border-left: 4px solid #6c757d;
+    font-style: italic;
+}
+
+/* 3D Button Styles */
+.btn-3d {
+    position: relative;
+    display: inline-block;
+    padding: 10px 20px;
+    margin: 5px;
+    background: linear-gradient(135deg, #007bff 0%, #0056b3 100%);
+    color: white;
+    border: none;
+    border-radius: 8px;
+    font-weight: bold;
+    cursor: pointer;
+    box-shadow: 0 5px 0 #004085;
+    transition: all 0.2s ease;
+}
+
+.btn-3d:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 7px 0 #004085;
+}
+
+.btn-3d:active {
+    transform: translateY(3px);
+    box-shadow: 0 2px 0 #004085;
+}
+
+/* Animation Keyframes */
+@keyframes pulse {
+    0% { box-shadow: 0 0 0 0 rgba(0, 255, 0, 0.7); }
+    70% { box-shadow: 0 0 0 10px rgba(0, 255, 0, 0); }
+    100% { box-shadow: 0 0 0 0 rgba(0, 255, 0, 0); }
+}
+
+.pulse {
+    animation: pulse 1.5s infinite;
+}
+
+/* Dashboard Styles */
+.dashboard {
+    background: linear-gradient(135deg, #1a2a6c 0%, #2c3e50 100%);
+    border-radius: 20px;
+    padding: 20px;
+    color: white;
+    margin-bottom: 20px;
+    box-shadow: 0 10px 30px rgba(0,0,0,0.3);
+}
+
+/* Strategy tips, emitted as one block */
+.flight-tip {
+    padding: 12px;
+    margin: 6px 0;
+    background: linear-gradient(135deg, #f8f9fa 0%, #e8f4f8 100%);
+    border-radius: 8px;
+    border-left: 3px solid #4FC3F7;
+}
+"""
+
+AIRCRAFT_SPECS = {
+    'Aircraft Type': ['✈️ Standard Jet', '✈️✈️ High-Speed Jet', '📦✈️ Cargo Aircraft', '🚀✈️ Supersonic Jet'],
+    'Max Speed': ['1× dice roll', '2× dice roll', '1× dice roll', '3× dice roll'],
+    'Cruise Altitude': ['10,000 ft', '15,000 ft', '8,000 ft', '20,000 ft'],
+    '3D Model': ['Basic Commercial Jet', 'Military Supersonic Jet', 'Heavy Cargo Transport', 'Hypersonic Experimental Jet'],
+    'Special Ability': [
+        'Standard flight characteristics',
+        'Double speed, increased maneuverability',
+        'Can carry other aircraft at same position',
+        'Triple speed, maximum altitude capability'
+    ],
+    'Unlock Requirement': [
+        'Available at mission start',
+        '1 aircraft successfully landed',
+        '2 aircraft successfully landed',
+        '3 aircraft successfully landed'
+    ]
+}
+
+FLIGHT_TIPS = (
+    "🔹 Unlock High-Speed Jet first for rapid transit across the flight map",
+    "🔹 Adjust camera angle (0-360°) to get better visibility of all aircraft positions",
+    "🔹 Use Cargo Aircraft to move multiple aircraft together and conserve fuel",
+    "🔹 Supersonic Jet is ideal for final approach to the destination airport",
+    "🔹 Changing weather conditions affect visibility - adjust your strategy accordingly",
+    "🔹 Higher altitude aircraft (Supersonic Jet) have priority in flight path selection",
+    "🔹 Time of day affects navigation - night flights require more careful planning",
+    "🔹 Extra flight segments (rolling 6) can be used to gain strategic advantage"
+)
+
+OPERATIONS_MANUAL = """
+## 🎯 Mission Objective
+Be the first pilot to successfully land all 4 of your aircraft at the destination airport (position 52).
+
+## 🎮 3D Flight Controls
+### Starting the Mission
+- Each squadron has 4 aircraft at their departure airport
+- Red Squadron: Position 0 | Blue Squadron: Position 13 | Green Squadron: Position 26 | Yellow Squadron: Position 39
+- You need to roll a **6** to authorize takeoff from the departure airport
+- Squadrons take turns clockwise (Red → Blue → Green → Yellow)
+
+### Flight Navigation Rules
+- Roll the dice (1-6) to set your flight distance
+- You can only navigate one aircraft per flight segment
+- Rolling a 6 grants an extra flight segment
+- Aircraft fly along a 3D spiral flight path (positions increase numerically)
+- Any flight that reaches or exceeds position 52 lands at the destination airport
+
+## ✈️ Advanced Aircraft Systems
+### High-Speed Jet (2× Speed)
+- Unlocked when 1 aircraft lands at destination
+- Flies at twice the set flight distance (e.g., roll 3 = 6 units)
+- Cruise altitude: 15,000ft
+- 3D Model: Military Supersonic Jet
+
+### Cargo Aircraft
+- Unlocked when 2 aircraft land at destination
+- Can carry other aircraft at the same flight position
+- All carried aircraft move with the cargo aircraft
+- Cruise altitude: 8,000ft
+- 3D Model: Heavy Cargo Transport
+
+### Supersonic Jet (3× Speed)
+- Unlocked when 3 aircraft land at destination
+- Flies at three times the set flight distance (e.g., roll 2 = 6 units)
+- Cruise altitude: 20,000ft
+- 3D Model: Hypersonic Experimental Jet
+
+## 📡 3D Visualization Features
+### Camera Controls
+- Adjust camera rotation (0-360°) to view the flight map from any angle
+- Change camera height to zoom in/out of the 3D flight space
+- Weather conditions affect visibility and flight characteristics
+- Time of day changes the visual appearance of the flight map
+
+### Flight Instruments
+- Altimeter shows current cruise altitude (feet)
+- Airspeed indicator shows current velocity (km/h)
+- Flight position display shows average squadron position
+- Status indicator shows current mission status
+"""
+
+FOOTER_HTML = """
+<div style="text-align: center; color: #666; padding: 20px 0;">
+    <p>✈️ 3D Aeroplane Chess Simulator | Built with Streamlit + HTML/CSS/JavaScript</p>
+    <p style="font-size: 12px;">To run locally: <code>streamlit run aeroplane_chess_3d.py</code></p>
+</div>
+"""
+
+STYLE_LOADER = """<script>
+const head = window.parent.document.head;
+if (!head.querySelector('[data-aeroplane-static="%(hash)s"]')) {
+    head.querySelectorAll("[data-aeroplane-static]").forEach((node) => node.remove());
+    const box = document.createElement("template");
+    box.innerHTML = %(html)s;
+    const nodes = Array.from(box.content.children);
+    nodes.forEach((node) => { node.dataset.aeroplaneStatic = "%(hash)s"; });
+    head.append(...nodes);
+}
+</script>"""
+
+def minify_css(css):
+    """Drop comments and the whitespace around CSS punctuation"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    # A colon only loses its whitespace inside a declaration; in a selector
+    # "a :hover" and "a:hover" match different elements
+    return re.sub(r"\s*:\s*(?=[^{}]*[;}])", ":", css).strip()
+
+def style_loader(html, content_hash):
+    """Script adding html to the parent page's head unless this hash is already there"""
+    payload = json.dumps(html).replace("</", "<\\/")
+    return STYLE_LOADER % {"hash": content_hash, "html": payload}
+
+def _arrow_bytes(df):
+    """Size of the Arrow stream st.dataframe sends for df"""
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+@functools.lru_cache(maxsize=None)
+def static_content():
+    """Prebuilt page blocks, the specs DataFrame, the bytes each sends and a content hash"""
+    blocks = {
+        "styles": FONT_AWESOME + "<style>" + minify_css(PAGE_CSS) + "</style>",
+        "tips": "".join(f"<div class='flight-tip'>{tip}</div>" for tip in FLIGHT_TIPS),
+        "manual": OPERATIONS_MANUAL,
+        "footer": FOOTER_HTML
+    }
+    specs = pd.DataFrame(AIRCRAFT_SPECS)
+
+    digest = hashlib.sha256()
+    for name in sorted(blocks):
+        digest.update(name.encode("utf-8") + b"\0" + blocks[name].encode("utf-8") + b"\0")
+    digest.update(specs.to_csv(index=False).encode("utf-8"))
+    content_hash = digest.hexdigest()[:12]
+
+    # The styles are sent as their loader script, so that is what gets measured
+    blocks["css"] = style_loader(blocks.pop("styles"), content_hash)
+    sizes = {name: len(text.encode("utf-8")) for name, text in blocks.items()}
+    sizes["specs"] = _arrow_bytes(specs)
+    return {"blocks": blocks, "specs": specs, "sizes": sizes, "hash": content_hash}
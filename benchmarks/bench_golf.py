@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import golf_levels
+import golf_montecarlo
+import golf_physics
+import golf_replay
+
+# --------------------------
+# Golf Benchmarks
+# --------------------------
+# Micro benchmarks of the level helpers and physics, plus full headless
+# reruns of golfgame.py through Streamlit's AppTest. Results are a flat
+# {name: {"value", "unit"}} map, saved as a JSON baseline and compared
+# against on later runs. Baselines are machine specific, so save one on
+# the machine you compare on.
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golf_baseline.json")
+OBSTACLE_COUNTS = (0, 1, 5, 10, 15, 30, 60)
+RERUN_LEVELS = (1, 5, 10, 20)
+# Units where a larger value is better; everything else is a cost
+HIGHER_IS_BETTER = {"steps/s"}
+
+def per_call_us(func, repeat=5):
+    """Best-of-repeat time of one call in microseconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+def bench_level_helpers(results):
+    rng = random.Random(0)
+    results["difficulty_params"] = {"value": per_call_us(lambda: golf_levels.difficulty_params(10)), "unit": "us"}
+    results["generate_harder_hole_position"] = {
+        "value": per_call_us(lambda: golf_levels.generate_harder_hole_position(10, rng)), "unit": "us"
+    }
+    results["calculate_score"] = {"value": per_call_us(lambda: golf_levels.calculate_score(7, 10)), "unit": "us"}
+
+    # level_payload replaced the per-rerun golf_game_html build: time both the
+    # cold build (layout + JSON) and the cached lookup a rerun actually pays
+    seeds = iter(range(10**9))
+    build = golf_levels.level_payload.__wrapped__
+    layout = golf_levels.level_layout.__wrapped__
+    for level in (1, 20):
+        results[f"level_payload_build[level={level}]"] = {
+            "value": per_call_us(lambda: build(level, next(seeds))), "unit": "us"
+        }
+        results[f"level_layout_build[level={level}]"] = {
+            "value": per_call_us(lambda: layout(level, next(seeds))), "unit": "us"
+        }
+    golf_levels.level_payload(20, 1)
+    results["level_payload_cached"] = {"value": per_call_us(lambda: golf_levels.level_payload(20, 1)), "unit": "us"}
+
+def _shots(count, rng):
+    return [
+        (rng.uniform(-25, 25), rng.uniform(-25, 25), rng.getrandbits(32))
+        for _ in range(count)
+    ]
+
+def ball_steps_per_second(obstacles, shots, friction=0.94, bounce_variance=0.2):
+    """Fixed-step throughput of golf_physics over a batch of shots"""
+    steps = 0
+    started = time.perf_counter()
+    for vx, vy, seed in shots:
+        _, _, n = golf_physics.simulate_shot(
+            100, 400, vx, vy, obstacles, friction, bounce_variance, golf_physics.mulberry32(seed)
+        )
+        steps += n
+    return steps / (time.perf_counter() - started)
+
+def bench_physics(results, shots_per_run=200, repeat=3):
+    rng = random.Random(1)
+    shots = _shots(shots_per_run, rng)
+    for count in OBSTACLE_COUNTS:
+        obstacles = golf_levels.generate_obstacles(count, 1.5, random.Random(count))
+        results[f"ball_steps[obstacles={count}]"] = {
+            "value": max(ball_steps_per_second(obstacles, shots) for _ in range(repeat)), "unit": "steps/s"
+        }
+
+    for level in RERUN_LEVELS:
+        level_seed = 12345
+        replay_shots = [golf_replay.make_shot(level_seed, dx * 8, dy * 8, 100, seed) for dx, dy, seed in shots[:50]]
+        golf_levels.level_layout(level, level_seed)
+
+        def replay():
+            for shot in replay_shots:
+                golf_replay.replay_shot(level, shot, golf_replay.BALL_START)
+
+        results[f"replay_shot[level={level}]"] = {
+            "value": per_call_us(replay, repeat) / len(replay_shots), "unit": "us"
+        }
+
+def bench_heatmap(results):
+    """Monte Carlo landing heatmaps: a cold batch per aim bucket and the cached lookup"""
+    ball = golf_replay.BALL_START
+    buckets = iter(range(10**9))
+    for level in (1, 20):
+        results[f"landing_heatmap[level={level},samples={golf_montecarlo.SAMPLES}]"] = {
+            "value": per_call_us(
+                lambda: golf_montecarlo.landing_heatmap(level, 12345, ball, 170, 1 + next(buckets) % 100), 3
+            ) / 1e3,
+            "unit": "ms"
+        }
+    cache = golf_montecarlo.HeatmapCache()
+    cache.heatmap(20, 12345, ball, 170, 20)
+    results["landing_heatmap_cached"] = {"value": per_call_us(lambda: cache.heatmap(20, 12345, ball, 170, 20)), "unit": "us"}
+
+def bench_reruns(results, reruns=20):
+    """Full script reruns of golfgame.py, one session per level so obstacle_count varies"""
+    from streamlit.testing.v1 import AppTest
+
+    for level in RERUN_LEVELS:
+        app = AppTest.from_file(os.path.join(ROOT, "golfgame.py"), default_timeout=60).run()
+        app.session_state.level = level
+        app.run()
+        if app.exception:
+            raise RuntimeError(f"golfgame.py raised during benchmark: {app.exception[0].value}")
+        timings = []
+        for _ in range(reruns):
+            started = time.perf_counter()
+            app.run()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        obstacles = golf_levels.difficulty_params(level)["obstacle_count"]
+        results[f"apptest_rerun[level={level},obstacles={obstacles}]"] = {
+            "value": timings[len(timings) // 2] * 1e3, "unit": "ms"
+        }
+
+def environment():
+    try:
+        import streamlit
+        streamlit_version = streamlit.__version__
+    except ImportError:
+        streamlit_version = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "streamlit": streamlit_version,
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    }
+
+def compare(results, baseline, threshold):
+    """Print each metric against the baseline, returns the names that regressed past threshold"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None or base["unit"] != result["unit"] or not base["value"]:
+            print(f"{name:<48} {result['value']:>12.2f} {result['unit']:<8} (no baseline)")
+            continue
+        ratio = result["value"] / base["value"]
+        slowdown = 1 / ratio if result["unit"] in HIGHER_IS_BETTER else ratio
+        flag = "  REGRESSION" if slowdown > threshold else ""
+        print(f"{name:<48} {result['value']:>12.2f} {result['unit']:<8} x{slowdown:5.2f} vs baseline{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Golf micro and macro benchmarks")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON path")
+    parser.add_argument("--save", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown factor that counts as a regression")
+    parser.add_argument("--skip-reruns", action="store_true", help="skip the AppTest rerun benchmarks")
+    parser.add_argument("--reruns", type=int, default=20, help="AppTest reruns per level")
+    args = parser.parse_args(argv)
+
+    results = {}
+    bench_level_helpers(results)
+    bench_physics(results)
+    bench_heatmap(results)
+    if not args.skip_reruns:
+        bench_reruns(results, args.reruns)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        for name, result in results.items():
+            print(f"{name:<48} {result['value']:>12.2f} {result['unit']}")
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        for name, result in results.items():
+            print(f"{name:<48} {result['value']:>12.2f} {result['unit']}")
+        print(f"\nNo baseline at {args.baseline}; run with --save to record one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
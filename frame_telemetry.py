@@ -0,0 +1,120 @@
+import threading
+
+# --------------------------
+# Client Frame-Time Telemetry
+# --------------------------
+# Browser components bucket every frame interval into these edges (ms) and
+# send one compact summary per shot or turn. hist has one count per edge
+# plus a final overflow bucket for frames slower than the last edge.
+BUCKET_EDGES_MS = (8, 12, 17, 20, 25, 34, 50, 100, 250)
+PERCENTILES = (50, 90, 99)
+MAX_FRAMES_PER_REPORT = 1_000_000
+
+class FrameStats:
+    """Merged frame-interval histogram with dropped-frame and long-task counters"""
+    __slots__ = ("hist", "frames", "dropped", "long_tasks", "long_task_ms", "max_ms", "reports")
+
+    def __init__(self):
+        self.hist = [0] * (len(BUCKET_EDGES_MS) + 1)
+        self.frames = 0
+        self.dropped = 0
+        self.long_tasks = 0
+        self.long_task_ms = 0.0
+        self.max_ms = 0.0
+        self.reports = 0
+
+    def add(self, summary):
+        """Merge one client summary, returns False (and changes nothing) if it is malformed"""
+        try:
+            hist = [int(count) for count in summary["hist"]]
+            dropped = int(summary.get("dropped", 0))
+            long_tasks = int(summary.get("long_tasks", 0))
+            long_task_ms = float(summary.get("long_task_ms", 0))
+            max_ms = float(summary.get("max_ms", 0))
+        except (KeyError, TypeError, ValueError):
+            return False
+        frames = sum(hist)
+        if (len(hist) != len(self.hist) or min(hist) < 0 or frames > MAX_FRAMES_PER_REPORT
+                or dropped < 0 or long_tasks < 0 or not 0 <= long_task_ms < float("inf")
+                or not 0 <= max_ms < float("inf")):
+            return False
+
+        for i, count in enumerate(hist):
+            self.hist[i] += count
+        self.frames += frames
+        self.dropped += dropped
+        self.long_tasks += long_tasks
+        self.long_task_ms += long_task_ms
+        self.max_ms = max(self.max_ms, max_ms)
+        self.reports += 1
+        return True
+
+    def percentile(self, q):
+        """Frame interval (ms) at percentile q, interpolated inside its bucket"""
+        if not self.frames:
+            return None
+        rank = q / 100 * self.frames
+        seen = 0
+        for i, count in enumerate(self.hist):
+            if count and seen + count >= rank:
+                low = BUCKET_EDGES_MS[i - 1] if i else 0
+                high = BUCKET_EDGES_MS[i] if i < len(BUCKET_EDGES_MS) else max(self.max_ms, low)
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return self.max_ms
+
+    def summary(self):
+        result = {f"p{q}_ms": self.percentile(q) for q in PERCENTILES}
+        result.update({
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "dropped_pct": 100 * self.dropped / (self.frames + self.dropped) if self.frames else 0.0,
+            "long_tasks": self.long_tasks,
+            "long_task_ms": self.long_task_ms,
+            "max_ms": self.max_ms,
+            "reports": self.reports
+        })
+        return result
+
+class TelemetryStore:
+    """Process-wide FrameStats per source, shared by every session"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, source, summary):
+        with self._lock:
+            stats = self._stats.setdefault(source, FrameStats())
+            return stats.add(summary)
+
+    def summary(self, source):
+        with self._lock:
+            stats = self._stats.get(source)
+            return stats.summary() if stats else FrameStats().summary()
+
+def record(session_stats, store, source, summary):
+    """Merge a client summary into a session's {source: FrameStats} map and the process store"""
+    if not isinstance(summary, dict):
+        return False
+    stats = session_stats.setdefault(source, FrameStats())
+    if not stats.add(summary):
+        return False
+    store.record(source, summary)
+    return True
+
+def summary_rows(session_stats, store, source):
+    """Session and overall percentiles side by side, ready for st.table"""
+    session = session_stats.get(source, FrameStats()).summary()
+    overall = store.summary(source)
+    rows = []
+    for key in [f"p{q}_ms" for q in PERCENTILES] + ["max_ms", "frames", "dropped_pct", "long_tasks"]:
+        rows.append({"Metric": key, "This Session": _fmt(session[key]), "All Sessions": _fmt(overall[key])})
+    return rows
+
+def _fmt(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    return str(value)
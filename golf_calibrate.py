@@ -0,0 +1,146 @@
+import argparse
+import json
+import multiprocessing
+import random
+import statistics
+import time
+
+import golf_levels
+import golf_planner
+import golf_replay
+
+# --------------------------
+# Simulated Golfers
+# --------------------------
+# Each bot aims at the hole and picks the drag length that would roll the
+# ball exactly there on open ground. When an obstacle blocks the straight
+# line it previews up to `lookahead` angled alternatives with noise-free
+# physics and keeps the one that stops closest. The chosen shot then misses
+# by Gaussian noise on the aim angle (radians) and drag length (fraction).
+SKILLS = {
+    "novice": {"angle_sd": 0.12, "power_sd": 0.25, "lookahead": 0},
+    "casual": {"angle_sd": 0.06, "power_sd": 0.12, "lookahead": 4},
+    "skilled": {"angle_sd": 0.03, "power_sd": 0.06, "lookahead": 8},
+    "expert": {"angle_sd": 0.01, "power_sd": 0.02, "lookahead": 16}
+}
+# A hole is abandoned this many strokes over par
+MAX_OVER_PAR = 8
+CHUNK_ROUNDS = 100
+
+def bot_shot(skill, ball, layout, params, level_seed, rng):
+    """One noisy planned shot as a replayable shot record"""
+    target_x, target_y = golf_planner.hole_target(layout["hole"])
+    angle, length = golf_planner.aim_shot(ball, target_x, target_y, layout["obstacles"], params, skill["lookahead"])
+    angle += rng.gauss(0, skill["angle_sd"])
+    length = max(0.0, length * (1 + rng.gauss(0, skill["power_sd"])))
+    return golf_planner.drag_shot(level_seed, angle, length, rng.getrandbits(32))
+
+def play_hole(skill, level, rng, max_over_par=MAX_OVER_PAR):
+    """(strokes, covered) on a fresh layout; strokes is None when the bot gave up"""
+    params = golf_levels.difficulty_params(level)
+    level_seed = rng.getrandbits(32)
+    layout = golf_levels.level_layout(level, level_seed)
+    ball = golf_replay.BALL_START
+    covered = golf_planner.hole_is_covered(layout)
+    max_strokes = golf_levels.par_for_level(level) + max_over_par
+
+    for strokes in range(1, max_strokes + 1):
+        shot = bot_shot(skill, ball, layout, params, level_seed, rng)
+        x, y, holed = golf_replay.replay_shot(level, shot, ball)
+        if holed:
+            return strokes, covered
+        ball = {"x": x, "y": y}
+    return None, covered
+
+def _run_chunk(task):
+    skill_name, level, rounds, seed, max_over_par = task
+    # String seeds hash deterministically, so a run is reproducible per chunk
+    rng = random.Random(f"{seed}-{skill_name}-{level}-{rounds[0]}")
+    skill = SKILLS[skill_name]
+    return skill_name, level, [play_hole(skill, level, rng, max_over_par) for _ in range(*rounds)]
+
+# --------------------------
+# Batch Runner and Report
+# --------------------------
+def calibrate(skills, levels, rounds, seed=0, max_over_par=MAX_OVER_PAR, processes=None):
+    """Run rounds holes per (skill, level) across a process pool, returns {(skill, level): [(strokes, covered)]}"""
+    tasks = [
+        (skill_name, level, (start, min(start + CHUNK_ROUNDS, rounds)), seed, max_over_par)
+        for skill_name in skills
+        for level in levels
+        for start in range(0, rounds, CHUNK_ROUNDS)
+    ]
+    results = {(skill_name, level): [] for skill_name in skills for level in levels}
+    with multiprocessing.Pool(processes) as pool:
+        for skill_name, level, holes in pool.imap_unordered(_run_chunk, tasks):
+            results[(skill_name, level)].extend(holes)
+    return results
+
+def summarize(holes, level, max_over_par=MAX_OVER_PAR):
+    """Stroke distribution of one (skill, level) cell against the level's par"""
+    par = golf_levels.par_for_level(level)
+    max_strokes = par + max_over_par
+    rounds = len(holes)
+    holed = sorted(strokes for strokes, _ in holes if strokes is not None)
+    # Abandoned holes count as max_strokes + 1 so they still weigh on the mean
+    counted = holed + [max_strokes + 1] * (rounds - len(holed))
+    return {
+        "level": level,
+        "par": par,
+        "rounds": rounds,
+        "mean": statistics.fmean(counted),
+        "median": statistics.median(counted),
+        "p90": counted[int(0.9 * (rounds - 1))],
+        "at_or_under_par": sum(1 for strokes in holed if strokes <= par) / rounds,
+        "abandoned": (rounds - len(holed)) / rounds,
+        "covered": sum(1 for _, covered in holes if covered) / rounds,
+        "histogram": {str(strokes): holed.count(strokes) for strokes in sorted(set(holed))}
+    }
+
+def format_report(report, skills, levels):
+    lines = []
+    header = f"{'level':>5} {'par':>4} {'covered':>7}" + "".join(f" | {name:>23}" for name in skills)
+    lines.append(header)
+    lines.append(f"{'':>5} {'':>4} {'':>7}" + " | mean  med  <=par  gave up" * len(skills))
+    lines.append("-" * len(header))
+    for level in levels:
+        covered = statistics.fmean(report[name][level]["covered"] for name in skills)
+        row = f"{level:>5} {golf_levels.par_for_level(level):>4} {covered:>7.0%}"
+        for name in skills:
+            cell = report[name][level]
+            row += (
+                f" | {cell['mean']:>4.1f} {cell['median']:>4.1f}"
+                f" {cell['at_or_under_par']:>5.0%} {cell['abandoned']:>7.0%}"
+            )
+        lines.append(row)
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate golf difficulty with simulated golfers")
+    parser.add_argument("--rounds", type=int, default=500, help="holes per skill and level")
+    parser.add_argument("--levels", type=int, nargs="+", default=list(range(1, golf_levels.MAX_LEVEL + 1)))
+    parser.add_argument("--skills", nargs="+", choices=sorted(SKILLS), default=list(SKILLS))
+    parser.add_argument("--max-over-par", type=int, default=MAX_OVER_PAR, help="strokes over par before a hole is abandoned")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--json", metavar="PATH", help="also write the full report with histograms")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results = calibrate(args.skills, args.levels, args.rounds, args.seed, args.max_over_par, args.processes)
+    elapsed = time.perf_counter() - started
+
+    report = {
+        name: {level: summarize(results[(name, level)], level, args.max_over_par) for level in args.levels}
+        for name in args.skills
+    }
+    print(format_report(report, args.skills, args.levels))
+    total = len(args.skills) * len(args.levels) * args.rounds
+    print(f"\n{total} holes in {elapsed:.1f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rounds": args.rounds, "max_over_par": args.max_over_par, "seed": args.seed, "skills": report}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import collections
+import os
+import sqlite3
+import threading
+import time
+
+# --------------------------
+# Persistent Golf Leaderboard
+# --------------------------
+DEFAULT_DB_PATH = os.environ.get(
+    "GOLF_LEADERBOARD_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "golf_leaderboard.sqlite3")
+)
+TOP_N = 10
+CACHE_SIZE = 256             # cached top-N lists: every level plus the most recent players
+
+_COLUMNS = "player, level, strokes, score, level_seed, created_at"
+
+# Both indexes carry every selected column, so top-N reads are served from
+# the index alone and stop after N rows in index order.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS level_results (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    strokes INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    level_seed INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_level_top
+    ON level_results (level, score DESC, strokes, created_at, player, level_seed);
+CREATE INDEX IF NOT EXISTS idx_results_player_top
+    ON level_results (player, score DESC, strokes, created_at, level, level_seed);
+"""
+
+_TOP_FOR_LEVEL = f"""
+SELECT {_COLUMNS} FROM level_results INDEXED BY idx_results_level_top
+WHERE level = ? ORDER BY score DESC, strokes, created_at LIMIT ?
+"""
+
+_TOP_FOR_PLAYER = f"""
+SELECT {_COLUMNS} FROM level_results INDEXED BY idx_results_player_top
+WHERE player = ? ORDER BY score DESC, strokes, created_at LIMIT ?
+"""
+
+class Leaderboard:
+    """SQLite-backed per-level results with an in-process LRU of hot top-N lists"""
+
+    def __init__(self, path=DEFAULT_DB_PATH, cache_size=CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._cache = collections.OrderedDict()
+
+    def record(self, player, level, strokes, score, level_seed):
+        """Store one completed level and drop the cached lists it can change"""
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO level_results ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                (player, level, strokes, score, level_seed, time.time())
+            )
+            self._cache.pop(("level", level), None)
+            self._cache.pop(("player", player), None)
+
+    def top_for_level(self, level, limit=TOP_N):
+        return self._top(("level", level), _TOP_FOR_LEVEL, level, limit)
+
+    def top_for_player(self, player, limit=TOP_N):
+        return self._top(("player", player), _TOP_FOR_PLAYER, player, limit)
+
+    def _top(self, key, query, value, limit):
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and limit <= cached[0]:
+                self._cache.move_to_end(key)
+                return cached[1][:limit]
+            rows = self._conn.execute(query, (value, max(limit, TOP_N))).fetchall()
+            results = [
+                {
+                    "player": player,
+                    "level": level,
+                    "strokes": strokes,
+                    "score": score,
+                    "level_seed": level_seed,
+                    "created_at": created_at
+                }
+                for player, level, strokes, score, level_seed, created_at in rows
+            ]
+            self._cache[key] = (max(limit, TOP_N), results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return results[:limit]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,120 @@
+import functools
+import json
+import math
+import random
+
+import golf_physics
+
+MAX_LEVEL = 20
+
+# --------------------------
+# Level Generation (pure, seedable)
+# --------------------------
+def difficulty_params(level):
+    """Progressive difficulty parameters for a level"""
+    return {
+        "obstacle_count": min(1 + (level - 1) * 2, 15),
+        "obstacle_size_multiplier": 1.0 + (level - 1) * 0.15,
+        "friction": max(0.90, 0.98 - (level - 1) * 0.008),
+        "aim_line_max_length": max(80, 200 - (level - 1) * 12),
+        "power_multiplier": max(8, 10 - (level - 1) * 0.2),
+        "hole_min_distance": 200 + (level - 1) * 50,
+        "shot_variance": min(0.15, 0.02 + (level * 0.007)),
+        "bounce_variance": min(0.3, 0.1 + (level * 0.01)),
+        "hole_threshold": max(12, 15 - (level * 0.15))
+    }
+
+def generate_harder_hole_position(level, rng=random):
+    """Generate increasingly difficult hole positions"""
+    edge_bias = min(0.8, (level - 1) * 0.1)
+
+    if rng.random() < edge_bias:
+        edge_choice = rng.choice(['top', 'bottom', 'left', 'right'])
+        if edge_choice == 'top':
+            x = rng.randint(100, 800)
+            y = rng.randint(50, 150)
+        elif edge_choice == 'bottom':
+            x = rng.randint(100, 800)
+            y = rng.randint(350, 450)
+        elif edge_choice == 'left':
+            x = rng.randint(100, 200)
+            y = rng.randint(50, 450)
+        else:
+            x = rng.randint(700, 800)
+            y = rng.randint(50, 450)
+    else:
+        # Past level 13 the minimum distance exceeds the course, so clamp it
+        min_distance = min(int(difficulty_params(level)["hole_min_distance"]), 800)
+        x = rng.randint(min_distance, 800)
+        y = rng.randint(50, 450)
+
+    return {"x": x, "y": y}
+
+def generate_obstacles(count, size_multiplier, rng=random):
+    """Place the level's obstacles as left/top/width/height boxes"""
+    return [
+        {
+            "x": rng.randint(150, 850),
+            "y": rng.randint(50, 450),
+            "w": 50 * size_multiplier + rng.randint(-10, 20),
+            "h": 30 * size_multiplier + rng.randint(-5, 15)
+        }
+        for _ in range(count)
+    ]
+
+def new_level_seed():
+    return random.getrandbits(32)
+
+def par_for_level(level):
+    return 3 + math.ceil(level * 0.7)
+
+def calculate_score(current_strokes, level):
+    """Score with difficulty bonus"""
+    par = par_for_level(level)
+    base_score = max(100 - ((current_strokes - par) * 25), 10)
+    difficulty_bonus = level * 10
+    return base_score + difficulty_bonus
+
+@functools.lru_cache(maxsize=256)
+def level_layout(level, seed):
+    """Hole and obstacles for (level, seed); treat the result as read-only"""
+    rng = random.Random(seed)
+    params = difficulty_params(level)
+    hole = generate_harder_hole_position(level, rng)
+    obstacles = generate_obstacles(params["obstacle_count"], params["obstacle_size_multiplier"], rng)
+    return {"hole": hole, "obstacles": obstacles}
+
+# --------------------------
+# Course Payload for the Browser
+# --------------------------
+PHYSICS_CONSTANTS = {
+    "step_ms": golf_physics.STEP_MS,
+    "max_steps_per_frame": golf_physics.MAX_STEPS_PER_FRAME,
+    "course_width": golf_physics.COURSE_WIDTH,
+    "course_height": golf_physics.COURSE_HEIGHT,
+    "ball_size": golf_physics.BALL_SIZE,
+    "hole_size": golf_physics.HOLE_SIZE,
+    "stop_speed": golf_physics.STOP_SPEED,
+    "bounce_damping": golf_physics.BOUNCE_DAMPING,
+    "max_power": golf_physics.MAX_POWER,
+    "max_shot_steps": golf_physics.MAX_SHOT_STEPS
+}
+
+@functools.lru_cache(maxsize=256)
+def level_payload(level, seed):
+    """Compact JSON describing everything static about a level, built once per (level, seed)"""
+    params = difficulty_params(level)
+    layout = level_layout(level, seed)
+    return json.dumps({
+        "level": level,
+        "seed": seed,
+        "friction": params["friction"],
+        "aim_line_max_length": params["aim_line_max_length"],
+        "power_multiplier": params["power_multiplier"],
+        "shot_variance": params["shot_variance"],
+        "bounce_variance": params["bounce_variance"],
+        "hole_threshold": params["hole_threshold"],
+        "hole": layout["hole"],
+        "obstacles": layout["obstacles"],
+        "physics": PHYSICS_CONSTANTS
+    }, separators=(",", ":"))
@@ -0,0 +1,188 @@
+import collections
+import math
+import threading
+
+import numpy as np
+
+import golf_levels
+import golf_physics
+
+# --------------------------
+# Vectorized Ball Physics
+# --------------------------
+# The same fixed-step model as golf_physics.step_ball(), advanced for a whole
+# batch of balls at once with numpy. Launch drift and bounce jitter come from
+# a numpy generator instead of mulberry32, so single shots are not pixel
+# exact; the batch is only used for landing-spot distributions.
+def boxes_array(obstacles):
+    """Expanded obstacle boxes as an (M, 4) array of min_x, max_x, min_y, max_y"""
+    return np.array(golf_physics.expand_obstacles(obstacles), dtype=float).reshape(-1, 4)
+
+def sweep_batch(x, y, vx, vy, boxes):
+    """Earliest time of impact in [0, 1] per ball, vectorized golf_physics.sweep_obstacles"""
+    if not len(boxes):
+        return np.ones_like(x)
+    x, y, vx, vy = x[:, None], y[:, None], vx[:, None], vy[:, None]
+    min_x, max_x, min_y, max_y = boxes.T
+
+    # A still axis never enters the box: it either overlaps forever or misses
+    still_x = vx == 0
+    still_y = vy == 0
+    safe_vx = np.where(still_x, 1.0, vx)
+    safe_vy = np.where(still_y, 1.0, vy)
+    t1 = np.where(still_x, -np.inf, (min_x - x) / safe_vx)
+    t2 = np.where(still_x, np.inf, (max_x - x) / safe_vx)
+    entry_x = np.minimum(t1, t2)
+    exit_x = np.maximum(t1, t2)
+    t1 = np.where(still_y, -np.inf, (min_y - y) / safe_vy)
+    t2 = np.where(still_y, np.inf, (max_y - y) / safe_vy)
+    entry_y = np.minimum(t1, t2)
+    exit_y = np.maximum(t1, t2)
+
+    entry = np.maximum(entry_x, entry_y)
+    exit_time = np.minimum(exit_x, exit_y)
+    hit = (entry < exit_time) & (entry >= 0) & (entry < 1)
+    hit &= ~still_x | ((x > min_x) & (x < max_x))
+    hit &= ~still_y | ((y > min_y) & (y < max_y))
+    return np.where(hit, entry, 1.0).min(axis=1)
+
+def simulate_batch(x, y, vx, vy, boxes, friction, bounce_variance, rng):
+    """Run every ball to rest, returns resting (x, y) arrays"""
+    x = np.array(x, dtype=float)
+    y = np.array(y, dtype=float)
+    vx = np.array(vx, dtype=float)
+    vy = np.array(vy, dtype=float)
+    max_x = golf_physics.COURSE_WIDTH - golf_physics.BALL_SIZE
+    max_y = golf_physics.COURSE_HEIGHT - golf_physics.BALL_SIZE
+
+    # Only moving balls are stepped; rested ones drop out of the working set
+    moving = np.flatnonzero((np.abs(vx) >= golf_physics.STOP_SPEED) | (np.abs(vy) >= golf_physics.STOP_SPEED))
+    for _ in range(golf_physics.MAX_SHOT_STEPS):
+        if not moving.size:
+            break
+        cx, cy = x[moving], y[moving]
+        cvx = vx[moving] * friction
+        cvy = vy[moving] * friction
+
+        hit_time = sweep_batch(cx, cy, cvx, cvy, boxes)
+        hit = hit_time < 1
+        cx = cx + cvx * hit_time
+        cy = cy + cvy * hit_time
+        if hit.any():
+            count = int(hit.sum())
+            cvx[hit] = cvx[hit] * golf_physics.BOUNCE_DAMPING + (rng.random(count) - 0.5) * bounce_variance
+            cvy[hit] = cvy[hit] * golf_physics.BOUNCE_DAMPING + (rng.random(count) - 0.5) * bounce_variance
+
+        x[moving] = np.clip(cx, 0, max_x)
+        y[moving] = np.clip(cy, 0, max_y)
+        vx[moving] = cvx
+        vy[moving] = cvy
+        moving = moving[(np.abs(cvx) >= golf_physics.STOP_SPEED) | (np.abs(cvy) >= golf_physics.STOP_SPEED)]
+    return x, y
+
+# --------------------------
+# Landing-Spot Heatmaps
+# --------------------------
+# Aims are quantized into buckets (2 degrees, 4 px of drag) so a drag that
+# wobbles around one direction keeps hitting the same cached heatmap. The
+# browser quantizes with the same bucket sizes and only reports an aim when
+# its bucket changes. Samples are spread uniformly over the whole bucket, so
+# a cached heatmap stands for every aim that maps to it.
+SAMPLES = 256
+CELL_SIZE = 10
+ANGLE_BUCKETS = 180
+LENGTH_BUCKET = 4
+MAX_DRAG_LENGTH = 400
+CACHE_SIZE = 512
+
+def aim_bucket(angle, length):
+    """(angle_bucket, length_bucket) of a drag angle in radians and length in pixels"""
+    angle_bucket = int(round(angle / (2 * math.pi) * ANGLE_BUCKETS)) % ANGLE_BUCKETS
+    length_bucket = int(round(min(max(length, 0), MAX_DRAG_LENGTH) / LENGTH_BUCKET))
+    return angle_bucket, length_bucket
+
+def bucket_aim(angle_bucket, length_bucket):
+    """Centre (angle, length) of an aim bucket"""
+    return angle_bucket * 2 * math.pi / ANGLE_BUCKETS, length_bucket * LENGTH_BUCKET
+
+def ball_pixel(ball):
+    """Whole-pixel ball position; a heatmap is keyed, seeded and simulated from it"""
+    return int(round(ball["x"])), int(round(ball["y"]))
+
+def landing_heatmap(level, level_seed, ball, angle_bucket, length_bucket, samples=SAMPLES):
+    """Binned resting points of samples shots at one aim bucket, plus the share that holed out"""
+    params = golf_levels.difficulty_params(level)
+    layout = golf_levels.level_layout(level, level_seed)
+    angle, length = bucket_aim(angle_bucket, length_bucket)
+    ball_x, ball_y = ball_pixel(ball)
+    # Seeded by the bucket and started from the whole pixel, so every ball
+    # position sharing a cache key gets the same heatmap wherever it is computed
+    rng = np.random.default_rng([level, level_seed, ball_x, ball_y, angle_bucket, length_bucket])
+
+    angle = angle + (rng.random(samples) - 0.5) * (2 * math.pi / ANGLE_BUCKETS)
+    length = np.maximum(length + (rng.random(samples) - 0.5) * LENGTH_BUCKET, 0)
+
+    # launch_velocity() for every sample at once
+    power_scale = np.minimum(length, golf_physics.MAX_POWER) / golf_physics.MAX_POWER
+    drift = (rng.random((2, samples)) - 0.5) * params["shot_variance"]
+    vx = (length * np.cos(angle) / params["power_multiplier"] + drift[0]) * power_scale
+    vy = (length * np.sin(angle) / params["power_multiplier"] + drift[1]) * power_scale
+
+    x, y = simulate_batch(
+        np.full(samples, float(ball_x)), np.full(samples, float(ball_y)), vx, vy,
+        boxes_array(layout["obstacles"]), params["friction"], params["bounce_variance"], rng
+    )
+
+    hole = layout["hole"]
+    dx = (x + golf_physics.BALL_SIZE / 2) - (hole["x"] + golf_physics.HOLE_SIZE / 2)
+    dy = (y + golf_physics.BALL_SIZE / 2) - (hole["y"] + golf_physics.HOLE_SIZE / 2)
+    holed = int((dx * dx + dy * dy < params["hole_threshold"] ** 2).sum())
+
+    cols = golf_physics.COURSE_WIDTH // CELL_SIZE
+    rows = golf_physics.COURSE_HEIGHT // CELL_SIZE
+    col = np.minimum(((x + golf_physics.BALL_SIZE / 2) // CELL_SIZE).astype(int), cols - 1)
+    row = np.minimum(((y + golf_physics.BALL_SIZE / 2) // CELL_SIZE).astype(int), rows - 1)
+    counts = np.bincount(row * cols + col, minlength=cols * rows)
+    cells = np.flatnonzero(counts)
+    return {
+        "angle_bucket": angle_bucket,
+        "length_bucket": length_bucket,
+        "cell": CELL_SIZE,
+        "samples": samples,
+        "holed_pct": 100 * holed / samples,
+        # Sparse [col, row, count] triples; a drag rarely covers more than a few dozen cells
+        "cells": [[int(i % cols), int(i // cols), int(counts[i])] for i in cells]
+    }
+
+class HeatmapCache:
+    """Process-wide LRU of landing heatmaps keyed by level, layout, ball and aim bucket"""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def heatmap(self, level, level_seed, ball, angle_bucket, length_bucket):
+        key = (level, level_seed) + ball_pixel(ball) + (angle_bucket, length_bucket)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        # Computed outside the lock; two sessions racing on one key both
+        # compute the same (seeded) result, which is harmless
+        result = landing_heatmap(level, level_seed, ball, angle_bucket, length_bucket)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
@@ -0,0 +1,127 @@
+import math
+import random
+
+# --------------------------
+# Fixed-Timestep Ball Physics
+# --------------------------
+# Reference model for the integrator in golf_component/index.html. The JS
+# side mirrors step_ball() line for line and both only use IEEE double +, -, *, /
+# and comparisons, so a shot simulated here lands on exactly the same pixel.
+STEP_MS = 1000 / 60
+MAX_STEPS_PER_FRAME = 5
+COURSE_WIDTH = 900
+COURSE_HEIGHT = 500
+BALL_SIZE = 25
+HOLE_SIZE = 40
+STOP_SPEED = 0.08
+BOUNCE_DAMPING = -0.7
+MAX_POWER = 100
+MAX_SHOT_STEPS = 5000
+
+def mulberry32(seed):
+    """Seeded uniform [0, 1) generator, bit-identical to the mulberry32() in the golf component"""
+    state = seed & 0xFFFFFFFF
+
+    def rand():
+        nonlocal state
+        state = (state + 0x6D2B79F5) & 0xFFFFFFFF
+        t = ((state ^ (state >> 15)) * (state | 1)) & 0xFFFFFFFF
+        t = ((t + (((t ^ (t >> 7)) * (t | 61)) & 0xFFFFFFFF)) & 0xFFFFFFFF) ^ t
+        return (t ^ (t >> 14)) / 4294967296
+
+    return rand
+
+def launch_velocity(drag_dx, drag_dy, power, power_multiplier, variance, rand=random.random):
+    """Initial velocity for a drag of (drag_dx, drag_dy) pixels"""
+    delta_x = drag_dx / power_multiplier
+    delta_y = drag_dy / power_multiplier
+    drift_x = (rand() - 0.5) * variance
+    drift_y = (rand() - 0.5) * variance
+    power_scale = power / MAX_POWER
+    return (delta_x + drift_x) * power_scale, (delta_y + drift_y) * power_scale
+
+def is_at_rest(vx, vy):
+    return abs(vx) < STOP_SPEED and abs(vy) < STOP_SPEED
+
+def expand_obstacles(obstacles):
+    """Minkowski-expand obstacles into (min_x, max_x, min_y, max_y) boxes for the ball's top-left point"""
+    return tuple(
+        (obstacle["x"] - BALL_SIZE, obstacle["x"] + obstacle["w"], obstacle["y"] - BALL_SIZE, obstacle["y"] + obstacle["h"])
+        for obstacle in obstacles
+    )
+
+def sweep_obstacles(x, y, vx, vy, boxes):
+    """Earliest time of impact in [0, 1) of the ball's box against any obstacle"""
+    hit_time = 1.0
+    # Broad phase: boxes more than a pixel clear of this step's motion can
+    # never produce entry < 1, so skipping them cannot change the result
+    low_x = min(x, x + vx) - 1
+    high_x = max(x, x + vx) + 1
+    low_y = min(y, y + vy) - 1
+    high_y = max(y, y + vy) + 1
+    for min_x, max_x, min_y, max_y in boxes:
+        if high_x < min_x or low_x > max_x or high_y < min_y or low_y > max_y:
+            continue
+
+        if vx == 0:
+            if x <= min_x or x >= max_x:
+                continue
+            entry_x = -math.inf
+            exit_x = math.inf
+        else:
+            t1 = (min_x - x) / vx
+            t2 = (max_x - x) / vx
+            entry_x = min(t1, t2)
+            exit_x = max(t1, t2)
+
+        if vy == 0:
+            if y <= min_y or y >= max_y:
+                continue
+            entry_y = -math.inf
+            exit_y = math.inf
+        else:
+            t1 = (min_y - y) / vy
+            t2 = (max_y - y) / vy
+            entry_y = min(t1, t2)
+            exit_y = max(t1, t2)
+
+        entry = max(entry_x, entry_y)
+        exit_time = min(exit_x, exit_y)
+        # Already-overlapping boxes (entry < 0) are left to slide out
+        if entry < exit_time and entry >= 0 and entry < hit_time:
+            hit_time = entry
+    return hit_time
+
+def step_ball(x, y, vx, vy, boxes, friction, bounce_variance, rand=random.random):
+    """Advance the ball by one fixed step, returns (x, y, vx, vy)"""
+    vx *= friction
+    vy *= friction
+
+    hit_time = sweep_obstacles(x, y, vx, vy, boxes)
+    if hit_time < 1:
+        x = x + vx * hit_time
+        y = y + vy * hit_time
+        vx = (vx * BOUNCE_DAMPING) + (rand() - 0.5) * bounce_variance
+        vy = (vy * BOUNCE_DAMPING) + (rand() - 0.5) * bounce_variance
+    else:
+        x = x + vx
+        y = y + vy
+
+    x = max(0, min(COURSE_WIDTH - BALL_SIZE, x))
+    y = max(0, min(COURSE_HEIGHT - BALL_SIZE, y))
+    return x, y, vx, vy
+
+def simulate_shot(x, y, vx, vy, obstacles, friction, bounce_variance, rand=random.random):
+    """Run a shot to rest, returns (x, y, steps)"""
+    boxes = expand_obstacles(obstacles)
+    steps = 0
+    while not is_at_rest(vx, vy) and steps < MAX_SHOT_STEPS:
+        x, y, vx, vy = step_ball(x, y, vx, vy, boxes, friction, bounce_variance, rand)
+        steps += 1
+    return x, y, steps
+
+def is_holed(x, y, hole, threshold):
+    """True when the resting ball's centre is within threshold of the hole's centre"""
+    dx = (x + BALL_SIZE / 2) - (hole["x"] + HOLE_SIZE / 2)
+    dy = (y + BALL_SIZE / 2) - (hole["y"] + HOLE_SIZE / 2)
+    return dx * dx + dy * dy < threshold * threshold
@@ -0,0 +1,136 @@
+import functools
+import math
+import random
+
+import golf_levels
+import golf_physics
+import golf_replay
+
+# --------------------------
+# Shot Geometry
+# --------------------------
+LOOKAHEAD_STEP = 0.12
+
+def hole_target(hole):
+    """Ball top-left position that centres the ball on the hole"""
+    return (
+        hole["x"] + golf_physics.HOLE_SIZE / 2 - golf_physics.BALL_SIZE / 2,
+        hole["y"] + golf_physics.HOLE_SIZE / 2 - golf_physics.BALL_SIZE / 2
+    )
+
+def hole_is_covered(layout):
+    """True when an obstacle covers the hole's centre, so no resting ball can be centred on it"""
+    target_x, target_y = hole_target(layout["hole"])
+    return any(
+        min_x < target_x < max_x and min_y < target_y < max_y
+        for min_x, max_x, min_y, max_y in golf_physics.expand_obstacles(layout["obstacles"])
+    )
+
+def ideal_drag_length(distance, friction, power_multiplier):
+    """Drag in pixels whose launch speed rolls the ball distance pixels before friction stops it"""
+    # Friction is applied before each move, so total travel is v * f / (1 - f)
+    speed = distance * (1 - friction) / friction
+    # Power saturates at MAX_POWER pixels of drag: below that speed grows with
+    # the square of the drag, above it linearly
+    if speed * power_multiplier <= golf_physics.MAX_POWER:
+        return math.sqrt(speed * golf_physics.MAX_POWER * power_multiplier)
+    return speed * power_multiplier
+
+def drag_shot(level_seed, angle, length, rng_seed):
+    """Shot record for a drag of length pixels towards angle"""
+    return golf_replay.make_shot(
+        level_seed, length * math.cos(angle), length * math.sin(angle),
+        min(length, golf_physics.MAX_POWER), rng_seed
+    )
+
+def _noise_free():
+    return 0.5
+
+def preview_shot(ball, angle, length, obstacles, params):
+    """Resting point of a shot with every random drift and bounce jitter at zero"""
+    vx, vy = golf_physics.launch_velocity(
+        length * math.cos(angle), length * math.sin(angle), min(length, golf_physics.MAX_POWER),
+        params["power_multiplier"], params["shot_variance"], _noise_free
+    )
+    x, y, _ = golf_physics.simulate_shot(
+        ball["x"], ball["y"], vx, vy, obstacles, params["friction"], params["bounce_variance"], _noise_free
+    )
+    return x, y
+
+def aim_shot(ball, target_x, target_y, obstacles, params, lookahead):
+    """Intended (angle, drag length): straight at the target unless an obstacle is in the way"""
+    dx = target_x - ball["x"]
+    dy = target_y - ball["y"]
+    angle = math.atan2(dy, dx)
+    length = ideal_drag_length(math.hypot(dx, dy), params["friction"], params["power_multiplier"])
+    boxes = golf_physics.expand_obstacles(obstacles)
+    if not lookahead or golf_physics.sweep_obstacles(ball["x"], ball["y"], dx, dy, boxes) >= 1:
+        return angle, length
+
+    best = None
+    for i in range(lookahead + 1):
+        # 0, +step, -step, +2 step, -2 step, ...
+        offset = LOOKAHEAD_STEP * ((i + 1) // 2) * (1 if i % 2 else -1)
+        x, y = preview_shot(ball, angle + offset, length, obstacles, params)
+        miss = math.hypot(target_x - x, target_y - y)
+        if best is None or miss < best[0]:
+            best = (miss, angle + offset)
+    return best[1], length
+
+# --------------------------
+# Per-Level Shot Plans
+# --------------------------
+# A plan is the full list of shot records that takes the ball from the tee
+# into the hole. Each stroke is searched over small aim, length and RNG seed
+# perturbations and scored with the exact replay physics, so playing the
+# plan's shots (seeds included) in the browser reproduces it pixel for pixel.
+PLAN_LOOKAHEAD = 16
+PLAN_ANGLE_OFFSETS = (0.0, 0.02, -0.02, 0.05, -0.05)
+PLAN_LENGTH_SCALES = (1.0, 0.95, 1.05)
+PLAN_SEEDS_PER_CANDIDATE = 2
+MAX_PLAN_SHOTS = 6
+DEMO_SEED_ATTEMPTS = 200
+
+@functools.lru_cache(maxsize=256)
+def plan_level(level, level_seed):
+    """Best shots from the tee to the hole for (level, level_seed), or None if none were found"""
+    params = golf_levels.difficulty_params(level)
+    layout = golf_levels.level_layout(level, level_seed)
+    target_x, target_y = hole_target(layout["hole"])
+    rng = random.Random(level_seed)
+    ball = golf_replay.BALL_START
+    shots = []
+
+    for _ in range(MAX_PLAN_SHOTS):
+        angle, length = aim_shot(ball, target_x, target_y, layout["obstacles"], params, PLAN_LOOKAHEAD)
+        best = None
+        for offset in PLAN_ANGLE_OFFSETS:
+            for scale in PLAN_LENGTH_SCALES:
+                for _ in range(PLAN_SEEDS_PER_CANDIDATE):
+                    shot = drag_shot(level_seed, angle + offset, length * scale, rng.getrandbits(32))
+                    x, y, holed = golf_replay.replay_shot(level, shot, ball)
+                    if holed:
+                        return tuple(shots) + (shot,)
+                    miss = math.hypot(target_x - x, target_y - y)
+                    if best is None or miss < best[0]:
+                        best = (miss, shot, {"x": x, "y": y})
+        shots.append(best[1])
+        ball = best[2]
+    return None
+
+@functools.lru_cache(maxsize=None)
+def demo_level(level):
+    """(level_seed, plan) of the fixed demo layout for a level: the first seed the planner can hole"""
+    rng = random.Random(f"demo-{level}")
+    for _ in range(DEMO_SEED_ATTEMPTS):
+        level_seed = rng.getrandbits(32)
+        if hole_is_covered(golf_levels.level_layout(level, level_seed)):
+            continue
+        plan = plan_level(level, level_seed)
+        if plan is not None:
+            return level_seed, plan
+    raise RuntimeError(f"no plannable demo layout for level {level}")
+
+def demo_plans():
+    """Plan every level's demo layout up front"""
+    return {level: demo_level(level) for level in range(1, golf_levels.MAX_LEVEL + 1)}
@@ -0,0 +1,109 @@
+import argparse
+import base64
+import json
+import random
+import struct
+import sys
+
+import golf_levels
+import golf_physics
+
+# --------------------------
+# Shot Records
+# --------------------------
+# A shot is the compact tuple (level_seed, drag_dx, drag_dy, power, rng_seed).
+# Together with the level it was played on, that is all the deterministic
+# physics needs to re-simulate it; no per-frame trajectory is stored.
+SHOT_FIELDS = ("level_seed", "drag_dx", "drag_dy", "power", "rng_seed")
+BALL_START = {"x": 100, "y": 400}
+
+_SHOT_STRUCT = struct.Struct("<IdddI")
+
+def new_shot_seed():
+    return random.getrandbits(32)
+
+def make_shot(level_seed, drag_dx, drag_dy, power, rng_seed):
+    return (int(level_seed), float(drag_dx), float(drag_dy), float(power), int(rng_seed))
+
+def pack_shots(shots):
+    """Shots as 32 bytes each, for storage and regression corpora"""
+    return b"".join(_SHOT_STRUCT.pack(*shot) for shot in shots)
+
+def unpack_shots(data):
+    return [shot for shot in _SHOT_STRUCT.iter_unpack(data)]
+
+def encode_round(shots):
+    return base64.b64encode(pack_shots(shots)).decode("ascii")
+
+def decode_round(text):
+    return unpack_shots(base64.b64decode(text))
+
+# --------------------------
+# Deterministic Replay
+# --------------------------
+def replay_shot(level, shot, ball):
+    """Re-simulate one shot from ball, returns (x, y, holed)"""
+    level_seed, drag_dx, drag_dy, power, rng_seed = shot
+    params = golf_levels.difficulty_params(level)
+    layout = golf_levels.level_layout(level, level_seed)
+    rand = golf_physics.mulberry32(rng_seed)
+    power = min(max(power, 0), golf_physics.MAX_POWER)
+
+    vx, vy = golf_physics.launch_velocity(
+        drag_dx, drag_dy, power, params["power_multiplier"], params["shot_variance"], rand
+    )
+    x, y, _ = golf_physics.simulate_shot(
+        ball["x"], ball["y"], vx, vy, layout["obstacles"], params["friction"], params["bounce_variance"], rand
+    )
+    holed = golf_physics.is_holed(x, y, layout["hole"], params["hole_threshold"])
+    return x, y, holed
+
+def replay_round(shots, start_level=1):
+    """Replay a whole round; each hole-in advances to the next level like auto_advance_level"""
+    level = start_level
+    strokes = 0
+    ball = BALL_START
+    completed = []
+
+    for shot in shots:
+        if level > golf_levels.MAX_LEVEL:
+            break
+        x, y, holed = replay_shot(level, shot, ball)
+        strokes += 1
+        if holed:
+            completed.append({
+                "level": level,
+                "level_seed": shot[0],
+                "strokes": strokes,
+                "score": golf_levels.calculate_score(strokes, level)
+            })
+            level += 1
+            strokes = 0
+            ball = BALL_START
+        else:
+            ball = {"x": x, "y": y}
+
+    return {
+        "levels": completed,
+        "score": sum(result["score"] for result in completed),
+        "level": level,
+        "strokes": strokes,
+        "ball_position": ball
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded golf round")
+    parser.add_argument("round", help="JSON file with a 'shots' list or an encoded 'round' string")
+    parser.add_argument("--start-level", type=int, help="level of the first shot (default: the file's start_level, or 1)")
+    args = parser.parse_args(argv)
+
+    with open(args.round) as f:
+        data = json.load(f)
+    shots = decode_round(data["round"]) if "round" in data else [make_shot(*shot) for shot in data["shots"]]
+
+    start_level = args.start_level if args.start_level is not None else data.get("start_level", 1)
+    json.dump(replay_round(shots, start_level), sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import secrets
+import threading
+import time
+
+import golf_levels
+import golf_replay
+
+# --------------------------
+# Shared Golf Rooms
+# --------------------------
+# Rooms live in one process-wide registry, not in st.session_state, so every
+# session on the node sees the same course, level seed and settled balls.
+# The registry lock only guards the room table; each room has its own lock
+# for shots and turns. Rooms and players use __slots__ and balls are plain
+# (x, y) tuples, so a two-player room is about a kilobyte.
+MODES = ("turns", "simultaneous")
+MAX_PLAYERS = 8
+PLAYER_TIMEOUT = 120         # seconds without a poll before a player is dropped
+POLL_SECONDS = 2             # how often a session in a room re-runs its course panel
+ROOM_IDLE_TIMEOUT = 600      # seconds without any activity before a room is evicted
+SWEEP_INTERVAL = 30
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 5
+
+class RoomError(Exception):
+    pass
+
+class Player:
+    __slots__ = ("name", "ball", "strokes", "holed", "last_seen")
+
+    def __init__(self, name, now):
+        self.name = name
+        self.ball = (golf_replay.BALL_START["x"], golf_replay.BALL_START["y"])
+        self.strokes = 0
+        self.holed = False
+        self.last_seen = now
+
+class Room:
+    __slots__ = ("code", "mode", "level", "level_seed", "players", "order", "turn", "version", "last_active", "lock")
+
+    def __init__(self, code, mode, level, level_seed, now):
+        self.code = code
+        self.mode = mode
+        self.level = level
+        self.level_seed = level_seed
+        self.players = {}
+        self.order = []
+        self.turn = 0
+        self.version = 0
+        self.last_active = now
+        self.lock = threading.Lock()
+
+    # The helpers below expect self.lock to be held
+
+    def _touch(self, now):
+        self.version += 1
+        self.last_active = now
+
+    def _current(self):
+        """Session whose turn it is, or None in simultaneous mode or when everyone has holed"""
+        if self.mode != "turns":
+            return None
+        for offset in range(len(self.order)):
+            session_id = self.order[(self.turn + offset) % len(self.order)]
+            if not self.players[session_id].holed:
+                self.turn = (self.turn + offset) % len(self.order)
+                return session_id
+        return None
+
+    def _remove(self, session_id):
+        index = self.order.index(session_id)
+        self.order.pop(index)
+        del self.players[session_id]
+        if index < self.turn:
+            self.turn -= 1
+        if self.order:
+            self.turn %= len(self.order)
+        else:
+            self.turn = 0
+
+    def _drop_stale(self, now):
+        stale = [sid for sid, player in self.players.items() if now - player.last_seen > PLAYER_TIMEOUT]
+        for session_id in stale:
+            self._remove(session_id)
+        if stale:
+            self._touch(now)
+            self._advance_if_done(now)
+
+    def _advance_if_done(self, now):
+        """After a shot or a removal: if everyone still here has holed, start the next level"""
+        if self.players and all(player.holed for player in self.players.values()):
+            self._advance_level(now)
+
+    def _advance_level(self, now):
+        """Everyone holed: move the whole room to the next level, like auto_advance_level"""
+        self.level = min(self.level + 1, golf_levels.MAX_LEVEL + 1)
+        self.level_seed = golf_levels.new_level_seed()
+        start = (golf_replay.BALL_START["x"], golf_replay.BALL_START["y"])
+        for player in self.players.values():
+            player.ball = start
+            player.strokes = 0
+            player.holed = False
+        self.turn = 0
+        self._touch(now)
+
+    def snapshot(self, session_id):
+        """Plain-dict view for one session: its own turn flag plus every other ball"""
+        with self.lock:
+            current = self._current()
+            return {
+                "code": self.code,
+                "mode": self.mode,
+                "level": self.level,
+                "level_seed": self.level_seed,
+                "version": self.version,
+                "my_turn": self.mode != "turns" or current == session_id,
+                "current": self.players[current].name if current else None,
+                "players": [
+                    {
+                        "name": self.players[sid].name,
+                        "strokes": self.players[sid].strokes,
+                        "holed": self.players[sid].holed,
+                        "me": sid == session_id
+                    }
+                    for sid in self.order
+                ],
+                "ghosts": [
+                    {"name": player.name, "x": player.ball[0], "y": player.ball[1], "holed": player.holed}
+                    for sid, player in self.players.items() if sid != session_id
+                ]
+            }
+
+class RoomRegistry:
+    """All rooms on this process, with idle eviction on access"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rooms = {}
+        self._last_sweep = time.monotonic()
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def create(self, session_id, name, mode="turns", level=1):
+        if mode not in MODES:
+            raise RoomError(f"Unknown room mode: {mode}")
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            code = self._new_code()
+            room = Room(code, mode, level, golf_levels.new_level_seed(), now)
+            self._rooms[code] = room
+        self.join(code, session_id, name)
+        return code
+
+    def join(self, code, session_id, name):
+        now = time.monotonic()
+        # Under the registry lock like leave(), so a leave() emptying the room cannot delete it first
+        with self._lock:
+            self._sweep(now)
+            room = self._rooms.get(code)
+            if room is None:
+                raise RoomError(f"No room with code {code}")
+            with room.lock:
+                if session_id not in room.players:
+                    if len(room.players) >= MAX_PLAYERS:
+                        raise RoomError(f"Room {code} is full")
+                    room.players[session_id] = Player(name, now)
+                    room.order.append(session_id)
+                else:
+                    room.players[session_id].name = name
+                    room.players[session_id].last_seen = now
+                room._touch(now)
+        return room.snapshot(session_id)
+
+    def leave(self, code, session_id):
+        with self._lock:
+            room = self._rooms.get(code)
+            if room is None:
+                return
+            with room.lock:
+                if session_id in room.players:
+                    now = time.monotonic()
+                    room._remove(session_id)
+                    room._touch(now)
+                    room._advance_if_done(now)
+                if not room.players:
+                    del self._rooms[code]
+
+    def poll(self, code, session_id):
+        """Heartbeat plus snapshot; raises RoomError if the room or the player is gone"""
+        room = self._room(code)
+        now = time.monotonic()
+        with room.lock:
+            player = room.players.get(session_id)
+            if player is None:
+                raise RoomError(f"You are no longer in room {code}")
+            player.last_seen = now
+            # A connected player keeps the room alive, even on a long turn
+            room.last_active = now
+            room._drop_stale(now)
+        return room.snapshot(session_id)
+
+    def record_shot(self, code, session_id, level, x, y, holed):
+        """Broadcast one settled ball, returns the room snapshot after it"""
+        room = self._room(code)
+        now = time.monotonic()
+        with room.lock:
+            player = room.players.get(session_id)
+            if player is None or level != room.level:
+                raise RoomError("Shot does not belong to this room's current level")
+            if player.holed:
+                raise RoomError("You have already holed out on this level")
+            if room.mode == "turns" and room._current() != session_id:
+                raise RoomError("It is not your turn")
+            player.ball = (x, y)
+            player.strokes += 1
+            player.holed = holed
+            player.last_seen = now
+            if room.mode == "turns":
+                room.turn = (room.turn + 1) % len(room.order)
+            room._touch(now)
+            room._advance_if_done(now)
+        return room.snapshot(session_id)
+
+    def _room(self, code):
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            room = self._rooms.get(code)
+        if room is None:
+            raise RoomError(f"No room with code {code}")
+        return room
+
+    def _new_code(self):
+        while True:
+            code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+            if code not in self._rooms:
+                return code
+
+    def _sweep(self, now):
+        """Evict idle rooms; called with self._lock held, at most every SWEEP_INTERVAL seconds"""
+        if now - self._last_sweep < SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        idle = [code for code, room in self._rooms.items() if now - room.last_active > ROOM_IDLE_TIMEOUT]
+        for code in idle:
+            del self._rooms[code]
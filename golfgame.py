@@ -1,7 +1,34 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import random
-import math
+import json
+import os
+import uuid
+
+import frame_telemetry
+import golf_leaderboard
+import golf_levels
+import golf_montecarlo
+import golf_planner
+import golf_replay
+import golf_rooms
+import metrics
+import session_manager
+import tracing
+
+rerun_timer = metrics.RerunTimer(metrics.RERUN_SECONDS, app="golf")
+rerun_span = tracing.begin("rerun", app="golf")
+metrics.start_exporters()
+
+def finish_rerun():
+    """Close this run's timing and span; every exit path calls it, only the first call counts"""
+    if rerun_timer.stop():
+        tracing.end(rerun_span)
+        tracing.flush()
+
+def rerun():
+    """st.rerun() that first records the run it cuts short"""
+    finish_rerun()
+    st.rerun()
 
 # Set page config
 st.set_page_config(
@@ -14,15 +41,34 @@ st.set_page_config(
 # Session State Initialization
 # --------------------------
 def init_session_state():
+    # Kiosk screens open the page with ?demo=1 to start straight into the demo
+    demo_mode = st.query_params.get("demo") == "1"
     default_state = {
         "score": 0,
         "strokes": 0,
         "level": 1,
         "ball_position": {"x": 100, "y": 400},
-        "hole_position": {"x": random.randint(300, 700), "y": random.randint(100, 300)},
+        "level_seed": golf_planner.demo_level(1)[0] if demo_mode else golf_levels.new_level_seed(),
         "game_over": False,
+        "demo_mode": demo_mode,
         # Auto-level variables
         "auto_advance": False,
+        "last_shot_id": None,
+        # Deterministic shots: server-issued RNG seed and the compact round log
+        "shot_seed": golf_replay.new_shot_seed(),
+        "shot_log": [],
+        # Where shot_log starts once finished levels have been trimmed off it
+        "replay_start_level": 1,
+        "replay_offset": 0,
+        "player_name": "Player",
+        # Client frame-time histograms reported with each shot
+        "frame_stats": {},
+        # Multiplayer: rooms live in the process-wide registry, the session
+        # only remembers which one it is in
+        "session_id": uuid.uuid4().hex,
+        "room_code": None,
+        # Monte Carlo landing-spot overlay while aiming
+        "show_heatmap": True,
         "advance_delay": 2000,  # 2 second delay before auto-skipping
         # Difficulty progression
         "obstacle_count": 1,
@@ -30,58 +76,66 @@ def init_session_state():
         "friction": 0.98,
         "aim_line_max_length": 200,
         "power_multiplier": 10,
-        "hole_min_distance": 200
+        "hole_min_distance": 200,
+        "shot_variance": 0.027,
+        "bounce_variance": 0.11,
+        "hole_threshold": 14.85
     }
     
     for key, value in default_state.items():
         if key not in st.session_state:
             st.session_state[key] = value
+    return tuple(default_state)
+
+# Widget-backed keys are left to Streamlit; everything else can be checkpointed
+WIDGET_KEYS = ("player_name", "demo_mode", "show_heatmap")
+SESSION_KEYS = tuple(key for key in init_session_state() if key not in WIDGET_KEYS)
+
+@st.cache_resource
+def get_session_manager():
+    # A reloaded or shared tab is a new player, not a second copy of this one
+    manager = session_manager.SessionManager("golf", identity_keys=("session_id", "room_code"))
+    metrics.track_sessions(manager)
+    return manager
+
+def trim_history():
+    """Over the session memory cap: drop the shots of finished levels, the replay then starts at this one"""
+    log = st.session_state.shot_log
+    kept = min(st.session_state.strokes, len(log))
+    if len(log) == kept:
+        return False
+    st.session_state.shot_log = log[len(log) - kept:]
+    st.session_state.replay_offset += len(log) - kept
+    st.session_state.replay_start_level = st.session_state.level
+    return True
 
-init_session_state()
+# Idle sessions are checkpointed to disk and come back here on their next rerun
+with tracing.span("session_activate"):
+    session_manager.track(get_session_manager(), st.query_params, SESSION_KEYS, trim_history)
 
 # --------------------------
 # Auto-Level Progression (No manual input needed)
 # --------------------------
+@tracing.traced()
 def calculate_difficulty(level):
     """Calculate progressive difficulty based on current level"""
-    difficulty_factor = math.pow(1.2, level - 1)
-    
-    st.session_state.obstacle_count = min(1 + (level - 1) * 2, 15)
-    st.session_state.obstacle_size_multiplier = 1.0 + (level - 1) * 0.15
-    st.session_state.friction = max(0.90, 0.98 - (level - 1) * 0.008)
-    st.session_state.aim_line_max_length = max(80, 200 - (level - 1) * 12)
-    st.session_state.power_multiplier = max(8, 10 - (level - 1) * 0.2)
-    st.session_state.hole_min_distance = 200 + (level - 1) * 50
-
-def generate_harder_hole_position(level):
-    """Generate increasingly difficult hole positions"""
-    edge_bias = min(0.8, (level - 1) * 0.1)
-    
-    if random.random() < edge_bias:
-        edge_choice = random.choice(['top', 'bottom', 'left', 'right'])
-        if edge_choice == 'top':
-            x = random.randint(100, 800)
-            y = random.randint(50, 150)
-        elif edge_choice == 'bottom':
-            x = random.randint(100, 800)
-            y = random.randint(350, 450)
-        elif edge_choice == 'left':
-            x = random.randint(100, 200)
-            y = random.randint(50, 450)
-        else:
-            x = random.randint(700, 800)
-            y = random.randint(50, 450)
-    else:
-        x = random.randint(int(st.session_state.hole_min_distance), 800)
-        y = random.randint(50, 450)
-    
-    return {"x": x, "y": y}
+    for key, value in golf_levels.difficulty_params(level).items():
+        st.session_state[key] = value
+
+def next_level_seed(level):
+    """Fresh random layout, or the fixed pre-planned layout in demo mode"""
+    if st.session_state.demo_mode:
+        return golf_planner.demo_level(level)[0]
+    return golf_levels.new_level_seed()
 
 # AUTOMATIC LEVEL ADVANCE (CORE FEATURE)
 def auto_advance_level():
     """Automatically advance to next level with no user input"""
     if st.session_state.auto_advance:
-        if st.session_state.level >= 20:
+        if st.session_state.level >= 20 and st.session_state.demo_mode:
+            # The demo loops forever instead of stopping at the game over screen
+            reset_game()
+        elif st.session_state.level >= 20:
             st.session_state.game_over = True
         else:
             # Increment level and reset state
@@ -89,559 +143,196 @@ def auto_advance_level():
             st.session_state.strokes = 0
             st.session_state.ball_position = {"x": 100, "y": 400}
             
-            # Generate harder hole position
-            st.session_state.hole_position = generate_harder_hole_position(st.session_state.level)
+            # New seed: harder hole position and obstacles come from golf_levels
+            st.session_state.level_seed = next_level_seed(st.session_state.level)
             
             # Update difficulty
             calculate_difficulty(st.session_state.level)
         
         # Reset auto-advance flag
         st.session_state.auto_advance = False
-        st.rerun()
-
-# Trigger auto-advance if flag is set
-if st.session_state.auto_advance:
-    auto_advance_level()
+        rerun()
 
 def reset_game():
     """Full reset to level 1"""
+    leave_room()
     st.session_state.score = 0
     st.session_state.strokes = 0
     st.session_state.level = 1
     st.session_state.ball_position = {"x": 100, "y": 400}
-    st.session_state.hole_position = generate_harder_hole_position(1)
+    st.session_state.level_seed = next_level_seed(1)
     st.session_state.game_over = False
     st.session_state.auto_advance = False
+    st.session_state.shot_log = []
+    st.session_state.replay_start_level = 1
+    st.session_state.replay_offset = 0
     calculate_difficulty(1)
+    if st.session_state.demo_mode:
+        # Plan every demo level once per process so the loop never searches
+        golf_planner.demo_plans()
+
+@st.cache_resource
+def get_leaderboard():
+    """One SQLite leaderboard per process; its top-N cache is shared by all sessions"""
+    return golf_leaderboard.Leaderboard()
+
+@st.cache_resource
+def get_telemetry_store():
+    return frame_telemetry.TelemetryStore()
+
+@st.cache_resource
+def get_rooms():
+    """Process-wide multiplayer room registry"""
+    rooms = golf_rooms.RoomRegistry()
+    metrics.ROOMS.set_function(lambda: len(rooms))
+    return rooms
+
+@st.cache_resource
+def get_heatmap_cache():
+    """Landing heatmaps shared by every session, so repeated aims are served from memory"""
+    return golf_montecarlo.HeatmapCache()
+
+# --------------------------
+# Multiplayer Rooms
+# --------------------------
+def enter_room(code):
+    """Start a fresh game on the room's course; its level is picked up by sync_room"""
+    reset_game()
+    st.session_state.room_code = code
 
-def calculate_score(current_strokes, level):
-    """Score with difficulty bonus"""
-    par = 3 + math.ceil(level * 0.7)
-    base_score = max(100 - ((current_strokes - par) * 25), 10)
-    difficulty_bonus = level * 10
-    return base_score + difficulty_bonus
+def leave_room():
+    if st.session_state.room_code:
+        get_rooms().leave(st.session_state.room_code, st.session_state.session_id)
+        st.session_state.room_code = None
+
+@tracing.traced()
+def sync_room():
+    """Heartbeat the room and follow its level; returns (snapshot, level_changed), snapshot None when solo"""
+    if not st.session_state.room_code:
+        return None, False
+    try:
+        room = get_rooms().poll(st.session_state.room_code, st.session_state.session_id)
+    except golf_rooms.RoomError as e:
+        st.session_state.room_code = None
+        st.toast(str(e))
+        return None, False
+    
+    if (room["level"], room["level_seed"]) == (st.session_state.level, st.session_state.level_seed):
+        return room, False
+    if room["level"] > golf_levels.MAX_LEVEL:
+        st.session_state.game_over = True
+    else:
+        st.session_state.level = room["level"]
+        st.session_state.level_seed = room["level_seed"]
+        st.session_state.strokes = 0
+        st.session_state.ball_position = {"x": 100, "y": 400}
+        calculate_difficulty(room["level"])
+    return room, True
+
+# Trigger auto-advance if flag is set
+if st.session_state.auto_advance:
+    auto_advance_level()
 
 # Calculate current difficulty
 calculate_difficulty(st.session_state.level)
 
 # --------------------------
-# Game HTML/JS with Full Auto-Skip
+# Golf Course Component (bidirectional, no page reloads)
 # --------------------------
-golf_game_html = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        
-        .golf-course {{
-            position: relative;
-            width: 900px;
-            height: 500px;
-            background: linear-gradient(135deg, #8BC34A 0%, #689F38 100%);
-            border-radius: 10px;
-            border: 5px solid #5D4037;
-            overflow: hidden;
-            cursor: grab;
-        }}
-        
-        .golf-ball {{
-            position: absolute;
-            width: 25px;
-            height: 25px;
-            background: white;
-            border-radius: 50%;
-            border: 2px solid #333;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.3);
-            z-index: 10;
-            cursor: grab;
-            transition: all 0.5s cubic-bezier(0.175, 0.885, 0.32, 1.275);
-        }}
-        
-        .golf-hole {{
-            position: absolute;
-            width: 40px;
-            height: 40px;
-            background: #212121;
-            border-radius: 50%;
-            border: 3px solid #795548;
-            box-shadow: inset 0 0 10px rgba(0,0,0,0.7);
-            z-index: 5;
-        }}
-        
-        .power-indicator {{
-            position: absolute;
-            bottom: 20px;
-            left: 50%;
-            transform: translateX(-50%);
-            width: 300px;
-            height: 20px;
-            background: #f5f5f5;
-            border: 2px solid #333;
-            border-radius: 10px;
-            overflow: hidden;
-        }}
-        
-        .power-bar {{
-            height: 100%;
-            width: 0%;
-            background: linear-gradient(90deg, #FF5722 0%, #FFC107 100%);
-            transition: width 0.2s linear;
-        }}
-        
-        .game-info {{
-            position: absolute;
-            top: 20px;
-            left: 20px;
-            background: rgba(255,255,255,0.8);
-            padding: 15px;
-            border-radius: 10px;
-            font-family: Arial, sans-serif;
-            font-weight: bold;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.2);
-        }}
-        
-        .difficulty-meter {{
-            position: absolute;
-            top: 20px;
-            right: 20px;
-            background: rgba(0,0,0,0.7);
-            color: white;
-            padding: 10px 15px;
-            border-radius: 10px;
-            font-family: Arial, sans-serif;
-            font-size: 14px;
-            z-index: 15;
-        }}
-        
-        .obstacle {{
-            position: absolute;
-            background: #795548;
-            border-radius: 5px;
-            box-shadow: 0 3px 8px rgba(0,0,0,0.5);
-            opacity: {min(0.95, 0.7 + (st.session_state.level * 0.01))};
-        }}
-        
-        .aim-line {{
-            position: absolute;
-            height: 3px;
-            background: rgba(255, 255, 255, {max(0.5, 0.7 - (st.session_state.level * 0.01))});
-            border-radius: 2px;
-            z-index: 8;
-            transform-origin: left center;
-            pointer-events: none;
-            box-shadow: 0 0 5px rgba(255, 255, 0, {max(0.5, 0.8 - (st.session_state.level * 0.02))});
-        }}
-        
-        .aim-dot {{
-            position: absolute;
-            width: {max(4, 8 - (st.session_state.level * 0.2))}px;
-            height: {max(4, 8 - (st.session_state.level * 0.2))}px;
-            background: rgba(255, 0, 0, {max(0.6, 0.8 - (st.session_state.level * 0.01))});
-            border-radius: 50%;
-            z-index: 9;
-            pointer-events: none;
-        }}
-        
-        .hole-target {{
-            position: absolute;
-            width: {max(30, 50 - (st.session_state.level * 1.5))}px;
-            height: {max(30, 50 - (st.session_state.level * 1.5))}px;
-            border: 2px dashed rgba(255, 255, 255, {max(0.4, 0.6 - (st.session_state.level * 0.015))});
-            border-radius: 50%;
-            z-index: 4;
-            transform: translate(-50%, -50%);
-            left: {st.session_state.hole_position['x'] + 20}px;
-            top: {st.session_state.hole_position['y'] + 20}px;
-        }}
-        
-        /* Auto-level transition animation */
-        .level-transition {{
-            position: absolute;
-            top: 0;
-            left: 0;
-            width: 100%;
-            height: 100%;
-            background: rgba(0,0,0,0.95);
-            color: white;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            align-items: center;
-            z-index: 9999;
-            opacity: 0;
-            pointer-events: none;
-            transition: opacity 0.5s ease;
-            font-family: Arial, sans-serif;
-        }}
-        
-        .level-transition.active {{
-            opacity: 1;
-            pointer-events: all;
-        }}
-        
-        .level-transition h1 {{
-            font-size: 48px;
-            margin-bottom: 20px;
-            color: #FFC107;
-        }}
-        
-        .level-transition p {{
-            font-size: 24px;
-            margin-bottom: 30px;
-        }}
-        
-        .progress-bar {{
-            width: 50%;
-            height: 10px;
-            background: #333;
-            border-radius: 5px;
-            overflow: hidden;
-            margin-top: 20px;
-        }}
-        
-        .progress-fill {{
-            height: 100%;
-            width: 0%;
-            background: linear-gradient(90deg, #4CAF50, #FFC107);
-            transition: width {st.session_state.advance_delay / 1000}s linear;
-        }}
-        
-        .difficulty-bar {{
-            width: 100%;
-            height: 5px;
-            background: #ddd;
-            border-radius: 3px;
-            margin-top: 5px;
-            overflow: hidden;
-        }}
-        
-        .difficulty-fill {{
-            height: 100%;
-            width: {min(100, st.session_state.level * 5)}%;
-            background: linear-gradient(90deg, #4CAF50, #FF9800, #F44336);
-        }}
-    </style>
-</head>
-<body>
-    <div class="golf-course" id="course">
-        <div class="golf-ball" id="ball" style="left: {st.session_state.ball_position['x']}px; top: {st.session_state.ball_position['y']}px;"></div>
-        <div class="golf-hole" id="hole" style="left: {st.session_state.hole_position['x']}px; top: {st.session_state.hole_position['y']}px;"></div>
-        <div class="hole-target"></div>
-        <div class="aim-line" id="aimLine"></div>
-        <div class="aim-dot" id="aimDot"></div>
-        
-        <!-- Progressive obstacles -->
-        {''.join([
-            f'<div class="obstacle" style="width: {50 * st.session_state.obstacle_size_multiplier + random.randint(-10, 20)}px; height: {30 * st.session_state.obstacle_size_multiplier + random.randint(-5, 15)}px; left: {random.randint(150, 850)}px; top: {random.randint(50, 450)}px;"></div>'
-            for _ in range(st.session_state.obstacle_count)
-        ])}
-        
-        <div class="power-indicator">
-            <div class="power-bar" id="powerBar"></div>
-        </div>
-        
-        <div class="game-info">
-            Level: {st.session_state.level}<br>
-            Strokes: {st.session_state.strokes}<br>
-            Score: {st.session_state.score}
-        </div>
-        
-        <div class="difficulty-meter">
-            Difficulty: {st.session_state.level}/20
-            <div class="difficulty-bar">
-                <div class="difficulty-fill"></div>
-            </div>
-            <small>Obstacles: {st.session_state.obstacle_count}</small>
-        </div>
-        
-        <!-- Auto-level transition screen (no manual button) -->
-        <div class="level-transition" id="levelTransition">
-            <h1>LEVEL {st.session_state.level} COMPLETE!</h1>
-            <p>Auto-advancing to Level {st.session_state.level + 1}...</p>
-            <p style="font-size: 18px; color: #ccc;">Difficulty increased!</p>
-            <div class="progress-bar">
-                <div class="progress-fill" id="progressFill"></div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        // Game elements
-        const ball = document.getElementById('ball');
-        const hole = document.getElementById('hole');
-        const course = document.getElementById('course');
-        const powerBar = document.getElementById('powerBar');
-        const aimLine = document.getElementById('aimLine');
-        const aimDot = document.getElementById('aimDot');
-        const levelTransition = document.getElementById('levelTransition');
-        const progressFill = document.getElementById('progressFill');
-        
-        // Progressive difficulty parameters
-        const friction = {st.session_state.friction};
-        const aimLineMaxLength = {st.session_state.aim_line_max_length};
-        const powerMultiplier = {st.session_state.power_multiplier};
-        const maxPower = 100;
-        const advanceDelay = {st.session_state.advance_delay};  // Auto-skip delay (ms)
-        
-        // Game variables
-        let isDragging = false;
-        let startX, startY;
-        let power = 0;
-        let velocityX = 0;
-        let velocityY = 0;
-        let isMoving = false;
-        
-        // Hide aim line by default
-        aimLine.style.display = 'none';
-        aimDot.style.display = 'none';
-
-        // Drag controls
-        ball.addEventListener('mousedown', startDrag);
-        ball.addEventListener('touchstart', startDrag, {{passive: false}});
-        document.addEventListener('mousemove', drag);
-        document.addEventListener('touchmove', drag, {{passive: false}});
-        document.addEventListener('mouseup', endDrag);
-        document.addEventListener('touchend', endDrag);
-
-        function startDrag(e) {{
-            if (isMoving) return;
-            isDragging = true;
-            
-            const touch = e.touches ? e.touches[0] : null;
-            startX = touch ? touch.clientX : e.clientX;
-            startY = touch ? touch.clientY : e.clientY;
-            
-            power = 0;
-            powerBar.style.width = '0%';
-            aimLine.style.display = 'block';
-            aimDot.style.display = 'block';
-            
-            e.preventDefault();
-        }}
+# The page template is a static directory declared once per process; each
+# rerun only ships the memoized level payload plus ball, strokes and score.
+@st.cache_resource
+def golf_course_component():
+    return components.declare_component(
+        "golf_course",
+        path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "golf_component")
+    )
 
-        function drag(e) {{
-            if (!isDragging || isMoving) return;
-            
-            const touch = e.touches ? e.touches[0] : null;
-            const currentX = touch ? touch.clientX : e.clientX;
-            const currentY = touch ? touch.clientY : e.clientY;
-            
-            const deltaX = startX - currentX;
-            const deltaY = startY - currentY;
-            const dragDistance = Math.sqrt(deltaX * deltaX + deltaY * deltaY);
-            
-            power = Math.min(Math.max(dragDistance, 0), maxPower);
-            powerBar.style.width = (power / maxPower) * 100 + '%';
-            
-            updateAimLine(deltaX, deltaY, power);
-            e.preventDefault();
-        }}
-
-        function updateAimLine(deltaX, deltaY, power) {{
-            if (power === 0) {{
-                aimLine.style.display = 'none';
-                aimDot.style.display = 'none';
-                return;
-            }}
-            
-            const ballRect = ball.getBoundingClientRect();
-            const courseRect = course.getBoundingClientRect();
-            const ballX = ballRect.left - courseRect.left + (ballRect.width / 2);
-            const ballY = ballRect.top - courseRect.top + (ballRect.height / 2);
-            
-            const angle = Math.atan2(deltaY, deltaX);
-            const lineLength = (power / maxPower) * aimLineMaxLength;
-            const endX = ballX + Math.cos(angle) * lineLength;
-            const endY = ballY + Math.sin(angle) * lineLength;
-            
-            aimLine.style.left = ballX + 'px';
-            aimLine.style.top = ballY + 'px';
-            aimLine.style.width = lineLength + 'px';
-            aimLine.style.transform = 'rotate(' + angle + 'rad)';
-            
-            aimDot.style.left = (endX - (aimDot.offsetWidth / 2)) + 'px';
-            aimDot.style.top = (endY - (aimDot.offsetHeight / 2)) + 'px';
-        }}
+@tracing.traced()
+def golf_course(**kwargs):
+    return golf_course_component()(
+        course=golf_levels.level_payload(st.session_state.level, st.session_state.level_seed),
+        ball=st.session_state.ball_position,
+        strokes=st.session_state.strokes,
+        score=st.session_state.score,
+        advance_delay=st.session_state.advance_delay,
+        shot_seed=st.session_state.shot_seed,
+        telemetry_buckets=frame_telemetry.BUCKET_EDGES_MS,
+        **kwargs
+    )
 
-        function endDrag(e) {{
-            if (!isDragging || isMoving) return;
-            
-            isDragging = false;
-            powerBar.style.width = '0%';
-            aimLine.style.display = 'none';
-            aimDot.style.display = 'none';
-            
-            const touch = e.changedTouches ? e.changedTouches[0] : null;
-            const endX = touch ? touch.clientX : e.clientX;
-            const endY = touch ? touch.clientY : e.clientY;
-            
-            const deltaX = (startX - endX) / powerMultiplier;
-            const deltaY = (startY - endY) / powerMultiplier;
-            
-            // Random variance for harder levels
-            const randomVariance = {min(0.15, 0.02 + (st.session_state.level * 0.007))};
-            const driftX = (Math.random() - 0.5) * randomVariance;
-            const driftY = (Math.random() - 0.5) * randomVariance;
-            
-            const powerMultiplierVal = power / maxPower;
-            velocityX = (deltaX + driftX) * powerMultiplierVal;
-            velocityY = (deltaY + driftY) * powerMultiplierVal;
-            
-            if (!isMoving) {{
-                isMoving = true;
-                moveBall();
-                window.parent.postMessage({{type: 'STROKE'}}, '*');
-            }}
-        }}
-
-        function moveBall() {{
-            if (Math.abs(velocityX) < 0.08 && Math.abs(velocityY) < 0.08) {{
-                isMoving = false;
-                
-                // Hole collision detection
-                const ballRect = ball.getBoundingClientRect();
-                const holeRect = hole.getBoundingClientRect();
-                
-                const ballCenter = {{
-                    x: ballRect.left + ballRect.width / 2,
-                    y: ballRect.top + ballRect.height / 2
-                }};
-                
-                const holeCenter = {{
-                    x: holeRect.left + holeRect.width / 2,
-                    y: holeRect.top + holeRect.height / 2
-                }};
-                
-                const distanceToHole = Math.sqrt(
-                    Math.pow(ballCenter.x - holeCenter.x, 2) +
-                    Math.pow(ballCenter.y - holeCenter.y, 2)
-                );
-                
-                // Narrower threshold for harder levels
-                const holeThreshold = {max(12, 15 - (st.session_state.level * 0.15))};
-                if (distanceToHole < holeThreshold) {{
-                    // Trigger auto-level transition (NO MANUAL INPUT NEEDED)
-                    triggerAutoLevelAdvance();
-                    return;
-                }}
-                
-                // Update ball position
-                const ballX = parseFloat(ball.style.left) || 0;
-                const ballY = parseFloat(ball.style.top) || 0;
-                window.parent.postMessage({{
-                    type: 'POSITION',
-                    x: ballX,
-                    y: ballY
-                }}, '*');
-                return;
-            }}
-            
-            // Physics
-            velocityX *= friction;
-            velocityY *= friction;
-            
-            let currentX = parseFloat(ball.style.left) || 0;
-            let currentY = parseFloat(ball.style.top) || 0;
-            let newX = currentX + velocityX;
-            let newY = currentY + velocityY;
-            
-            // Boundary checks
-            const courseRect = course.getBoundingClientRect();
-            const ballRadius = ball.offsetWidth / 2;
-            newX = Math.max(ballRadius, Math.min(courseRect.width - ballRadius, newX));
-            newY = Math.max(ballRadius, Math.min(courseRect.height - ballRadius, newY));
-            
-            // Obstacle collision with random bounce
-            const obstacles = document.querySelectorAll('.obstacle');
-            obstacles.forEach(obstacle => {{
-                const obsRect = obstacle.getBoundingClientRect();
-                const ballRect = {{
-                    left: newX - ballRadius,
-                    top: newY - ballRadius,
-                    right: newX + ballRadius,
-                    bottom: newY + ballRadius
-                }};
-                
-                if (
-                    ballRect.left < obsRect.right &&
-                    ballRect.right > obsRect.left &&
-                    ballRect.top < obsRect.bottom &&
-                    ballRect.bottom > obsRect.top
-                ) {{
-                    const bounceVariance = {min(0.3, 0.1 + (st.session_state.level * 0.01))};
-                    const randomBounceX = (Math.random() - 0.5) * bounceVariance;
-                    const randomBounceY = (Math.random() - 0.5) * bounceVariance;
-                    
-                    velocityX = (velocityX * -0.7) + randomBounceX;
-                    velocityY = (velocityY * -0.7) + randomBounceY;
-                    newX = currentX + velocityX;
-                    newY = currentY + velocityY;
-                }}
-            }});
-            
-            ball.style.left = newX + 'px';
-            ball.style.top = newY + 'px';
-            
-            requestAnimationFrame(moveBall);
-        }}
-
-        // --------------------------
-        // AUTO-LEVEL ADVANCE (NO MANUAL INPUT)
-        // --------------------------
-        function triggerAutoLevelAdvance() {{
-            // Show transition screen
-            levelTransition.classList.add('active');
-            
-            // Animate progress bar
-            progressFill.style.width = '100%';
-            
-            // Calculate score and send to Streamlit
-            const currentStrokes = {st.session_state.strokes};
-            const currentLevel = {st.session_state.level};
-            const par = 3 + Math.ceil(currentLevel * 0.7);
-            const baseScore = Math.max(100 - ((currentStrokes - par) * 25), 10);
-            const difficultyBonus = currentLevel * 10;
-            const totalScore = baseScore + difficultyBonus;
-            
-            // Send hole-in event to trigger auto-advance
-            window.parent.postMessage({{
-                type: 'HOLE_IN',
-                score: totalScore,
-                level: currentLevel
-            }}, '*');
-            
-            // Auto-reload after delay (triggers next level)
-            setTimeout(() => {{
-                window.location.reload();
-            }}, advanceDelay);
-        }}
-
-        // Reset handler
-        window.addEventListener('message', (event) => {{
-            if (event.data.type === 'RESET') {{
-                ball.style.left = '100px';
-                ball.style.top = '400px';
-                hole.style.left = '{random.randint(300, 700)}px';
-                hole.style.top = '{random.randint(100, 300)}px';
-                
-                const holeTarget = document.querySelector('.hole-target');
-                holeTarget.style.left = (parseInt(hole.style.left) + 20) + 'px';
-                holeTarget.style.top = (parseInt(hole.style.top) + 20) + 'px';
-                
-                velocityX = 0;
-                velocityY = 0;
-                isMoving = false;
-                levelTransition.classList.remove('active');
-                progressFill.style.width = '0%';
-            }}
-        }});
-    </script>
-</body>
-</html>
-"""
+HEATMAP_BUCKETS = {
+    "angle_buckets": golf_montecarlo.ANGLE_BUCKETS,
+    "length_bucket": golf_montecarlo.LENGTH_BUCKET,
+    "max_length": golf_montecarlo.MAX_DRAG_LENGTH
+}
+
+@tracing.traced()
+def aim_heatmap(value):
+    """Landing heatmap for the aim the component last reported, or None"""
+    if not isinstance(value, dict) or value.get("kind") != "aim" or value.get("level") != st.session_state.level:
+        return None
+    angle_bucket = value.get("angle_bucket")
+    length_bucket = value.get("length_bucket")
+    if (not isinstance(angle_bucket, int) or not 0 <= angle_bucket < golf_montecarlo.ANGLE_BUCKETS
+            or not isinstance(length_bucket, int)
+            or not 0 < length_bucket <= golf_montecarlo.MAX_DRAG_LENGTH // golf_montecarlo.LENGTH_BUCKET):
+        return None
+    return get_heatmap_cache().heatmap(
+        st.session_state.level, st.session_state.level_seed, st.session_state.ball_position, angle_bucket, length_bucket
+    )
+
+def demo_shot():
+    """Next planned shot of the demo layout, or None once the plan is used up"""
+    level_seed, plan = golf_planner.demo_level(st.session_state.level)
+    if level_seed != st.session_state.level_seed or st.session_state.strokes >= len(plan):
+        return None
+    _, drag_dx, drag_dy, power, rng_seed = plan[st.session_state.strokes]
+    return {"dx": drag_dx, "dy": drag_dy, "power": power, "seed": rng_seed}
+
+@tracing.traced()
+def apply_shot_result(shot):
+    """Fold one shot into session state, re-simulated server-side from its compact record"""
+    st.session_state.last_shot_id = shot["id"]
+    frame_telemetry.record(st.session_state.frame_stats, get_telemetry_store(), "golf", shot.get("telemetry"))
+    expected_seed = st.session_state.shot_seed
+    st.session_state.shot_seed = golf_replay.new_shot_seed()
+    if shot["level"] != st.session_state.level or shot["seed"] != expected_seed:
+        return
+    
+    record = golf_replay.make_shot(
+        st.session_state.level_seed, shot["dx"], shot["dy"], shot["power"], shot["seed"]
+    )
+    x, y, holed = golf_replay.replay_shot(st.session_state.level, record, st.session_state.ball_position)
+    if st.session_state.room_code:
+        # Broadcast the settled ball; shots out of turn or from a stale level are dropped
+        try:
+            get_rooms().record_shot(
+                st.session_state.room_code, st.session_state.session_id, st.session_state.level, x, y, holed
+            )
+        except golf_rooms.RoomError as e:
+            st.toast(str(e))
+            return
+    st.session_state.shot_log.append(record)
+    metrics.STROKES.inc()
+    
+    st.session_state.strokes += 1
+    st.session_state.ball_position = {"x": x, "y": y}
+    if holed:
+        level_score = golf_levels.calculate_score(st.session_state.strokes, st.session_state.level)
+        st.session_state.score += level_score
+        metrics.LEVELS_COMPLETED.inc(level=st.session_state.level)
+        # In a room the level moves on once every player has holed (sync_room)
+        st.session_state.auto_advance = not st.session_state.room_code
+        if st.session_state.demo_mode:
+            return
+        get_leaderboard().record(
+            st.session_state.player_name,
+            st.session_state.level,
+            st.session_state.strokes,
+            level_score,
+            st.session_state.level_seed
+        )
 
 # --------------------------
 # Streamlit UI (No manual level buttons needed)
@@ -659,16 +350,63 @@ if st.session_state.game_over:
     """)
     if st.button("Play Again", type="primary"):
         reset_game()
-        st.rerun()
+        rerun()
 
 # Active Game Screen (no manual level buttons)
 else:
     col1, col2 = st.columns([3, 1])
     
+    # In a room the course panel re-runs on its own to pick up other balls
+    @st.fragment(run_every=golf_rooms.POLL_SECONDS if st.session_state.room_code else None)
+    @tracing.traced()
+    def course_panel():
+        if session_manager.heartbeat(get_session_manager()):
+            # Checkpointed while idle; only a full rerun restores the session
+            st.info("This session was paused after a period of inactivity.")
+            if st.button("Resume"):
+                rerun()
+            return
+        room, level_changed = sync_room()
+        if level_changed:
+            rerun()
+        
+        autoplay = demo_shot() if st.session_state.demo_mode else None
+        if autoplay:
+            # Planned shots only replay exactly with the seed they were planned with
+            st.session_state.shot_seed = autoplay["seed"]
+        # Aim events only re-run this fragment; the heatmap for the reported
+        # aim goes out with the same render
+        show_heatmap = st.session_state.show_heatmap and not st.session_state.demo_mode
+        heatmap = aim_heatmap(st.session_state.get("golf_course")) if show_heatmap else None
+        value = golf_course(
+            autoplay=autoplay,
+            ghosts=room["ghosts"] if room else [],
+            locked=bool(room) and (not room["my_turn"] or any(p["me"] and p["holed"] for p in room["players"])),
+            heatmap_buckets=HEATMAP_BUCKETS if show_heatmap else None,
+            heatmap=heatmap,
+            key="golf_course",
+            default=None
+        )
+        if value and value.get("kind") == "shot" and value["id"] != st.session_state.last_shot_id:
+            apply_shot_result(value)
+            rerun()
+        
+        if room:
+            turn = f"{room['current']}'s turn" if room["current"] else "everyone plays"
+            st.caption(f"Room {room['code']} · {room['mode']} · Level {room['level']} · {turn}")
+            st.table([
+                {
+                    "Player": p["name"] + (" (you)" if p["me"] else ""),
+                    "Strokes": p["strokes"],
+                    "Holed": "⛳" if p["holed"] else ""
+                }
+                for p in room["players"]
+            ])
+    
     with col1:
-        components.html(golf_game_html, height=580, width=950)
+        course_panel()
     
-    with col2:
+    with col2, tracing.span("stats_column"):
         st.header("Game Stats")
         st.metric("Current Level", st.session_state.level)
         st.metric("Strokes This Level", st.session_state.strokes)
@@ -680,81 +418,70 @@ else:
         st.write(f"🔹 Friction: {st.session_state.friction:.2f} (Faster stop)")
         st.write(f"🔹 Aim Line Length: {st.session_state.aim_line_max_length}px")
         st.write(f"🔹 Auto-Skip Delay: {st.session_state.advance_delay / 1000}s")
+        st.toggle("Landing Heatmap", key="show_heatmap", help="Monte Carlo resting spots for the current aim")
+        heatmap_cache = get_heatmap_cache()
+        st.caption(f"Heatmap cache: {len(heatmap_cache)} aims, {heatmap_cache.hits} hits / {heatmap_cache.misses} misses")
+        
+        # Leaderboard (served from the in-process top-10 cache)
+        st.subheader("Leaderboard")
+        st.text_input("Player Name", key="player_name")
+        top_results = get_leaderboard().top_for_level(st.session_state.level)
+        if top_results:
+            st.table([
+                {"Player": r["player"], "Strokes": r["strokes"], "Score": r["score"]}
+                for r in top_results
+            ])
+        else:
+            st.caption(f"No results for level {st.session_state.level} yet")
+        
+        if not st.session_state.demo_mode:
+            st.subheader("Multiplayer")
+            if st.session_state.room_code:
+                st.write(f"🔗 Room code: **{st.session_state.room_code}**")
+                if st.button("Leave Room"):
+                    reset_game()
+                    rerun()
+            else:
+                room_mode = st.selectbox("Room Mode", golf_rooms.MODES)
+                if st.button("Create Room"):
+                    code = get_rooms().create(st.session_state.session_id, st.session_state.player_name, room_mode)
+                    enter_room(code)
+                    rerun()
+                join_code = st.text_input("Room Code").strip().upper()
+                if st.button("Join Room", disabled=not join_code):
+                    try:
+                        get_rooms().join(join_code, st.session_state.session_id, st.session_state.player_name)
+                    except golf_rooms.RoomError as e:
+                        st.error(str(e))
+                    else:
+                        enter_room(join_code)
+                        rerun()
+        
+        with st.expander("Frame Telemetry"):
+            st.table(frame_telemetry.summary_rows(st.session_state.frame_stats, get_telemetry_store(), "golf"))
+            sessions = get_session_manager().stats()
+            st.caption(
+                f"Sessions: {sessions['sessions']} live ({sessions['bytes'] / 1024:.0f} KB), "
+                f"{sessions['evicted']} checkpointed to disk"
+            )
         
         # Only reset button (no skip level button)
         st.subheader("Controls")
+        st.toggle("Demo Mode", key="demo_mode", on_change=reset_game, help="The game plays itself through all levels")
         if st.button("Reset Game", type="primary"):
             reset_game()
-            st.rerun()
+            rerun()
+        
+        if st.session_state.shot_log:
+            st.download_button(
+                "Download Round Replay",
+                data=json.dumps({
+                    "start_level": st.session_state.replay_start_level,
+                    "shot_offset": st.session_state.replay_offset,
+                    "round": golf_replay.encode_round(st.session_state.shot_log)
+                }),
+                file_name="golf_round.json",
+                mime="application/json"
+            )
 
-# --------------------------
-# Auto-Level Message Handler
-# --------------------------
-components.html(f"""
-<script>
-    let isProcessing = false;
-    
-    window.addEventListener('message', async (event) => {{
-        if (isProcessing) return;
-        isProcessing = true;
-        
-        try {{
-            if (event.data.type === 'STROKE') {{
-                // Increment strokes
-                await fetch('/_stcore/stream', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{
-                        method: 'set_item',
-                        args: ['strokes', {st.session_state.strokes} + 1],
-                        kwargs: {{}}
-                    }})
-                }});
-                window.location.reload();
-            }}
-            
-            else if (event.data.type === 'HOLE_IN') {{
-                // Update score
-                await fetch('/_stcore/stream', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{
-                        method: 'set_item',
-                        args: ['score', {st.session_state.score} + event.data.score],
-                        kwargs: {{}}
-                    }})
-                }});
-                
-                // Set auto-advance flag (triggers next level automatically)
-                await fetch('/_stcore/stream', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{
-                        method: 'set_item',
-                        args: ['auto_advance', true],
-                        kwargs: {{}}
-                    }})
-                }});
-            }}
-            
-            else if (event.data.type === 'POSITION') {{
-                await fetch('/_stcore/stream', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{
-                        method: 'set_item',
-                        args: ['ball_position', {{x: event.data.x, y: event.data.y}}],
-                        kwargs: {{}}
-                    }})
-                }});
-            }}
-        }} 
-        catch (error) {{
-            console.error('Error:', error);
-        }} 
-        finally {{
-            isProcessing = false;
-        }}
-    }});
-</script>
-""", height=0, width=0)
+finish_rerun()
@@ -0,0 +1,238 @@
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --------------------------
+# Prometheus Text-Format Metrics
+# --------------------------
+# Counters and histograms write into a dict owned by the calling thread, so
+# an increment takes no lock. Shards are summed when the metrics are
+# scraped. Streamlit runs each rerun on a fresh thread, so shards of finished
+# threads are folded into one retired total whenever a new shard is created.
+# Gauges are functions evaluated at scrape time.
+#
+# Exporting is opt-in:
+#   GAME_METRICS_PORT=9464   serve /metrics on GAME_METRICS_HOST (default 127.0.0.1)
+#   GAME_METRICS_FILE=path   rewrite the file every GAME_METRICS_INTERVAL seconds
+METRICS_HOST = os.environ.get("GAME_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = os.environ.get("GAME_METRICS_PORT")
+METRICS_FILE = os.environ.get("GAME_METRICS_FILE")
+EXPORT_INTERVAL = float(os.environ.get("GAME_METRICS_INTERVAL", 15))
+RERUN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_metrics = {}
+_local = threading.local()
+_shards = []
+_retired = {}
+_lock = threading.Lock()
+_exporters_started = False
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+def _shard():
+    """This thread's {(name, labels): value} dict, created and registered on first use"""
+    try:
+        return _local.values
+    except AttributeError:
+        pass
+    values = {}
+    with _lock:
+        alive = []
+        for thread, shard in _shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                _merge(_retired, shard)
+        alive.append((threading.current_thread(), values))
+        _shards[:] = alive
+    _local.values = values
+    return values
+
+def _merge(total, shard):
+    for key, value in shard.copy().items():
+        if isinstance(value, list):
+            merged = total.setdefault(key, [0] * len(value))
+            for i, part in enumerate(value):
+                merged[i] += part
+        else:
+            total[key] = total.get(key, 0) + value
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._key = (name, ())
+        _metrics[name] = self
+
+    def inc(self, amount=1, **labels):
+        try:
+            shard = _local.values
+        except AttributeError:
+            shard = _shard()
+        key = (self.name, _labels_key(labels)) if labels else self._key
+        shard[key] = shard.get(key, 0) + amount
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        _metrics[name] = self
+
+    def observe(self, value, **labels):
+        shard = _shard()
+        key = (self.name, _labels_key(labels))
+        # One count per bucket plus +Inf, then the running sum
+        counts = shard.get(key)
+        if counts is None:
+            counts = shard[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+class Gauge:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._functions = {}
+        _metrics[name] = self
+
+    def set_function(self, function, **labels):
+        """Report function() for these labels at every scrape, replacing any earlier function"""
+        self._functions[_labels_key(labels)] = function
+
+    def samples(self):
+        return [(labels, function()) for labels, function in list(self._functions.items())]
+
+class RerunTimer:
+    """Times one script run into a histogram; only the first stop() counts"""
+    __slots__ = ("histogram", "labels", "started", "stopped")
+
+    def __init__(self, histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = time.perf_counter()
+        self.stopped = False
+
+    def stop(self):
+        """Record the run's time once; False when it was already recorded"""
+        if self.stopped:
+            return False
+        self.stopped = True
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return True
+
+# --------------------------
+# Game Metrics
+# --------------------------
+RERUN_SECONDS = Histogram("game_rerun_seconds", "Latency of full script reruns", RERUN_BUCKETS)
+SESSIONS = Gauge("game_sessions", "Sessions known to the session manager")
+SESSION_BYTES = Gauge("game_session_memory_bytes", "Pickled size of live session state")
+MOVES = Counter("aeroplane_moves_total", "Planes moved")
+CHAT_MESSAGES = Counter("aeroplane_chat_messages_total", "Chat messages posted")
+STATIC_BYTES = Counter("aeroplane_static_bytes_total", "Bytes of invariant page content emitted by reruns")
+STROKES = Counter("golf_strokes_total", "Golf strokes played")
+LEVELS_COMPLETED = Counter("golf_levels_completed_total", "Golf levels holed out")
+ROOMS = Gauge("golf_rooms", "Open multiplayer golf rooms")
+
+def track_sessions(manager):
+    """Report a SessionManager's live and checkpointed sessions and their memory"""
+    SESSIONS.set_function(lambda: manager.stats()["sessions"], app=manager.app, state="live")
+    SESSIONS.set_function(lambda: manager.stats()["evicted"], app=manager.app, state="checkpointed")
+    SESSION_BYTES.set_function(lambda: manager.stats()["bytes"], app=manager.app)
+
+# --------------------------
+# Scraping and Export
+# --------------------------
+def snapshot():
+    """Counter and histogram totals across every thread"""
+    with _lock:
+        total = {}
+        _merge(total, _retired)
+        for _, shard in _shards:
+            _merge(total, shard)
+    return total
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render():
+    """Every metric in the Prometheus text exposition format"""
+    total = snapshot()
+    series = {}
+    for (name, labels), value in total.items():
+        series.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, metric in _metrics.items():
+        if isinstance(metric, Gauge):
+            samples = metric.samples()
+            kind = "gauge"
+        else:
+            samples = sorted(series.get(name, []))
+            kind = "counter" if isinstance(metric, Counter) else "histogram"
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ("+Inf",), value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+def write_file(path):
+    with open(path + ".tmp", "w") as f:
+        f.write(render())
+    os.replace(path + ".tmp", path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def _write_file_forever(path, interval):
+    while True:
+        write_file(path)
+        time.sleep(interval)
+
+def start_exporters():
+    """Start the configured HTTP and file exporters once per process"""
+    global _exporters_started
+    with _lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    if METRICS_PORT:
+        server = ThreadingHTTPServer((METRICS_HOST, int(METRICS_PORT)), _MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if METRICS_FILE:
+        threading.Thread(
+            target=_write_file_forever, args=(METRICS_FILE, EXPORT_INTERVAL), name="metrics-file", daemon=True
+        ).start()
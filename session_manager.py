@@ -0,0 +1,240 @@
+import copy
+import os
+import pickle
+import re
+import stat
+import tempfile
+import threading
+import time
+import uuid
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# --------------------------
+# Idle-Session Eviction
+# --------------------------
+# Streamlit keeps every open tab's st.session_state in memory for as long as
+# the tab stays connected, so abandoned tabs pile up on a node. The manager
+# tracks when each session last ran and roughly how much it holds. Sessions
+# idle past IDLE_SECONDS are pickled to CHECKPOINT_DIR and their keys are
+# dropped from memory there and then. The next rerun restores them. A
+# reloaded or reopened tab finds its checkpoint through the ?session=<token>
+# query parameter.
+#
+# The sweep runs on whichever session happens to rerun, so it clears
+# another session's state. That is safe because every run, full or
+# fragment, starts with activate() or heartbeat() under the manager lock and
+# marks its session active: the sweep, holding the same lock, only ever
+# clears a session that is between runs. Each deletion goes through
+# Streamlit's SafeSessionState, which takes that session's own lock.
+#
+# Identity keys (who this connection is, say in a shared room) are never
+# carried over to a new connection: it keeps the fresh values its app gave it.
+#
+# Loading a pickle runs code, so checkpoints only ever live in a directory
+# of this user's with mode 0700, one per app. A directory someone else owns
+# or can write to is refused rather than read.
+IDLE_SECONDS = int(os.environ.get("GAME_SESSION_IDLE_SECONDS", 15 * 60))
+MEMORY_CAP_BYTES = int(os.environ.get("GAME_SESSION_MEMORY_CAP", 256 * 1024))
+CHECKPOINT_DIR = os.environ.get(
+    "GAME_CHECKPOINT_DIR",
+    os.path.join(tempfile.gettempdir(), f"game_sessions-{os.getuid()}")
+)
+CHECKPOINT_TTL = 7 * 24 * 3600
+SWEEP_INTERVAL = 60
+PRUNE_INTERVAL = 3600
+TOKEN_KEY = "session_token"
+TOKEN_PARAM = "session"
+EVICTED_KEY = "session_evicted"
+_TOKEN_RE = re.compile(r"[0-9a-f]{32}")
+
+def private_dir(path):
+    """Create path for this user only, or raise PermissionError if others could plant files in it"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} must be a directory owned by this user with mode 0700")
+    return path
+
+def footprint(state, keys):
+    """Approximate bytes held by a session: the pickled size of its tracked keys"""
+    return sum(len(pickle.dumps(state[key], pickle.HIGHEST_PROTOCOL)) for key in keys if key in state)
+
+class _Session:
+    __slots__ = ("session_id", "state", "keys", "last_active", "footprint", "evicted_at")
+
+    def __init__(self, session_id, state, keys, now):
+        self.session_id = session_id
+        self.state = state
+        self.keys = keys
+        self.last_active = now
+        self.footprint = 0
+        self.evicted_at = None
+
+class SessionManager:
+    """Activity, footprint and checkpoint bookkeeping for every session of one app"""
+
+    def __init__(self, app, checkpoint_dir=CHECKPOINT_DIR, idle_seconds=IDLE_SECONDS, memory_cap=MEMORY_CAP_BYTES,
+                 identity_keys=()):
+        self.app = app
+        self.identity_keys = frozenset(identity_keys)
+        private_dir(checkpoint_dir)
+        self.checkpoint_dir = private_dir(os.path.join(checkpoint_dir, app))
+        self.idle_seconds = idle_seconds
+        self.memory_cap = memory_cap
+        self.evictions = 0
+        self.restores = 0
+        self.trims = 0
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._last_sweep = time.monotonic()
+        self._last_prune = 0.0
+
+    def activate(self, session_id, state, query_params, keys, trim=None):
+        """Call at the top of every full rerun; returns "new", "active" or "restored"
+
+        trim() is called while the session is over the memory cap and should
+        drop some history, returning False once there is nothing left to drop.
+        """
+        now = time.monotonic()
+        keys = tuple(keys)
+        with self._lock:
+            token = state[TOKEN_KEY] if TOKEN_KEY in state else None
+            entry = self._sessions.get(token)
+            if token is None:
+                token, status = self._adopt(query_params.get(TOKEN_PARAM), session_id, state, keys, now)
+            elif entry is None or entry.session_id != session_id:
+                # Unknown token, or another tab has taken it over through the URL
+                if entry is not None:
+                    token = uuid.uuid4().hex
+                self._sessions[token] = _Session(session_id, state, keys, now)
+                status = "active"
+            elif entry.evicted_at is not None:
+                status = "restored" if self._restore_checkpoint(token, state) else "new"
+                entry.state = state
+                entry.evicted_at = None
+            else:
+                status = "active"
+            entry = self._sessions[token]
+            entry.state = state
+            entry.keys = keys
+            entry.last_active = now
+            # After the touch, so a session never evicts itself
+            self._sweep(now)
+
+        state[TOKEN_KEY] = token
+        if EVICTED_KEY in state:
+            del state[EVICTED_KEY]
+        if query_params.get(TOKEN_PARAM) != token:
+            query_params[TOKEN_PARAM] = token
+
+        size = footprint(state, keys)
+        while size > self.memory_cap and trim is not None and trim():
+            self.trims += 1
+            size = footprint(state, keys)
+        entry.footprint = size
+        return status
+
+    def touch(self, session_id, state):
+        """A fragment run counts as activity; returns True if the session is evicted and needs a full rerun"""
+        with self._lock:
+            token = state[TOKEN_KEY] if TOKEN_KEY in state else None
+            entry = self._sessions.get(token)
+            if entry is not None and entry.session_id == session_id and entry.evicted_at is None:
+                entry.last_active = time.monotonic()
+            return EVICTED_KEY in state
+
+    def stats(self):
+        with self._lock:
+            live = [entry for entry in self._sessions.values() if entry.evicted_at is None]
+            return {
+                "sessions": len(live),
+                "evicted": len(self._sessions) - len(live),
+                "bytes": sum(entry.footprint for entry in live),
+                "evictions": self.evictions,
+                "restores": self.restores,
+                "trims": self.trims
+            }
+
+    # The helpers below expect self._lock to be held
+
+    def _adopt(self, token, session_id, state, keys, now):
+        """First run of a browser session: pick up the URL token's live or checkpointed state"""
+        if not token or not _TOKEN_RE.fullmatch(token):
+            token = uuid.uuid4().hex
+            self._sessions[token] = _Session(session_id, state, keys, now)
+            return token, "new"
+
+        entry = self._sessions.get(token)
+        if entry is not None and entry.evicted_at is None:
+            # A reload: the old session may still be connected, so copy rather than share
+            for key in entry.keys:
+                if key in entry.state and key not in self.identity_keys:
+                    state[key] = copy.deepcopy(entry.state[key])
+            entry.session_id = session_id
+            self.restores += 1
+            return token, "restored"
+
+        restored = self._restore_checkpoint(token, state, skip=self.identity_keys)
+        self._sessions[token] = _Session(session_id, state, keys, now)
+        return token, "restored" if restored else "new"
+
+    def _path(self, token):
+        return os.path.join(self.checkpoint_dir, f"{token}.pkl")
+
+    def _restore_checkpoint(self, token, state, skip=()):
+        try:
+            with open(self._path(token), "rb") as f:
+                values = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False
+        for key, value in values.items():
+            if key not in skip:
+                state[key] = value
+        # The session is live again; a later eviction writes a fresh checkpoint
+        os.remove(self._path(token))
+        self.restores += 1
+        return True
+
+    def _evict(self, token, entry, now):
+        """Checkpoint an idle session and drop its keys, so only the checkpoint holds them"""
+        values = {key: entry.state[key] for key in entry.keys if key in entry.state}
+        path = self._path(token)
+        with os.fdopen(os.open(path + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+            pickle.dump(values, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        for key in values:
+            del entry.state[key]
+        entry.state[EVICTED_KEY] = True
+        entry.state = None
+        entry.footprint = 0
+        entry.evicted_at = now
+        self.evictions += 1
+
+    def _sweep(self, now):
+        """Checkpoint idle sessions and forget long-gone ones, at most every SWEEP_INTERVAL seconds"""
+        if now - self._last_sweep < SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        for token, entry in list(self._sessions.items()):
+            if entry.evicted_at is None and now - entry.last_active > self.idle_seconds:
+                self._evict(token, entry, now)
+            elif entry.evicted_at is not None and now - entry.evicted_at > CHECKPOINT_TTL:
+                del self._sessions[token]
+
+        if now - self._last_prune >= PRUNE_INTERVAL:
+            self._last_prune = now
+            cutoff = time.time() - CHECKPOINT_TTL
+            for item in os.scandir(self.checkpoint_dir):
+                if item.name.endswith(".pkl") and item.stat().st_mtime < cutoff:
+                    os.remove(item.path)
+
+def track(manager, query_params, keys, trim=None):
+    """SessionManager.activate() for the Streamlit session running this script"""
+    ctx = get_script_run_ctx()
+    return manager.activate(ctx.session_id, ctx.session_state, query_params, keys, trim)
+
+def heartbeat(manager):
+    """SessionManager.touch() for the fragment running in this session; True if it needs a full rerun"""
+    ctx = get_script_run_ctx()
+    return manager.touch(ctx.session_id, ctx.session_state)
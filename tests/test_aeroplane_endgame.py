@@ -0,0 +1,28 @@
+import numpy as np
+
+import aeroplane_endgame
+
+def settled(color):
+    count = aeroplane_endgame.state_count(color)
+    return np.zeros(count), np.ones((count, aeroplane_endgame.MAX_TURNS + 1))
+
+def test_a_tablebase_built_after_a_failed_load_is_picked_up(tmp_path, monkeypatch):
+    path = str(tmp_path / "endgame.npz")
+    assert aeroplane_endgame.load_tablebase(path) is None
+    monkeypatch.setattr(aeroplane_endgame, "solve", settled)
+    aeroplane_endgame.build(path)
+    tablebase = aeroplane_endgame.load_tablebase(path)
+    assert tablebase is not None
+    assert aeroplane_endgame.load_tablebase(path) is tablebase
+
+def test_supersonic_unlocks_only_once_three_planes_have_landed():
+    color = "red"
+    landed = aeroplane_endgame.kind_count(color) - 1
+    types = len(aeroplane_endgame.TYPES)
+    supersonic = aeroplane_endgame.TYPES.index("supersonic")
+    normal = 5 * types
+    flown = (5 + aeroplane_endgame.SPEEDS[supersonic]) * types + supersonic
+    # Two planes still flying: two landed, so jet and cargo only
+    assert aeroplane_endgame._pair_index(normal, flown) not in aeroplane_endgame._moves(color, normal, normal, 1)
+    # One plane still flying: three landed
+    assert aeroplane_endgame._pair_index(flown, landed) in aeroplane_endgame._moves(color, normal, landed, 1)
@@ -0,0 +1,38 @@
+import concurrent.futures.process
+import time
+
+import pytest
+
+import aeroplane_odds
+import aeroplane_rules
+
+def test_compare_runs_no_round_past_its_budget():
+    state = aeroplane_rules.new_game()._replace(dice_roll=6)
+    odds = aeroplane_odds.WinOdds()
+    assert odds.compare(state, budget=0) == ({}, 0)
+    _, rollouts = odds.compare(state, budget=1)
+    assert rollouts >= aeroplane_odds.MOVE_BATCH
+
+@pytest.fixture
+def pool():
+    pool = aeroplane_odds.RolloutPool(workers=1)
+    deadline = time.monotonic() + 30
+    while not pool.ready and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield pool
+    pool.shutdown()
+
+def test_the_pool_runs_rollouts_like_the_app_process(pool):
+    assert pool.ready
+    packed = aeroplane_odds.pack_state(aeroplane_rules.new_game())
+    runs = [(packed, 8, [1, 2], None), (packed, 8, [3, 4], None)]
+    remote = pool.map(aeroplane_odds.race_turns, *zip(*runs))
+    local = [aeroplane_odds.race_turns(*run) for run in runs]
+    assert all((a == b).all() for a, b in zip(remote, local))
+    assert pool.call(divmod, 7, 2) == (3, 1)
+
+def test_a_dead_helper_breaks_the_pool(pool):
+    pool._process.kill()
+    pool._process.wait()
+    with pytest.raises(concurrent.futures.process.BrokenProcessPool):
+        pool.map(abs, [-1])
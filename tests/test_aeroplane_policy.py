@@ -0,0 +1,17 @@
+import numpy as np
+
+import aeroplane_policy
+import aeroplane_rules
+
+def blank_tables(color):
+    count = aeroplane_policy.state_count(color)
+    return np.zeros(count, dtype=np.float32), np.full((count, 6), aeroplane_policy.NO_MOVE, dtype=np.uint8)
+
+def test_a_table_built_after_a_failed_load_is_picked_up(tmp_path, monkeypatch):
+    color = aeroplane_rules.PLAYERS[0]
+    assert aeroplane_policy.load_table(color, str(tmp_path)) is None
+    monkeypatch.setattr(aeroplane_policy, "solve", blank_tables)
+    aeroplane_policy.build(color, str(tmp_path))
+    table = aeroplane_policy.load_table(color, str(tmp_path))
+    assert table is not None
+    assert aeroplane_policy.load_table(color, str(tmp_path)) is table
@@ -0,0 +1,94 @@
+import aeroplane_rules
+from aeroplane_rules import FINISH
+
+def with_squadron(state, color, planes, plane_types=None, score=0):
+    """state with one squadron's planes placed by hand and the occupancy rebuilt"""
+    squadron = state.player(color)._replace(
+        planes=tuple(planes),
+        plane_types=tuple(plane_types or ('normal',) * len(planes)),
+        score=score
+    )
+    players = list(state.players)
+    players[aeroplane_rules.PLAYERS.index(color)] = squadron
+    return state._replace(players=tuple(players), occupancy=aeroplane_rules.build_occupancy(players))
+
+def fly(state, player, plane_idx, steps):
+    state, _ = aeroplane_rules.move_plane(state._replace(dice_roll=steps), player, plane_idx, steps)
+    return state
+
+def test_takeoff_needs_a_six_and_lands_on_the_first_square():
+    state = aeroplane_rules.new_game()
+    assert aeroplane_rules.move_plane(state, 'red', 0, 5) is None
+    state, events = aeroplane_rules.move_plane(state, 'red', 0, 6)
+    assert state.player('red').planes == (1, 0, 0, 0)
+    assert events == []
+
+def test_a_rival_plane_on_the_same_square_is_not_captured():
+    state = fly(aeroplane_rules.new_game(), 'blue', 0, 6)
+    state = with_squadron(state, 'red', (8, 0, 0, 0))
+    state = fly(state, 'red', 0, 6)
+    assert state.player('red').planes[0] == state.player('blue').planes[0] == 14
+    assert state.occupants(14) == (('red', 0), ('blue', 0))
+
+def test_a_cargo_plane_carries_the_squadrons_planes_on_its_square():
+    state = with_squadron(aeroplane_rules.new_game(), 'red', (10, 10, 10, 0), ('cargo', 'normal', 'jet', 'normal'), score=2)
+    state = with_squadron(state, 'blue', (10, 13, 13, 13))
+    state, events = aeroplane_rules.move_plane(state._replace(dice_roll=4), 'red', 0, 4)
+    assert state.player('red').planes == (14, 14, 14, 0)
+    assert state.player('blue').planes[0] == 10
+    assert events == [aeroplane_rules.Event('cargo', 'red', (1, 2))]
+    carried = aeroplane_rules.path_segments(state.player('red').flight_paths[1])
+    assert [(s.from_pos, s.to_pos, s.carried) for s in carried] == [(10, 14, True)]
+
+def test_landing_scores_unlocks_and_the_last_plane_wins():
+    state = with_squadron(aeroplane_rules.new_game(), 'red', (50, 49, FINISH, FINISH), score=2)
+    state, events = aeroplane_rules.move_plane(state, 'red', 0, 5)
+    assert state.player('red').planes[0] == FINISH
+    assert state.player('red').score == 3
+    assert events == [aeroplane_rules.Event('unlock', 'red', 'supersonic')]
+    assert not state.game_over
+    assert aeroplane_rules.move_plane(state, 'red', 0, 1) is None
+
+    state, events = aeroplane_rules.move_plane(state, 'red', 1, 3)
+    assert state.winner == 'red' and state.animation_state == 'landed'
+    assert events == [aeroplane_rules.Event('winner', 'red', None)]
+
+def test_undo_and_redo_round_trip_the_very_same_states():
+    states = [aeroplane_rules.new_game()]
+    past = ()
+    for player, steps in (('red', 6), ('red', 3), ('blue', 6)):
+        past = aeroplane_rules.push(past, states[-1])
+        states.append(fly(states[-1], player, 0, steps))
+    state, future = states[-1], ()
+
+    for expected in reversed(states[:-1]):
+        state, past, future = aeroplane_rules.undo(state, past, future)
+        assert state is expected
+    assert aeroplane_rules.undo(state, past, future) is None
+
+    for expected in states[1:]:
+        state, past, future = aeroplane_rules.redo(state, past, future)
+        assert state is expected
+    assert aeroplane_rules.redo(state, past, future) is None
+    assert past == tuple(states[:-1])
+
+def test_the_undo_history_is_capped():
+    past = ()
+    state = aeroplane_rules.new_game()
+    for _ in range(aeroplane_rules.UNDO_LIMIT + 5):
+        past = aeroplane_rules.push(past, state)
+    assert len(past) == aeroplane_rules.UNDO_LIMIT
+
+def test_the_occupancy_index_follows_moves_and_shares_untouched_squares():
+    start = with_squadron(aeroplane_rules.new_game(), 'red', (10, 10, 0, 0), ('cargo', 'normal', 'normal', 'normal'), score=2)
+    state = fly(start, 'blue', 0, 6)
+    state = fly(state, 'red', 0, 4)
+    state = fly(state, 'blue', 0, 6)
+    state = fly(state, 'red', 2, 6)
+    for current in (start, state):
+        assert current.occupancy == aeroplane_rules.build_occupancy(current.players)
+    assert state.occupants(14) == (('red', 0), ('red', 1))
+    assert state.occupants(20) == (('blue', 0),)
+    # Earlier states keep their own index, and squares no move touched are shared
+    assert start.occupants(10) == (('red', 0), ('red', 1))
+    assert state.occupancy[26] is start.occupancy[26]
@@ -0,0 +1,38 @@
+import uuid
+
+import pytest
+
+import aeroplane_rules
+import aeroplane_save
+
+def mission():
+    state = aeroplane_rules.new_game()
+    player = state.current_player
+    state, _ = aeroplane_rules.move_plane(state._replace(dice_roll=6), player, 0, 6)
+    state, _ = aeroplane_rules.move_plane(state._replace(dice_roll=3), player, 0, 3)
+    state = state._replace(dice_roll=3, last_move="Red flew 3")
+    nicknames = {color: f"{color} pilot" for color in aeroplane_rules.PLAYERS}
+    chat = [{"id": str(uuid.uuid4()), "text": "Cleared for takeoff ✈️", "sender": "ATC", "timestamp": "12:00:00", "is_system": True}]
+    return state, nicknames, chat
+
+def test_a_save_loads_back_unchanged():
+    state, nicknames, chat = mission()
+    saved = aeroplane_save.loads(aeroplane_save.dumps(state, nicknames, chat))
+    assert saved == {"game_state": state, "player_nicknames": nicknames, "chat_messages": chat}
+
+def test_text_too_long_for_a_save_is_a_save_error():
+    state, nicknames, chat = mission()
+    chat[0]["text"] = "x" * aeroplane_save.NO_TEXT
+    with pytest.raises(aeroplane_save.SaveError):
+        aeroplane_save.dumps(state, nicknames, chat)
+
+@pytest.mark.parametrize("damage", [
+    lambda data: data[:-1],
+    lambda data: data[:aeroplane_save._HEADER.size - 1],
+    lambda data: b"XXXX" + data[4:],
+    lambda data: data[:aeroplane_save._HEADER.size] + b"\xff" * (len(data) - aeroplane_save._HEADER.size),
+])
+def test_truncated_or_corrupt_saves_are_save_errors(damage):
+    data = aeroplane_save.dumps(*mission())
+    with pytest.raises(aeroplane_save.SaveError):
+        aeroplane_save.loads(damage(data))
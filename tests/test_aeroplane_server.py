@@ -0,0 +1,67 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+import aeroplane_server
+
+@pytest.fixture
+def server():
+    server = aeroplane_server.make_server("127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    data = body if isinstance(body, bytes) or body is None else json.dumps(body).encode("utf-8")
+    connection.request(method, path, body=data, headers=headers or {})
+    response = connection.getresponse()
+    result = response.status, json.loads(response.read())
+    connection.close()
+    return result
+
+@pytest.mark.parametrize("seed", [[1], {}, 1.5, True])
+def test_create_rejects_bad_seed(server, seed):
+    status, body = request(server, "POST", "/games", {"seed": seed})
+    assert status == 400
+    assert not body["ok"]
+
+@pytest.mark.parametrize("seed", [None, 7, "abc"])
+def test_create_accepts_int_str_or_no_seed(server, seed):
+    status, body = request(server, "POST", "/games", {"seed": seed})
+    assert status == 200
+    assert body["ok"]
+
+def test_bad_seed_fails_only_its_batch_entry(server):
+    status, body = request(server, "POST", "/batch", {"actions": [
+        {"action": "create", "seed": {}},
+        {"action": "create", "seed": 1},
+        {"game": "$1", "action": "roll"},
+    ]})
+    assert status == 200
+    assert [result["ok"] for result in body["results"]] == [False, True, True]
+
+def test_bad_content_length(server):
+    status, body = request(server, "POST", "/games", b"{}", {"Content-Length": "abc"})
+    assert status == 400
+    assert not body["ok"]
+
+def test_unexpected_error_is_a_500(server, monkeypatch):
+    def broken(game, params):
+        raise RuntimeError("boom")
+    monkeypatch.setitem(aeroplane_server.ACTIONS, "state", broken)
+    _, created = request(server, "POST", "/games", {})
+    status, body = request(server, "GET", f"/games/{created['game']}")
+    assert status == 500
+    assert not body["ok"]
+
+    status, body = request(server, "POST", "/batch", {"actions": [
+        {"game": created["game"], "action": "state"},
+        {"game": created["game"], "action": "roll"},
+    ]})
+    assert status == 200
+    assert [result["ok"] for result in body["results"]] == [False, True]
@@ -0,0 +1,18 @@
+import aeroplane_static
+
+def test_minify_keeps_whitespace_inside_selectors():
+    css = "a :hover { color : red ; }\n/* note */\n@media (max-width: 600px) { li :first-child , b { margin : 0 } }"
+    assert aeroplane_static.minify_css(css) == "a :hover{color:red;}@media (max-width: 600px){li :first-child,b{margin:0}}"
+
+def test_page_css_selectors_survive_minifying():
+    minified = aeroplane_static.minify_css(aeroplane_static.PAGE_CSS)
+    assert ".btn-3d:hover{transform:translateY(-2px);" in minified
+    assert "/*" not in minified
+
+def test_styles_ship_as_a_loader_keyed_on_the_content_hash():
+    static = aeroplane_static.static_content()
+    loader = static["blocks"]["css"]
+    assert loader.startswith("<script>")
+    assert f'data-aeroplane-static="{static["hash"]}"' in loader
+    assert loader.count("</") == 1 and loader.endswith("</script>")
+    assert static["sizes"]["css"] == len(loader.encode("utf-8"))
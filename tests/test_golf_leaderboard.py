@@ -0,0 +1,12 @@
+import golf_leaderboard
+
+def test_the_top_n_cache_keeps_only_the_most_recent_lists(tmp_path):
+    board = golf_leaderboard.Leaderboard(str(tmp_path / "board.sqlite3"), cache_size=3)
+    board.record("ann", 1, 3, 300, 11)
+    for player in ("ann", "bob", "cat", "dan"):
+        board.top_for_player(player)
+    board.top_for_player("bob")
+    assert len(board._cache) == 3
+    assert list(board._cache) == [("player", "cat"), ("player", "dan"), ("player", "bob")]
+    assert board.top_for_player("ann")[0]["score"] == 300
+    board.close()
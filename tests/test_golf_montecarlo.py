@@ -0,0 +1,8 @@
+import golf_montecarlo
+
+def test_positions_sharing_a_cache_key_share_a_heatmap():
+    cache = golf_montecarlo.HeatmapCache()
+    first = cache.heatmap(3, 11, {"x": 50.2, "y": 240.4}, 0, 30)
+    assert cache.heatmap(3, 11, {"x": 49.8, "y": 239.6}, 0, 30) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert golf_montecarlo.landing_heatmap(3, 11, {"x": 49.8, "y": 239.6}, 0, 30) == first
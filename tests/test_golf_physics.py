@@ -0,0 +1,112 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+import golf_levels
+import golf_physics
+
+COMPONENT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "golf_component", "index.html")
+BALL = (50.0, 240.0)
+# (level, level_seed, drag_dx, drag_dy, power, rng_seed)
+SHOTS = [
+    (3, 4242, 300, -40, 100, 99),
+    (3, 4242, 420, 120, 100, 99),
+    (12, 4242, 300, -40, 100, 99),
+    (12, 4242, 420, 120, 100, 99),
+    (25, 4242, -200, 250, 100, 99),
+    (25, 4242, 180, 30, 64, 7)
+]
+
+def play(level, level_seed, drag_dx, drag_dy, power, rng_seed):
+    """(x, y, steps) of a shot from BALL, as golf_replay plays it"""
+    params = golf_levels.difficulty_params(level)
+    layout = golf_levels.level_layout(level, level_seed)
+    rand = golf_physics.mulberry32(rng_seed)
+    vx, vy = golf_physics.launch_velocity(drag_dx, drag_dy, power, params["power_multiplier"], params["shot_variance"], rand)
+    return golf_physics.simulate_shot(*BALL, vx, vy, layout["obstacles"], params["friction"], params["bounce_variance"], rand)
+
+def test_mulberry32_golden_values():
+    rand = golf_physics.mulberry32(12345)
+    assert [rand(), rand(), rand()] == [0.9797282677609473, 0.3067522644996643, 0.484205421525985]
+
+def test_a_seeded_shot_rests_on_a_fixed_point():
+    # Bounces off an obstacle, so the bounce draws are covered too
+    assert play(12, 4242, 300, -40, 100, 99) == (48.388410059484976, 240.59907235043977, 55)
+    assert play(3, 4242, 300, -40, 100, 99) == (152.53650957327528, 227.04171251072177, 154)
+
+def component_function(html, name):
+    """Source of one top-level function in the component's script"""
+    match = re.search(r"^( *)function " + name + r"\(.*?^\1\}", html, re.MULTILINE | re.DOTALL)
+    assert match, f"{name}() not found in the golf component"
+    return match.group(0)
+
+# Runs the component's own launchShot()/stepBall() in node. The harness only
+# declares the globals they read and no-ops the rendering hooks.
+HARNESS = """
+const physics = %(physics)s;
+const shots = %(shots)s;
+let COURSE_WIDTH = physics.course_width, COURSE_HEIGHT = physics.course_height;
+let BALL_SIZE = physics.ball_size, STOP_SPEED = physics.stop_speed;
+let BOUNCE_DAMPING = physics.bounce_damping, maxPower = physics.max_power;
+let MAX_SHOT_STEPS = physics.max_shot_steps;
+let scene, friction, bounceVariance, shotVariance, powerMultiplier;
+let ballX, ballY, velocityX, velocityY, dragDx, dragDy, power, shotSeed, rand;
+let isMoving, awaitingSeed, prevX, prevY, accumulator, lastFrameTime, shotSteps;
+function resetTelemetry() {}
+function requestFrame() {}
+function settleBall() {}
+%(functions)s
+const results = shots.map((shot) => {
+    scene = {obstacles: shot.obstacles};
+    friction = shot.friction;
+    bounceVariance = shot.bounce_variance;
+    shotVariance = shot.shot_variance;
+    powerMultiplier = shot.power_multiplier;
+    [ballX, ballY] = shot.ball;
+    [dragDx, dragDy, power, shotSeed] = [shot.drag_dx, shot.drag_dy, shot.power, shot.rng_seed];
+    isMoving = false;
+    launchShot();
+    let steps = 0;
+    while (!isAtRest() && steps < MAX_SHOT_STEPS) {
+        stepBall();
+        steps += 1;
+    }
+    return [ballX, ballY, steps];
+});
+console.log(JSON.stringify(results));
+"""
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_the_component_integrator_is_bit_identical_to_golf_physics():
+    with open(COMPONENT, encoding="utf-8") as f:
+        html = f.read()
+    functions = "\n".join(
+        component_function(html, name) for name in ("mulberry32", "launchShot", "isAtRest", "sweepObstacles", "stepBall")
+    )
+    shots = []
+    for level, level_seed, drag_dx, drag_dy, power, rng_seed in SHOTS:
+        params = golf_levels.difficulty_params(level)
+        shots.append({
+            "obstacles": golf_levels.level_layout(level, level_seed)["obstacles"],
+            "friction": params["friction"],
+            "bounce_variance": params["bounce_variance"],
+            "shot_variance": params["shot_variance"],
+            "power_multiplier": params["power_multiplier"],
+            "ball": BALL,
+            "drag_dx": drag_dx,
+            "drag_dy": drag_dy,
+            "power": power,
+            "rng_seed": rng_seed
+        })
+    script = HARNESS % {
+        "physics": json.dumps(golf_levels.PHYSICS_CONSTANTS),
+        "shots": json.dumps(shots),
+        "functions": functions
+    }
+    out = subprocess.run(["node", "-"], input=script, capture_output=True, text=True, timeout=60, check=True).stdout
+    # JSON round-trips doubles exactly, so equality here is bit equality
+    assert [tuple(result) for result in json.loads(out)] == [play(*shot) for shot in SHOTS]
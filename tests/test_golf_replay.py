@@ -0,0 +1,11 @@
+import json
+
+import golf_replay
+
+def test_a_trimmed_round_replays_from_its_recorded_level(tmp_path, capsys):
+    shot = golf_replay.make_shot(1234, 0.0, 0.0, 0.0, 99)
+    path = tmp_path / "round.json"
+    path.write_text(json.dumps({"start_level": 7, "shot_offset": 40, "round": golf_replay.encode_round([shot])}))
+    golf_replay.main([str(path)])
+    result = json.loads(capsys.readouterr().out)
+    assert (result["level"], result["strokes"]) == (7, 1)
@@ -0,0 +1,57 @@
+import pytest
+
+import golf_rooms
+
+def holed_room(registry):
+    """A three-player turns room on level 1 where only "c" has not holed"""
+    code = registry.create("a", "Ann")
+    registry.join(code, "b", "Bob")
+    registry.join(code, "c", "Cat")
+    registry.record_shot(code, "a", 1, 0.5, 0.5, True)
+    registry.record_shot(code, "b", 1, 0.5, 0.5, True)
+    return code
+
+def test_last_unholed_player_leaving_advances_the_level():
+    registry = golf_rooms.RoomRegistry()
+    code = holed_room(registry)
+    registry.leave(code, "c")
+    snapshot = registry.poll(code, "a")
+    assert snapshot["level"] == 2
+    assert [p["holed"] for p in snapshot["players"]] == [False, False]
+    assert snapshot["current"] == "Ann"
+
+def test_last_unholed_player_going_stale_advances_the_level():
+    registry = golf_rooms.RoomRegistry()
+    code = holed_room(registry)
+    room = registry._rooms[code]
+    room.players["c"].last_seen -= golf_rooms.PLAYER_TIMEOUT + 1
+    snapshot = registry.poll(code, "a")
+    assert snapshot["level"] == 2
+    assert [p["name"] for p in snapshot["players"]] == ["Ann", "Bob"]
+    assert not any(p["holed"] for p in snapshot["players"])
+
+def test_leaving_with_unholed_players_keeps_the_level():
+    registry = golf_rooms.RoomRegistry()
+    code = holed_room(registry)
+    registry.leave(code, "a")
+    snapshot = registry.poll(code, "c")
+    assert snapshot["level"] == 1
+    assert snapshot["my_turn"]
+
+def test_polling_players_keep_a_room_alive_through_a_long_turn(monkeypatch):
+    registry = golf_rooms.RoomRegistry()
+    code = registry.create("a", "Ann")
+    clock = [golf_rooms.time.monotonic()]
+    monkeypatch.setattr(golf_rooms.time, "monotonic", lambda: clock[0])
+    for _ in range(golf_rooms.ROOM_IDLE_TIMEOUT // golf_rooms.SWEEP_INTERVAL + 2):
+        clock[0] += golf_rooms.SWEEP_INTERVAL
+        registry.poll(code, "a")
+    assert len(registry) == 1
+
+def test_joining_a_room_its_last_player_left_fails():
+    registry = golf_rooms.RoomRegistry()
+    code = registry.create("a", "Ann")
+    registry.leave(code, "a")
+    with pytest.raises(golf_rooms.RoomError):
+        registry.join(code, "b", "Bob")
+    assert len(registry) == 0
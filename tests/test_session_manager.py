@@ -0,0 +1,58 @@
+import os
+import stat
+
+import pytest
+
+import session_manager
+
+def test_checkpoints_live_in_a_private_per_app_directory(tmp_path):
+    manager = session_manager.SessionManager("golf", checkpoint_dir=str(tmp_path / "sessions"))
+    assert manager.checkpoint_dir == str(tmp_path / "sessions" / "golf")
+    for path in (tmp_path / "sessions", tmp_path / "sessions" / "golf"):
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o700
+
+def test_a_directory_others_can_write_is_refused(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    os.chmod(shared, 0o777)
+    with pytest.raises(PermissionError):
+        session_manager.SessionManager("golf", checkpoint_dir=str(shared))
+
+def idle_pair(tmp_path):
+    """Session "a" idle past the limit and session "b" about to rerun"""
+    manager = session_manager.SessionManager("golf", checkpoint_dir=str(tmp_path), idle_seconds=60)
+    idle, idle_params = {"score": 3}, {}
+    manager.activate("a", idle, idle_params, ["score"])
+    manager._sessions[idle[session_manager.TOKEN_KEY]].last_active -= 61
+    manager._last_sweep -= session_manager.SWEEP_INTERVAL
+    return manager, idle, idle_params
+
+def test_an_idle_session_loses_its_keys_without_running_again(tmp_path):
+    manager, idle, _ = idle_pair(tmp_path)
+    manager.activate("b", {"score": 0}, {}, ["score"])
+    assert "score" not in idle and session_manager.EVICTED_KEY in idle
+    stats = manager.stats()
+    assert (stats["sessions"], stats["evicted"], stats["evictions"]) == (1, 1, 1)
+
+def test_an_evicted_session_comes_back_on_its_next_full_rerun(tmp_path):
+    manager, idle, idle_params = idle_pair(tmp_path)
+    manager.activate("b", {"score": 0}, {}, ["score"])
+    assert manager.touch("a", idle)
+    assert manager.activate("a", idle, idle_params, ["score"]) == "restored"
+    assert idle["score"] == 3 and session_manager.EVICTED_KEY not in idle
+    assert manager.stats()["evicted"] == 0
+
+def test_fragment_runs_keep_a_session_active(tmp_path):
+    manager, idle, _ = idle_pair(tmp_path)
+    assert not manager.touch("a", idle)
+    manager.activate("b", {"score": 0}, {}, ["score"])
+    assert manager.stats()["evicted"] == 0
+
+def test_a_reload_gets_its_own_identity(tmp_path):
+    manager = session_manager.SessionManager("golf", checkpoint_dir=str(tmp_path), identity_keys=["session_id", "room_code"])
+    keys = ["score", "session_id", "room_code"]
+    first, params = {"score": 3, "session_id": "first", "room_code": "ABCDE"}, {}
+    manager.activate("a", first, params, keys)
+    reload = {"score": 0, "session_id": "second", "room_code": None}
+    assert manager.activate("b", reload, dict(params), keys) == "restored"
+    assert reload == {"score": 3, "session_id": "second", "room_code": None, session_manager.TOKEN_KEY: first[session_manager.TOKEN_KEY]}
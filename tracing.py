@@ -0,0 +1,120 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+# --------------------------
+# Span Tracing (opt-in)
+# --------------------------
+# Set GAME_TRACE_FILE to record spans for reruns, rule calls and payload
+# builders. Spans are buffered in memory and appended to the file in
+# batches. The file uses the Chrome trace event format, one event per line
+# in a JSON array that is never closed. chrome://tracing and
+# https://ui.perfetto.dev open it as is, and each line is also a JSON object
+# once its trailing comma is stripped.
+#
+# With tracing off, traced() returns the function untouched, and span(),
+# begin() and end() cost a single branch.
+TRACE_FILE = os.environ.get("GAME_TRACE_FILE")
+ENABLED = bool(TRACE_FILE)
+BATCH_SIZE = 512
+
+_buffer = []
+_lock = threading.Lock()
+_pid = os.getpid()
+
+class Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = time.perf_counter_ns()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["raised"] = exc_type.__name__
+        end(self)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name, cat="game", **args):
+    """Context manager timing the with-block as one span"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return Span(name, cat, args)
+
+def begin(name, cat="game", **args):
+    """Open a span that end() closes, for phases that are not one block"""
+    if not ENABLED:
+        return None
+    return Span(name, cat, args)
+
+def end(open_span):
+    if open_span is None:
+        return
+    now = time.perf_counter_ns()
+    event = {
+        "name": open_span.name,
+        "cat": open_span.cat,
+        "ph": "X",
+        "ts": open_span.start / 1000,
+        "dur": (now - open_span.start) / 1000,
+        "pid": _pid,
+        "tid": threading.get_ident()
+    }
+    if open_span.args:
+        event["args"] = open_span.args
+    _buffer.append(event)
+    if len(_buffer) >= BATCH_SIZE:
+        flush()
+
+def traced(name=None, cat="game"):
+    """Decorator recording every call as a span; a no-op when tracing is off"""
+    def decorate(func):
+        if not ENABLED:
+            return func
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(span_name, cat, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+def flush():
+    """Append buffered spans to TRACE_FILE"""
+    if not ENABLED:
+        return
+    with _lock:
+        if not _buffer:
+            return
+        events = _buffer[:]
+        del _buffer[:len(events)]
+        lines = "".join(json.dumps(event, separators=(",", ":"), default=str) + ",\n" for event in events)
+        new_file = not os.path.exists(TRACE_FILE) or os.path.getsize(TRACE_FILE) == 0
+        with open(TRACE_FILE, "a") as f:
+            if new_file:
+                f.write("[\n")
+            f.write(lines)
+
+atexit.register(flush)